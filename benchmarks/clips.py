@@ -0,0 +1,107 @@
+import asyncio
+from pathlib import Path
+from typing import Any, Optional
+
+import ffmpeg
+
+from src.utils.ffmpeg_pool import FFmpegPool
+
+# Default video encoder and container of generated clips
+DEFAULT_VIDEO_CODEC = "libx264"
+DEFAULT_CONTAINER = ".mp4"
+
+# Audio encoder used for each container
+AUDIO_CODECS = {".mp4": "aac", ".mov": "aac", ".mkv": "libopus", ".avi": "libmp3lame"}
+
+# Frame size and rate of generated clips
+VIDEO_SIZE = "640x360"
+VIDEO_RATE = 25
+
+# Sample rate of generated audio (in Hz)
+AUDIO_SAMPLE_RATE = 48000
+
+
+def speech_expression(pitch: float) -> str:
+    """
+    An `aevalsrc` expression that the voice-activity detector accepts as speech.
+
+    Harmonics of a voice-range fundamental, gated on and off at syllable rate.
+    """
+    harmonics = "+".join(f"sin(2*PI*{pitch * k:g}*t)/{k}" for k in range(1, 9))
+    return f"0.2*({harmonics})*gt(sin(2*PI*3*t),0)"
+
+
+def clip_command(
+    output_path: Path,
+    duration: float,
+    video_codec: str = DEFAULT_VIDEO_CODEC,
+    speech: bool = True,
+    pitch: float = 150.0,
+) -> Any:
+    """
+    Build the ffmpeg command rendering one synthetic clip from lavfi test sources.
+
+    Args:
+        output_path (Path): The clip to write. Its suffix selects the container and audio codec.
+        duration (float): Clip duration in seconds.
+        video_codec (str): The ffmpeg video encoder, e.g. libx264, libx265, mpeg4 or libvpx-vp9.
+        speech (bool): Whether the soundtrack is speech-like, or silent.
+        pitch (float): Fundamental frequency of the speech-like soundtrack in Hz, varied per clip
+            so that every clip has different content.
+
+    Returns:
+        Any: The ffmpeg-python output stream.
+    """
+    video = ffmpeg.input(f"testsrc2=size={VIDEO_SIZE}:rate={VIDEO_RATE}:duration={duration}", f="lavfi")
+    if speech:
+        audio_source = f"aevalsrc=exprs='{speech_expression(pitch)}':s={AUDIO_SAMPLE_RATE}:d={duration}"
+    else:
+        audio_source = f"anullsrc=r={AUDIO_SAMPLE_RATE}:cl=mono:d={duration}"
+    audio = ffmpeg.input(audio_source, f="lavfi")
+    return ffmpeg.output(
+        video,
+        audio,
+        str(output_path),
+        vcodec=video_codec,
+        acodec=AUDIO_CODECS.get(output_path.suffix.lower(), "aac"),
+        pix_fmt="yuv420p",
+        shortest=None,
+    ).overwrite_output()
+
+
+async def generate_clips(
+    output_dir: Path,
+    count: int,
+    duration: float,
+    video_codec: str = DEFAULT_VIDEO_CODEC,
+    container: str = DEFAULT_CONTAINER,
+    silent_fraction: float = 0.0,
+    pool: Optional[FFmpegPool] = None,
+) -> list[Path]:
+    """
+    Render synthetic test clips in parallel.
+
+    Args:
+        output_dir (Path): The directory to write the clips to.
+        count (int): Number of clips.
+        duration (float): Duration of every clip in seconds.
+        video_codec (str): The ffmpeg video encoder.
+        container (str): File extension of the clips, one of the supported video extensions.
+        silent_fraction (float): Fraction of clips rendered with a silent soundtrack.
+        pool (Optional[FFmpegPool]): Pool to render in. Defaults to one sized to the core count.
+
+    Returns:
+        list[Path]: The generated clips.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    pool = pool or FFmpegPool(timeout=None)
+    silent_count = round(count * silent_fraction)
+    clip_paths = []
+    commands = []
+    for index in range(count):
+        speech = index >= silent_count
+        clip_path = output_dir / f"{'speech' if speech else 'silent'}_{index:05d}{container}"
+        clip_paths.append(clip_path)
+        commands.append(clip_command(clip_path, duration, video_codec, speech, pitch=110.0 + (7.0 * index) % 150))
+    await asyncio.gather(*(pool.run(command.compile()) for command in commands))
+    return clip_paths
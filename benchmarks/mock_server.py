@@ -0,0 +1,222 @@
+"""A local OpenAI-compatible HTTP server with configurable latency, for benchmarks.
+
+It answers the audio transcription and chat completion endpoints the pipeline calls, with
+synthetic content, after a configurable delay. A fraction of requests can be rejected with
+HTTP 429 to exercise the retry paths. Run it standalone with
+`python -m benchmarks.mock_server --port 8765`.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# Matches the clip id headers of batched labeling requests, e.g. "[clip c3]"
+CLIP_ID_PATTERN = re.compile(r"^\[clip (\w+)\]$", re.MULTILINE)
+
+STATUS_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests"}
+
+
+@dataclass
+class MockSettings:
+    """Behaviour of the mock server.
+
+    Attributes:
+        latency: Mean response delay in seconds
+        jitter: Maximum deviation from the mean delay in seconds, uniformly distributed
+        rate_limit: Probability of answering a request with HTTP 429
+        seed: Seed of the random generator, for reproducible runs
+    """
+
+    latency: float = 0.2
+    jitter: float = 0.05
+    rate_limit: float = 0.0
+    seed: Optional[int] = None
+
+
+class MockOpenAIServer:
+    """Serves `/v1/audio/transcriptions` and `/v1/chat/completions` over HTTP/1.1 with keep-alive.
+
+    `GET /stats` reports the number of requests per endpoint and of injected 429 responses.
+    """
+
+    def __init__(self, settings: Optional[MockSettings] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.settings = settings or MockSettings()
+        self.host = host
+        self.port = port
+        self.requests: Counter[str] = Counter()
+        self.rate_limited = 0
+        self._random = random.Random(self.settings.seed)  # noqa: S311
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._counter = 0
+
+    @property
+    def base_url(self) -> str:
+        """The base URL to configure OpenAI clients with."""
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self) -> None:
+        """Start listening. With port 0 a free port is picked and stored in `port`."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """Stop listening and wait for the server to shut down."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "MockOpenAIServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    def stats(self) -> dict[str, Any]:
+        """Request counters, as served by `GET /stats`."""
+        return {"requests": dict(self.requests), "rate_limited": self.rate_limited}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = await self._read_headers(reader)
+                body = await self._read_body(reader, headers)
+                status, payload, extra_headers = await self._respond(method, path.split("?", 1)[0], headers, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._write_response(writer, status, payload, extra_headers, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> dict[str, str]:
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return headers
+
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> bytes:
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while chunk_size := int((await reader.readline()).split(b";")[0], 16):
+                chunks.append(await reader.readexactly(chunk_size))
+                await reader.readline()
+            # Trailers end with an empty line
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            return b"".join(chunks)
+        return await reader.readexactly(int(headers.get("content-length", 0)))
+
+    async def _respond(
+        self, method: str, path: str, headers: dict[str, str], body: bytes
+    ) -> tuple[int, dict[str, Any], dict[str, str]]:
+        if method == "GET" and path == "/stats":
+            return 200, self.stats(), {}
+        if method != "POST" or not path.endswith(("/audio/transcriptions", "/chat/completions")):
+            return 404, {"error": {"message": f"No mock for {method} {path}", "type": "invalid_request_error"}}, {}
+
+        endpoint = path.rsplit("/", 2)[-2] + "/" + path.rsplit("/", 1)[-1]
+        self.requests[endpoint] += 1
+        self._counter += 1
+        counter = self._counter
+        delay = self.settings.latency + self._random.uniform(-self.settings.jitter, self.settings.jitter)
+        await asyncio.sleep(max(0.0, delay))
+        if self._random.random() < self.settings.rate_limit:
+            self.rate_limited += 1
+            error = {"error": {"message": "Rate limit reached (injected)", "type": "rate_limit_error"}}
+            return 429, error, {"retry-after-ms": "100"}
+        if endpoint == "audio/transcriptions":
+            return 200, {"text": f"Synthetic transcript {counter}: someone describes what happens in the clip."}, {}
+        try:
+            request = json.loads(body)
+        except ValueError:
+            return 400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}}, {}
+        return 200, self._chat_completion(request, counter), {}
+
+    @staticmethod
+    def _chat_completion(request: dict[str, Any], counter: int) -> dict[str, Any]:
+        prompt = "\n".join(str(message.get("content", "")) for message in request.get("messages", []))
+        if request.get("response_format", {}).get("type") == "json_schema":
+            labels = [
+                {"clip_id": clip_id, "label": f"clip-{counter:05d}-{clip_id}"}
+                for clip_id in CLIP_ID_PATTERN.findall(prompt)
+            ]
+            content = json.dumps({"labels": labels})
+        else:
+            content = f"clip-{counter:05d}"
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-mock-{counter}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @staticmethod
+    def _write_response(
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: dict[str, Any],
+        extra_headers: dict[str, str],
+        keep_alive: bool,
+    ) -> None:
+        body = json.dumps(payload).encode()
+        headers = {
+            "content-type": "application/json",
+            "content-length": str(len(body)),
+            "connection": "keep-alive" if keep_alive else "close",
+            **extra_headers,
+        }
+        head = f"HTTP/1.1 {status} {STATUS_REASONS.get(status, '')}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+
+
+async def serve(settings: MockSettings, host: str, port: int) -> None:
+    """Run the mock server until cancelled, announcing its base URL on stdout."""
+    async with MockOpenAIServer(settings, host, port) as server:
+        print(server.base_url, flush=True)
+        await asyncio.Event().wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on, 0 picks a free one")
+    parser.add_argument("--latency", type=float, default=MockSettings.latency, help="Mean response delay (s)")
+    parser.add_argument("--jitter", type=float, default=MockSettings.jitter, help="Maximum delay deviation (s)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Probability of an injected 429")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed, for reproducible runs")
+    args = parser.parse_args()
+    settings = MockSettings(latency=args.latency, jitter=args.jitter, rate_limit=args.rate_limit, seed=args.seed)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(serve(settings, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Measure LabelerPipeline throughput on synthetic clips against a local mock API.
+
+Example:
+    python -m benchmarks.run --clips 50 --duration 20 --latency 0.4 --rate-limit 0.05 --output bench.json
+
+The report is JSON with the run configuration, clips/sec, per-stage latency percentiles
+and peak resident memory, so runs can be compared over time.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import urllib.request
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+from openai import AsyncOpenAI
+
+from agents import set_default_openai_api, set_default_openai_client, set_tracing_disabled
+from benchmarks.clips import DEFAULT_CONTAINER, DEFAULT_VIDEO_CODEC, generate_clips
+from benchmarks.mock_server import MockSettings
+from src.cliptale.batch import BatchLabeler
+from src.models.results import ClipResult
+from src.pipelines.labeler import DEFAULT_JOBS, STAGES, LabelerPipeline
+
+# Seconds to wait for the mock server to announce its address
+SERVER_START_TIMEOUT = 10.0
+
+
+@dataclass
+class BenchmarkConfig:
+    """Parameters of one benchmark run.
+
+    Attributes:
+        clips: Number of synthetic clips
+        duration: Duration of every clip in seconds
+        video_codec: The ffmpeg video encoder of the clips
+        container: File extension of the clips
+        silent_fraction: Fraction of clips with a silent soundtrack
+        latency: Mean response delay of the mock API in seconds
+        jitter: Maximum deviation of the mock API delay in seconds
+        rate_limit: Probability of the mock API answering with HTTP 429
+        jobs: Workers per pipeline stage
+        label_batch_tokens: Token budget of batched labeling calls, None to label clips one by one
+        in_memory_audio: Stream extracted audio into memory instead of temporary files
+        seed: Seed of the mock API, for reproducible runs
+    """
+
+    clips: int = 20
+    duration: float = 10.0
+    video_codec: str = DEFAULT_VIDEO_CODEC
+    container: str = DEFAULT_CONTAINER
+    silent_fraction: float = 0.0
+    latency: float = MockSettings.latency
+    jitter: float = MockSettings.jitter
+    rate_limit: float = 0.0
+    jobs: int = DEFAULT_JOBS
+    label_batch_tokens: Optional[int] = None
+    in_memory_audio: bool = True
+    seed: Optional[int] = None
+
+
+def percentile_summary(values: list[float]) -> dict[str, float]:
+    """Count, p50, p95, mean and max of a list of durations in seconds."""
+    if not values:
+        return {"count": 0}
+    array = np.asarray(values)
+    return {
+        "count": len(values),
+        "p50": float(np.percentile(array, 50)),
+        "p95": float(np.percentile(array, 95)),
+        "mean": float(array.mean()),
+        "max": float(array.max()),
+    }
+
+
+def peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    """Peak resident set size in MiB. Linux reports `ru_maxrss` in KiB, macOS in bytes."""
+    max_rss = resource.getrusage(who).ru_maxrss
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+def summarize(config: BenchmarkConfig, results: dict[str, ClipResult], wall_time: float) -> dict[str, Any]:
+    """Build the benchmark report from the pipeline results."""
+    finished = [result for result in results.values() if result.status == "ok"]
+    return {
+        "config": asdict(config),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "clips": len(results),
+        "failed": len(results) - len(finished),
+        "wall_time": wall_time,
+        "clips_per_sec": len(finished) / wall_time if wall_time > 0 else 0.0,
+        "stages": {
+            stage: percentile_summary([result.timings[stage] for result in results.values() if stage in result.timings])
+            for stage in STAGES
+        },
+        "total": percentile_summary([result.total_time for result in results.values()]),
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_ffmpeg_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+@contextlib.asynccontextmanager
+async def mock_server(config: BenchmarkConfig):
+    """Run the mock API in a subprocess, so it does not compete for this process's event loop."""
+    args = ["--port", "0", "--latency", str(config.latency), "--jitter", str(config.jitter)]
+    args += ["--rate-limit", str(config.rate_limit)]
+    if config.seed is not None:
+        args += ["--seed", str(config.seed)]
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "benchmarks.mock_server", *args, stdout=asyncio.subprocess.PIPE
+    )
+    try:
+        assert process.stdout is not None  # noqa: S101
+        base_url = (await asyncio.wait_for(process.stdout.readline(), SERVER_START_TIMEOUT)).decode().strip()
+        if not base_url:
+            raise RuntimeError("Mock server exited before announcing its address")  # noqa: TRY003
+        yield base_url
+    finally:
+        if process.returncode is None:
+            process.terminate()
+            await process.wait()
+
+
+def fetch_stats(base_url: str) -> dict[str, Any]:
+    """Read the request counters of the mock server."""
+    with urllib.request.urlopen(base_url.rsplit("/v1", 1)[0] + "/stats") as response:  # noqa: S310
+        return json.loads(response.read())
+
+
+def use_mock_api(base_url: str) -> None:
+    """Point the transcriber and the labeling agents at the mock API."""
+    os.environ["LLM_BASE_URL"] = base_url
+    os.environ["LLM_API_KEY"] = "mock"
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    set_default_openai_client(AsyncOpenAI(base_url=base_url, api_key="mock", max_retries=0), use_for_tracing=False)
+    set_default_openai_api("chat_completions")
+    set_tracing_disabled(disabled=True)
+
+
+async def run_benchmark(config: BenchmarkConfig, clips_dir: Path) -> dict[str, Any]:
+    """
+    Generate clips in `clips_dir`, run the pipeline on them against the mock API and report.
+
+    Args:
+        config (BenchmarkConfig): Parameters of the run.
+        clips_dir (Path): An empty directory for the synthetic clips.
+
+    Returns:
+        dict[str, Any]: The benchmark report.
+    """
+    generation_started = time.perf_counter()
+    await generate_clips(
+        clips_dir, config.clips, config.duration, config.video_codec, config.container, config.silent_fraction
+    )
+    generation_time = time.perf_counter() - generation_started
+
+    async with mock_server(config) as base_url:
+        use_mock_api(base_url)
+        batch_labeler = BatchLabeler(config.label_batch_tokens) if config.label_batch_tokens is not None else None
+        pipeline = LabelerPipeline(
+            clips_dir,
+            f"{{label}}{config.container}",
+            jobs=config.jobs,
+            in_memory_audio=config.in_memory_audio,
+            batch_labeler=batch_labeler,
+        )
+        started = time.perf_counter()
+        results = await pipeline.run()
+        wall_time = time.perf_counter() - started
+        server_stats = await asyncio.to_thread(fetch_stats, base_url)
+
+    report = summarize(config, results, wall_time)
+    report["clip_generation_time"] = generation_time
+    report["server"] = server_stats
+    report["metrics"] = pipeline.metrics.registry.snapshot()["metrics"]
+    return report
+
+
+def parse_args(argv: Optional[list[str]] = None) -> tuple[BenchmarkConfig, Optional[Path]]:
+    defaults = BenchmarkConfig()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clips", type=int, default=defaults.clips, help="Number of synthetic clips")
+    parser.add_argument("--duration", type=float, default=defaults.duration, help="Clip duration (s)")
+    parser.add_argument("--codec", default=defaults.video_codec, help="ffmpeg video encoder of the clips")
+    parser.add_argument("--container", default=defaults.container, help="Clip file extension, e.g. .mp4 or .mkv")
+    parser.add_argument("--silent-fraction", type=float, default=defaults.silent_fraction)
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="Mean mock API delay (s)")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="Maximum mock API delay deviation (s)")
+    parser.add_argument("--rate-limit", type=float, default=defaults.rate_limit, help="Probability of a 429")
+    parser.add_argument("--jobs", type=int, default=defaults.jobs, help="Workers per pipeline stage")
+    parser.add_argument("--label-batch-tokens", type=int, default=None, help="Enable batched labeling")
+    parser.add_argument("--audio-files", action="store_true", help="Extract audio to files instead of memory")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    config = BenchmarkConfig(
+        clips=args.clips,
+        duration=args.duration,
+        video_codec=args.codec,
+        container=args.container,
+        silent_fraction=args.silent_fraction,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        jobs=args.jobs,
+        label_batch_tokens=args.label_batch_tokens,
+        in_memory_audio=not args.audio_files,
+        seed=args.seed,
+    )
+    return config, args.output
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    config, output = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="cliptale-bench-") as clips_dir:
+        report = asyncio.run(run_benchmark(config, Path(clips_dir)))
+    text = json.dumps(report, indent=2)
+    if output is None:
+        print(text)
+    else:
+        output.write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
-from .labeler_agent import LabelerAgent
+from .labeler_agent import BatchLabelerAgent, LabelerAgent
 
 __all__ = [
+    "BatchLabelerAgent",
     "LabelerAgent",
 ]
@@ -1,11 +1,24 @@
 from agents import Agent
+from src.models.labels import BatchLabels
+
+DEFAULT_INSTRUCTIONS = "Please label the audio files."
+
+BATCH_INSTRUCTIONS = (
+    "You will receive several clip transcripts, each introduced by a line '[clip <id>]'. "
+    "Label every clip separately and return exactly one entry per clip id."
+)
 
 
 class LabelerAgent(Agent):
-    def __init__(self, name: str = "Labler Agent", instructions: str = "Please label the audio files.") -> None:
+    def __init__(self, name: str = "Labler Agent", instructions: str = DEFAULT_INSTRUCTIONS) -> None:
         super().__init__(name=name, instructions=instructions)
 
 
+class BatchLabelerAgent(Agent):
+    def __init__(self, name: str = "Batch Labeler Agent", instructions: str = DEFAULT_INSTRUCTIONS) -> None:
+        super().__init__(name=name, instructions=f"{instructions}\n\n{BATCH_INSTRUCTIONS}", output_type=BatchLabels)
+
+
 async def main() -> None:
     from rich import print
 
@@ -20,4 +33,7 @@ async def main() -> None:
 if __name__ == "__main__":
     import asyncio
 
+    from src.utils.config import load_env
+
+    load_env()
     asyncio.run(main())
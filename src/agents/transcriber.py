@@ -1,18 +1,69 @@
+import asyncio
+import copy
+import os
+import random
+import weakref
+from collections.abc import Iterable
 from pathlib import Path
-from typing import Optional
+from typing import Any, BinaryIO, Optional
 
-from openai import OpenAI
+from openai import (
+    DEFAULT_CONNECTION_LIMITS,
+    APIConnectionError,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    InternalServerError,
+    OpenAI,
+    RateLimitError,
+)
 
 from src.models.errors import AudioFileNotFoundError, NoAudioTranscribedError, UnsupportedAudioFormatError
+from src.utils.concurrency import AdaptiveLimiter, get_limiter
+from src.utils.config import ensure_env
+
+# Default number of transcription requests in flight per `transcribe_many` call
+DEFAULT_TRANSCRIBE_CONCURRENCY = 8
+
+# Default per-request timeout of transcription calls (in seconds)
+DEFAULT_TRANSCRIBE_TIMEOUT = 120.0
+
+# Default number of retries of a transcription call that failed with a transient error
+DEFAULT_TRANSCRIBE_RETRIES = 3
+
+# Base and cap of the exponential retry backoff (in seconds)
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+
+# Size of the shared connection pool and how long idle connections are kept alive (in seconds)
+MAX_CONNECTIONS = 32
+KEEPALIVE_EXPIRY = 60.0
+
+# Suffixes of the audio files the transcription API is sent, which tell it their format
+TRANSCRIBABLE_SUFFIXES = (".wav", ".mp3", ".m4a", ".ogg", ".flac")
+
+# Errors worth retrying: dropped connections, timeouts, rate limiting and 5xx responses
+TRANSIENT_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Seconds to wait before retry number `attempt` + 1 of a transient error, with full jitter.
+
+    Anywhere between zero and the exponential delay, so calls that failed together do not retry together.
+    """
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))  # noqa: S311
+
 
 # write a transcriber agent that transcribes audio files to text using
 
 
 class Transcriber:
+    MODEL = "gpt-4o-transcribe"
+
     def __init__(self) -> None:
         self.audio_path: Optional[Path] = None
         self.audio_text: Optional[str] = None
         self.fyi_text: Optional[str] = None
+        ensure_env()
         self.client = OpenAI()
 
     def transcribe(self, audio_path: Optional[Path] = None, fyi_text: Optional[str] = None) -> str:
@@ -29,14 +80,28 @@ class Transcriber:
         self.fyi_text = fyi_text
         if self.audio_path is None or not self.audio_path.exists():
             raise AudioFileNotFoundError(self.audio_path)
-        if self.audio_path is None or self.audio_path.suffix not in [".wav", ".mp3"]:
+        if self.audio_path is None or self.audio_path.suffix not in TRANSCRIBABLE_SUFFIXES:
             raise UnsupportedAudioFormatError(self.audio_path.suffix)
 
         # Open the audio file
-        if self.audio_path is not None:
-            with open(self.audio_path, "rb") as audio_file:
-                # Call the transcription API
-                transcription = self.client.audio.transcriptions.create(model="gpt-4o-transcribe", file=audio_file)
+        with open(self.audio_path, "rb") as audio_file:
+            return self.transcribe_file(audio_file, self.audio_path.name)
+
+    def transcribe_file(self, audio_file: BinaryIO, file_name: str = "audio.wav") -> str:
+        """Transcribe audio from an open file-like object, e.g. an in-memory buffer.
+
+        Args:
+            audio_file: Binary file-like object positioned at the start of the audio.
+            file_name: Name announced to the API; its extension tells the API the audio format.
+
+        Returns:
+            Transcribed text from the audio.
+        """
+        if Path(file_name).suffix not in TRANSCRIBABLE_SUFFIXES:
+            raise UnsupportedAudioFormatError(Path(file_name).suffix)
+
+        # Call the transcription API
+        transcription = self.client.audio.transcriptions.create(model=self.MODEL, file=(file_name, audio_file))
 
         # Update the audio_text with the transcribed text
         self.audio_text = transcription.text
@@ -50,3 +115,148 @@ class Transcriber:
         if self.audio_text is None:
             raise NoAudioTranscribedError()
         return self.audio_text
+
+
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI] = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> AsyncOpenAI:
+    """Return the `AsyncOpenAI` client shared by all transcriptions on the running event loop.
+
+    The client keeps a pool of keep-alive connections, so consecutive requests skip the TCP and
+    TLS handshakes. Connections are bound to the loop that opened them, hence one client per loop.
+    `LLM_BASE_URL` and `LLM_API_KEY` point it at an OpenAI-compatible endpoint when set.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        ensure_env()
+        limits = copy.copy(DEFAULT_CONNECTION_LIMITS)
+        limits.max_connections = MAX_CONNECTIONS
+        limits.max_keepalive_connections = MAX_CONNECTIONS
+        limits.keepalive_expiry = KEEPALIVE_EXPIRY
+        client = _async_clients[loop] = AsyncOpenAI(
+            base_url=os.getenv("LLM_BASE_URL") or None,
+            api_key=os.getenv("LLM_API_KEY") or None,
+            # Retries are done by AsyncTranscriber, with jitter
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(limits=limits),
+        )
+    return client
+
+
+class AsyncTranscriber:
+    """Transcribes audio without blocking the event loop, over a shared connection pool.
+
+    Calls that fail with a transient error (connection errors, timeouts, rate limiting, 5xx
+    responses) are retried with exponential backoff and full jitter, so parallel requests that
+    failed together do not retry together. Requests in flight are capped by the adaptive
+    limiter of the endpoint, which backs off on rate limiting and honors `Retry-After`.
+    """
+
+    MODEL = Transcriber.MODEL
+
+    def __init__(
+        self,
+        client: Optional[AsyncOpenAI] = None,
+        timeout: Optional[float] = DEFAULT_TRANSCRIBE_TIMEOUT,
+        max_retries: int = DEFAULT_TRANSCRIBE_RETRIES,
+        limiter: Optional[AdaptiveLimiter] = None,
+    ) -> None:
+        """
+        Args:
+            client: Client to send requests with. Defaults to the client shared on the running loop.
+            timeout: Per-request timeout in seconds, None to wait forever.
+            max_retries: Number of retries of a request that failed with a transient error.
+            limiter: Concurrency limiter of the requests. Defaults to the process-wide limiter of
+                the client's endpoint and the model.
+        """
+        self._client = client
+        self._limiter = limiter
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The client requests are sent with."""
+        return self._client or get_async_client()
+
+    @property
+    def limiter(self) -> AdaptiveLimiter:
+        """The limiter requests wait for a slot in."""
+        return self._limiter or get_limiter(str(getattr(self.client, "base_url", "")), self.MODEL)
+
+    async def transcribe(self, audio_path: Path) -> str:
+        """Transcribe an audio file to text.
+
+        Args:
+            audio_path: Path to the audio file to transcribe.
+
+        Returns:
+            Transcribed text from the audio file.
+        """
+        if not audio_path.exists():
+            raise AudioFileNotFoundError(audio_path)
+        if audio_path.suffix not in TRANSCRIBABLE_SUFFIXES:
+            raise UnsupportedAudioFormatError(audio_path.suffix)
+        with open(audio_path, "rb") as audio_file:
+            return await self.transcribe_file(audio_file, audio_path.name)
+
+    async def transcribe_file(self, audio_file: BinaryIO, file_name: str = "audio.wav") -> str:
+        """Transcribe audio from an open file-like object, e.g. an in-memory buffer.
+
+        Args:
+            audio_file: Seekable binary file-like object positioned at the start of the audio.
+            file_name: Name announced to the API; its extension tells the API the audio format.
+
+        Returns:
+            Transcribed text from the audio.
+        """
+        if Path(file_name).suffix not in TRANSCRIBABLE_SUFFIXES:
+            raise UnsupportedAudioFormatError(Path(file_name).suffix)
+
+        start = audio_file.tell()
+        attempt = 0
+        while True:
+            audio_file.seek(start)
+            try:
+                async with self.limiter.slot():
+                    transcription = await self.client.audio.transcriptions.create(
+                        model=self.MODEL, file=(file_name, audio_file), timeout=self.timeout
+                    )
+            except TRANSIENT_ERRORS:
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+                attempt += 1
+            else:
+                return transcription.text or ""
+
+    async def transcribe_many(
+        self,
+        audio_paths: Iterable[Path],
+        max_concurrency: int = DEFAULT_TRANSCRIBE_CONCURRENCY,
+        return_exceptions: bool = False,
+    ) -> list[Any]:
+        """Transcribe several audio files in parallel.
+
+        Args:
+            audio_paths: Paths to the audio files to transcribe.
+            max_concurrency: Maximum number of requests in flight.
+            return_exceptions: Return the exception of a failed file in place of its text,
+                instead of raising the first one.
+
+        Returns:
+            Transcribed texts, in the order of `audio_paths`.
+        """
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")  # noqa: TRY003
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def transcribe_one(audio_path: Path) -> str:
+            async with semaphore:
+                return await self.transcribe(audio_path)
+
+        return await asyncio.gather(
+            *(transcribe_one(audio_path) for audio_path in audio_paths), return_exceptions=return_exceptions
+        )
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from collections.abc import Sequence
+from typing import Any, Optional
+
+from src.agents import BatchLabelerAgent
+from src.cliptale.labeler import ClipLabeler
+from src.models.errors import AgentCallError, AudioFileNotFoundError
+from src.models.labels import BatchLabels
+from src.utils.loggers import LoggerFactory
+from src.utils.providers import run_agent
+from src.utils.tokens import estimate_tokens
+
+# Default input token budget of a single batched agent call
+DEFAULT_BATCH_TOKEN_BUDGET = 4000
+
+# Default maximum number of clips packed into one agent call
+DEFAULT_MAX_BATCH_SIZE = 32
+
+# Tokens spent per clip on the clip id header and the corresponding output entry
+PER_CLIP_OVERHEAD_TOKENS = 16
+
+
+class BatchLabeler:
+    """Labels many clips with a few structured-output agent calls instead of one call per clip.
+
+    Transcripts are packed greedily into batches that fit the token budget. Each batch is sent to
+    a `BatchLabelerAgent` with a clip id per transcript, and the returned labels are matched back
+    by id. Clips whose label is missing from the reply, or whose batch call failed, fall back to
+    `ClipLabeler.generate_label`. Clips with a `memo` are looked up in it first and only sent
+    when their transcript has not been labeled before.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = DEFAULT_BATCH_TOKEN_BUDGET,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        agent: Optional[BatchLabelerAgent] = None,
+    ) -> None:
+        if token_budget <= 0 or max_batch_size <= 0:
+            raise ValueError("token_budget and max_batch_size must be positive")  # noqa: TRY003
+        self.token_budget = token_budget
+        self.max_batch_size = max_batch_size
+        self.agent = agent or BatchLabelerAgent()
+        self.logger = LoggerFactory.get_logger()
+
+    @staticmethod
+    def cost(clip_labeler: ClipLabeler) -> int:
+        """Estimated input tokens a clip adds to a batch."""
+        return estimate_tokens(clip_labeler.label_text) + PER_CLIP_OVERHEAD_TOKENS
+
+    def plan_batches(self, clip_labelers: Sequence[ClipLabeler]) -> list[list[ClipLabeler]]:
+        """
+        Split clips into consecutive batches that fit the token budget and the batch size limit.
+
+        A clip that exceeds the budget on its own gets a batch of its own.
+        """
+        batches: list[list[ClipLabeler]] = []
+        batch: list[ClipLabeler] = []
+        batch_tokens = 0
+        for clip_labeler in clip_labelers:
+            tokens = self.cost(clip_labeler)
+            if batch and (batch_tokens + tokens > self.token_budget or len(batch) >= self.max_batch_size):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(clip_labeler)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def generate_labels(self, clip_labelers: Sequence[ClipLabeler], return_exceptions: bool = False) -> list[Any]:
+        """
+        Generate labels for transcribed clips.
+
+        Args:
+            clip_labelers (Sequence[ClipLabeler]): Clips whose `audio_text` is set.
+            return_exceptions (bool): Return the exception of a clip without a transcript, or whose
+                fallback call failed, in place of its label instead of raising it.
+
+        Returns:
+            list[Any]: The labels, in the order of `clip_labelers`.
+        """
+        labels: dict[int, Any] = {
+            id(clip_labeler): AudioFileNotFoundError(clip_labeler.file_path)
+            for clip_labeler in clip_labelers
+            if not clip_labeler.audio_text
+        }
+        for clip_labeler in clip_labelers:
+            if id(clip_labeler) not in labels and clip_labeler.memo is not None:
+                memoized = clip_labeler.memo.lookup(clip_labeler.memo_key)
+                if memoized is not None:
+                    labels[id(clip_labeler)] = memoized
+        batches = self.plan_batches([clip_labeler for clip_labeler in clip_labelers if id(clip_labeler) not in labels])
+        batch_results = await asyncio.gather(*(self._label_batch(batch) for batch in batches))
+        for batch_labels in batch_results:
+            labels.update(batch_labels)
+        ordered = [labels[id(clip_labeler)] for clip_labeler in clip_labelers]
+        if not return_exceptions:
+            for label in ordered:
+                if isinstance(label, BaseException):
+                    raise label
+        return ordered
+
+    async def _label_batch(self, batch: list[ClipLabeler]) -> dict[int, Any]:
+        clip_ids = {f"c{index}": clip_labeler for index, clip_labeler in enumerate(batch)}
+        parsed: dict[str, str] = {}
+        if len(batch) > 1:
+            started = time.perf_counter()
+            try:
+                parsed = await self._call_agent(clip_ids)
+            except AgentCallError:
+                self.logger.exception(f"Batch labeling of {len(batch)} clips failed, labeling them one by one")
+            self._memoize(clip_ids, parsed, (time.perf_counter() - started) / len(batch))
+
+        labels: dict[int, Any] = {}
+        fallback = [clip_labeler for clip_id, clip_labeler in clip_ids.items() if not parsed.get(clip_id)]
+        if fallback and len(batch) > 1:
+            self.logger.warning(f"{len(fallback)} of {len(batch)} clips missing from batch reply, labeling them singly")
+        fallback_labels = await asyncio.gather(
+            *(clip_labeler.generate_label() for clip_labeler in fallback), return_exceptions=True
+        )
+        for clip_labeler, label in zip(fallback, fallback_labels):
+            labels[id(clip_labeler)] = label
+        for clip_id, clip_labeler in clip_ids.items():
+            if parsed.get(clip_id):
+                labels[id(clip_labeler)] = parsed[clip_id]
+        return labels
+
+    @staticmethod
+    def _memoize(clip_ids: dict[str, ClipLabeler], parsed: dict[str, str], seconds: float) -> None:
+        for clip_id, label in parsed.items():
+            clip_labeler = clip_ids[clip_id]
+            if label and clip_labeler.memo is not None:
+                clip_labeler.memo.store(clip_labeler.memo_key, label, seconds)
+
+    async def _call_agent(self, clip_ids: dict[str, ClipLabeler]) -> dict[str, str]:
+        agent_input = "\n\n".join(
+            f"[clip {clip_id}]\n{clip_labeler.label_text}" for clip_id, clip_labeler in clip_ids.items()
+        )
+        try:
+            result = await run_agent(self.agent, agent_input)
+        except Exception as e:
+            raise AgentCallError(AgentCallError.message.format(error_message=str(e))) from e
+        output = result.final_output
+        if not isinstance(output, BatchLabels):
+            return {}
+        return {entry.clip_id: entry.label.strip() for entry in output.labels if entry.clip_id in clip_ids}
@@ -0,0 +1,353 @@
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Optional
+
+from src.models.catalog import CatalogEntry, ClipRecord
+from src.utils.config import default_cache_path, resolve_cache_path
+from src.utils.similarity import lsh_band_keys, minhash_signature, ngram_vectors
+
+# Default location of the clip catalog database
+DEFAULT_CATALOG_PATH = default_cache_path("catalog.sqlite3")
+
+# Default number of search hits returned per query
+DEFAULT_SEARCH_LIMIT = 20
+
+# bm25 weights of the label, transcript and file name columns; label matches rank highest
+SEARCH_WEIGHTS = (10.0, 1.0, 2.0)
+
+# Default minimum transcript similarity of clips returned by `ClipCatalog.similar`
+DEFAULT_SIMILARITY_THRESHOLD = 0.5
+
+# Words of a free-text query, quoted before they are handed to FTS5
+QUERY_TOKEN_PATTERN = re.compile(r"\w+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clips (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    label TEXT,
+    transcript TEXT,
+    duration REAL,
+    video_hash TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS clips_path ON clips (path);
+CREATE INDEX IF NOT EXISTS clips_updated ON clips (updated);
+CREATE TABLE IF NOT EXISTS clip_paths (
+    clip_id INTEGER NOT NULL REFERENCES clips (id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    seen REAL NOT NULL,
+    PRIMARY KEY (clip_id, path)
+);
+CREATE INDEX IF NOT EXISTS clip_paths_path ON clip_paths (path);
+CREATE TABLE IF NOT EXISTS clip_bands (
+    clip_id INTEGER NOT NULL REFERENCES clips (id) ON DELETE CASCADE,
+    band_key INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS clip_bands_key ON clip_bands (band_key);
+CREATE INDEX IF NOT EXISTS clip_bands_clip ON clip_bands (clip_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS clips_fts USING fts5(
+    label, transcript, name, content='clips', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS clips_fts_insert AFTER INSERT ON clips BEGIN
+    INSERT INTO clips_fts (rowid, label, transcript, name) VALUES (new.id, new.label, new.transcript, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS clips_fts_delete AFTER DELETE ON clips BEGIN
+    INSERT INTO clips_fts (clips_fts, rowid, label, transcript, name)
+    VALUES ('delete', old.id, old.label, old.transcript, old.name);
+END;
+CREATE TRIGGER IF NOT EXISTS clips_fts_update AFTER UPDATE OF label, transcript, name ON clips BEGIN
+    INSERT INTO clips_fts (clips_fts, rowid, label, transcript, name)
+    VALUES ('delete', old.id, old.label, old.transcript, old.name);
+    INSERT INTO clips_fts (rowid, label, transcript, name) VALUES (new.id, new.label, new.transcript, new.name);
+END;
+"""
+
+UPSERT = """
+INSERT INTO clips (fingerprint, path, name, label, transcript, duration, video_hash, created, updated)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (fingerprint) DO UPDATE SET
+    path = excluded.path,
+    name = excluded.name,
+    label = COALESCE(excluded.label, label),
+    transcript = COALESCE(excluded.transcript, transcript),
+    duration = COALESCE(excluded.duration, duration),
+    video_hash = COALESCE(excluded.video_hash, video_hash),
+    updated = excluded.updated
+"""
+
+ENTRY_COLUMNS = ", ".join(
+    f"clips.{column}"
+    for column in ("id", "fingerprint", "path", "label", "transcript", "duration", "created", "updated")
+)
+
+
+def match_expression(query: str, prefix: bool = True) -> str:
+    """
+    Turn free text into an FTS5 query matching clips that contain every word.
+
+    Words are quoted, so FTS5 operators and punctuation in the text are taken literally.
+
+    Args:
+        query (str): Free text, e.g. "interview rooftop".
+        prefix (bool): Whether the last word also matches longer words, for search-as-you-type.
+
+    Returns:
+        str: The FTS5 query, empty if the text contains no words.
+    """
+    words = QUERY_TOKEN_PATTERN.findall(query)
+    terms = [f'"{word}"' for word in words]
+    if terms and prefix:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+class ClipCatalog:
+    """Persistent SQLite catalog of labeled clips with full-text search.
+
+    Every clip is one record keyed by its content fingerprint, so it keeps its transcript and
+    label across renames; the paths it was seen under are kept as its history. Labels,
+    transcripts and file names are indexed with FTS5 and search hits are ranked with bm25.
+    Transcripts are also indexed by their MinHash LSH band keys, so clips with similar dialogue
+    are found through an index lookup instead of a scan of the library. Perceptual video hashes
+    are kept so later runs recognize copies of cataloged clips.
+    """
+
+    def __init__(self, db_path: Path = DEFAULT_CATALOG_PATH) -> None:
+        db_path = resolve_cache_path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(clips)")}
+        if columns and "video_hash" not in columns:
+            # Catalogs created before clips were hashed perceptually
+            self._connection.execute("ALTER TABLE clips ADD COLUMN video_hash TEXT")
+        self._connection.executescript(SCHEMA)
+        self._connection.commit()
+
+    def upsert(self, records: Iterable[ClipRecord]) -> int:
+        """
+        Insert or update clips in one transaction.
+
+        Fields that are None keep their cataloged values, e.g. a clip whose label came from the
+        result cache keeps the transcript it was cataloged with.
+
+        Args:
+            records (Iterable[ClipRecord]): The clips to store.
+
+        Returns:
+            int: Number of records written.
+        """
+        now = time.time()
+        count = 0
+        with self._lock, self._connection:
+            for record in records:
+                path = str(record.path)
+                self._connection.execute(
+                    UPSERT,
+                    (
+                        record.fingerprint,
+                        path,
+                        Path(path).stem,
+                        record.label,
+                        record.transcript,
+                        record.duration,
+                        f"{record.video_hash:x}" if record.video_hash is not None else None,
+                        now,
+                        now,
+                    ),
+                )
+                (clip_id,) = self._connection.execute(
+                    "SELECT id FROM clips WHERE fingerprint = ?", (record.fingerprint,)
+                ).fetchone()
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO clip_paths VALUES (?, ?, ?)",
+                    [(clip_id, str(seen), now) for seen in (*record.previous_paths, record.path)],
+                )
+                if record.transcript is not None:
+                    self._connection.execute("DELETE FROM clip_bands WHERE clip_id = ?", (clip_id,))
+                    self._connection.executemany(
+                        "INSERT INTO clip_bands VALUES (?, ?)",
+                        [(clip_id, key) for key in lsh_band_keys(minhash_signature(record.transcript))],
+                    )
+                count += 1
+        return count
+
+    def search(
+        self, query: str, limit: int = DEFAULT_SEARCH_LIMIT, offset: int = 0, raw: bool = False
+    ) -> list[CatalogEntry]:
+        """
+        Find clips whose label, transcript or file name match a query, best matches first.
+
+        Args:
+            query (str): Free text such as "interview rooftop", matching clips that contain all words.
+            limit (int): Maximum number of hits.
+            offset (int): Number of hits to skip, for paging.
+            raw (bool): Pass the query to FTS5 unchanged, to use its syntax such as OR, NEAR or `label:`.
+
+        Returns:
+            list[CatalogEntry]: The hits with their score and a transcript snippet.
+        """
+        expression = query if raw else match_expression(query)
+        if not expression:
+            return []
+        weights = ", ".join(str(weight) for weight in SEARCH_WEIGHTS)
+        with self._lock:
+            rows = self._connection.execute(
+                f"""
+                SELECT {ENTRY_COLUMNS}, bm25(clips_fts, {weights}) AS score,
+                    snippet(clips_fts, 1, '[', ']', '...', 12)
+                FROM clips_fts JOIN clips ON clips.id = clips_fts.rowid
+                WHERE clips_fts MATCH ?
+                ORDER BY score
+                LIMIT ? OFFSET ?
+                """,  # noqa: S608
+                (expression, limit, offset),
+            ).fetchall()
+            return [self._entry(row[:8], score=row[8], snippet=row[9]) for row in rows]
+
+    def similar(
+        self,
+        fingerprint: Optional[str] = None,
+        text: Optional[str] = None,
+        threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        limit: int = DEFAULT_SEARCH_LIMIT,
+    ) -> list[CatalogEntry]:
+        """
+        Find clips whose transcripts are similar to a cataloged clip's or to a text, e.g. other angles of a take.
+
+        Candidates share a MinHash LSH band with the transcript and are ranked by the cosine
+        similarity of their character n-gram profiles.
+
+        Args:
+            fingerprint (Optional[str]): A cataloged clip to find relatives of, excluded from the hits.
+            text (Optional[str]): A transcript to compare against, if no fingerprint is given.
+            threshold (float): Minimum similarity of the hits, between 0 and 1.
+            limit (int): Maximum number of hits.
+
+        Returns:
+            list[CatalogEntry]: The hits with their `similarity`, most similar first.
+        """
+        if fingerprint is not None:
+            entry = self.get(fingerprint)
+            text = entry.transcript if entry is not None else None
+        if not text:
+            return []
+        keys = lsh_band_keys(minhash_signature(text))
+        with self._lock:
+            rows = self._connection.execute(
+                f"""
+                SELECT {ENTRY_COLUMNS} FROM clips
+                WHERE clips.id IN (
+                    SELECT DISTINCT clip_id FROM clip_bands WHERE band_key IN ({", ".join("?" * len(keys))})
+                ) AND clips.fingerprint IS NOT ?
+                """,  # noqa: S608
+                (*keys, fingerprint),
+            ).fetchall()
+            if not rows:
+                return []
+            vectors = ngram_vectors([text, *(row[4] or "" for row in rows)])
+            scores = vectors[1:] @ vectors[0]
+            ranked = sorted(zip(scores.tolist(), rows), key=lambda hit: -hit[0])
+            hits = []
+            for score, row in ranked[:limit]:
+                if score < threshold:
+                    break
+                hits.append(self._entry(row))
+                hits[-1].similarity = score
+        return hits
+
+    def video_hashes(self) -> list[tuple[int, Path, Optional[float], str, str]]:
+        """
+        The perceptual video hashes of the labeled clips, to find copies of them among new clips.
+
+        Returns:
+            list[tuple[int, Path, Optional[float], str, str]]: (video hash, path, duration, label,
+                fingerprint) per clip, oldest first.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT video_hash, path, duration, label, fingerprint FROM clips "
+                "WHERE video_hash IS NOT NULL AND label IS NOT NULL ORDER BY created, id"
+            ).fetchall()
+        return [
+            (int(video_hash, 16), Path(path), duration, label, fingerprint)
+            for video_hash, path, duration, label, fingerprint in rows
+        ]
+
+    def get(self, fingerprint: str) -> Optional[CatalogEntry]:
+        """The catalog entry of a clip by fingerprint, None if it is not cataloged."""
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {ENTRY_COLUMNS} FROM clips WHERE fingerprint = ?",  # noqa: S608
+                (fingerprint,),
+            ).fetchone()
+            return self._entry(row) if row is not None else None
+
+    def find(self, path: Path) -> Optional[CatalogEntry]:
+        """The catalog entry of the clip at `path` now or in the past, None if it is not cataloged."""
+        with self._lock:
+            row = self._connection.execute(
+                f"""
+                SELECT {ENTRY_COLUMNS} FROM clips JOIN clip_paths ON clip_paths.clip_id = clips.id
+                WHERE clip_paths.path = ?
+                ORDER BY clip_paths.seen DESC
+                LIMIT 1
+                """,  # noqa: S608
+                (str(path),),
+            ).fetchone()
+            return self._entry(row) if row is not None else None
+
+    def recent(self, limit: int = DEFAULT_SEARCH_LIMIT, offset: int = 0) -> list[CatalogEntry]:
+        """The most recently cataloged clips, newest first."""
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT {ENTRY_COLUMNS} FROM clips ORDER BY updated DESC LIMIT ? OFFSET ?",  # noqa: S608
+                (limit, offset),
+            ).fetchall()
+            return [self._entry(row) for row in rows]
+
+    def remove(self, fingerprint: str) -> bool:
+        """Delete a clip and its path history, returning whether it was cataloged."""
+        with self._lock, self._connection:
+            cursor = self._connection.execute("DELETE FROM clips WHERE fingerprint = ?", (fingerprint,))
+        return cursor.rowcount > 0
+
+    def _entry(self, row: tuple, score: Optional[float] = None, snippet: Optional[str] = None) -> CatalogEntry:
+        # Called with the lock held
+        clip_id, fingerprint, path, label, transcript, duration, created, updated = row
+        paths = self._connection.execute(
+            "SELECT path FROM clip_paths WHERE clip_id = ? ORDER BY seen, rowid", (clip_id,)
+        ).fetchall()
+        return CatalogEntry(
+            fingerprint=fingerprint,
+            path=Path(path),
+            label=label,
+            transcript=transcript,
+            duration=duration,
+            created=created,
+            updated=updated,
+            paths=[Path(seen) for (seen,) in paths],
+            score=score,
+            snippet=snippet,
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute("SELECT COUNT(*) FROM clips").fetchone()
+        return int(count)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
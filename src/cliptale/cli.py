@@ -0,0 +1,207 @@
+import argparse
+import sys
+from collections import Counter
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Optional
+
+from src.utils.config import DEFAULT_RENAME_TEMPLATE
+
+# Options of `label` that only apply to one-off runs, by their argparse destination
+ONE_OFF_OPTIONS = (
+    "batch_tokens",
+    "label_tokens",
+    "stream_words",
+    "sampling",
+    "duplicate_threshold",
+    "copy_distance",
+    "trace",
+)
+
+# Modules of this package import only the standard library at the top; everything a subcommand
+# needs, in particular the OpenAI and agents SDKs, ffmpeg bindings and NumPy, is imported inside
+# the subcommand, so `cliptale --help` and `cliptale scan` start without loading them.
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cliptale", description="Label video clips by what is said in them.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    label = subcommands.add_parser("label", help="transcribe, label and rename the clips in a directory")
+    label.add_argument("work_dir", type=Path, help="directory of clips")
+    label.add_argument(
+        "--template", default=DEFAULT_RENAME_TEMPLATE, help="new file name, containing {label} and optionally {ext}"
+    )
+    label.add_argument("--jobs", type=int, default=4, help="concurrent workers per pipeline stage")
+    label.add_argument("--cache", type=Path, help="result cache database, so re-runs skip finished clips")
+    label.add_argument("--catalog", type=Path, help="clip catalog database to record labeled clips in")
+    label.add_argument("--probe-index", type=Path, help="index database of ffprobe results")
+    label.add_argument("--metrics", type=Path, help="Prometheus textfile, or JSON if it ends in .json")
+    label.add_argument("--memo", type=Path, help="response memo database, so repeated transcripts are labeled once")
+    label.add_argument(
+        "--min-speech-ratio", type=_speech_ratio, help="skip transcribing clips with less speech, e.g. 0.05"
+    )
+    label.add_argument("--watch", action="store_true", help="keep watching the directory for new clips")
+    one_off = label.add_argument_group("one-off runs", "not supported with --watch")
+    one_off.add_argument("--batch-tokens", type=int, help="token budget of batched labeling calls")
+    one_off.add_argument("--label-tokens", type=int, help="token budget of a transcript sent for labeling")
+    one_off.add_argument("--stream-words", type=int, help="transcribe in chunks, labeling after this many words")
+    one_off.add_argument(
+        "--sampling", type=_sampling_spec, help='audio sampling windows, e.g. "start-middle-end" or "5"'
+    )
+    one_off.add_argument("--duplicate-threshold", type=float, help="label near-duplicate transcripts once")
+    one_off.add_argument("--copy-distance", type=int, help="rename copies of the same footage after the original")
+    one_off.add_argument("--trace", type=Path, help="Chrome trace-event file to record the run in")
+    label.set_defaults(handler=_label)
+
+    scan = subcommands.add_parser("scan", help="list the video files in a directory")
+    _add_scan_arguments(scan)
+    scan.set_defaults(handler=_scan)
+
+    status = subcommands.add_parser("status", help="show which clips in a directory are labeled, failed or pending")
+    _add_scan_arguments(status)
+    status.add_argument("--journal", type=Path, help="processed-files journal, defaults to the one in the directory")
+    status.add_argument("--catalog", type=Path, help="clip catalog database to count the cataloged clips of")
+    status.set_defaults(handler=_status)
+    return parser
+
+
+def _add_scan_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("work_dir", type=Path, help="directory of clips")
+    parser.add_argument("--no-recursive", dest="recursive", action="store_false", help="skip subdirectories")
+    parser.add_argument("--include", action="append", default=[], help="glob of files to list, repeatable")
+    parser.add_argument("--exclude", action="append", default=[], help="glob of files to skip, repeatable")
+
+
+def _sampling_spec(spec: str) -> tuple[float, ...]:
+    """Parse a --sampling value, so argparse reports an invalid spec as a usage error."""
+    from src.utils.sampling import parse_sampling
+
+    try:
+        return parse_sampling(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def _speech_ratio(value: str) -> float:
+    """Parse a --min-speech-ratio value, a fraction between 0 and 1."""
+    ratio = float(value)
+    if not 0.0 <= ratio <= 1.0:
+        raise argparse.ArgumentTypeError(f"speech ratio must be between 0 and 1, got {value}")  # noqa: TRY003
+    return ratio
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Run the `cliptale` command line.
+
+    Args:
+        argv (Optional[Sequence[str]]): The arguments, defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: The exit code, 1 if any clip failed.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "label" and args.watch:
+        given = [name for name in ONE_OFF_OPTIONS if getattr(args, name) is not None]
+        if given:
+            parser.error(f"--{given[0].replace('_', '-')} is not supported with --watch")
+    if not args.work_dir.is_dir():
+        parser.error(f"not a directory: {args.work_dir}")
+    return int(args.handler(args))
+
+
+def _label(args: argparse.Namespace) -> int:
+    import asyncio
+
+    from src.utils.config import load_env
+
+    # Before the pipeline is imported, so the API settings from .env apply
+    load_env()
+    from src.cliptale.labeler import DEFAULT_LABEL_TOKEN_BUDGET
+    from src.pipelines.labeler import run_labeler_pipeline, run_watch_mode
+    from src.utils.sampling import START_ONLY
+
+    if args.watch:
+        try:
+            results = asyncio.run(
+                run_watch_mode(
+                    args.work_dir,
+                    args.template,
+                    jobs=args.jobs,
+                    cache_path=args.cache,
+                    metrics_path=args.metrics,
+                    probe_index_path=args.probe_index,
+                    catalog_path=args.catalog,
+                    memo_path=args.memo,
+                    min_speech_ratio=args.min_speech_ratio,
+                )
+            )
+        except KeyboardInterrupt:
+            return 0
+    else:
+        results = asyncio.run(
+            run_labeler_pipeline(
+                args.work_dir,
+                args.template,
+                jobs=args.jobs,
+                cache_path=args.cache,
+                label_batch_tokens=args.batch_tokens,
+                metrics_path=args.metrics,
+                trace_path=args.trace,
+                sampling=args.sampling or START_ONLY,
+                probe_index_path=args.probe_index,
+                catalog_path=args.catalog,
+                duplicate_threshold=args.duplicate_threshold,
+                copy_distance=args.copy_distance,
+                memo_path=args.memo,
+                label_token_budget=args.label_tokens or DEFAULT_LABEL_TOKEN_BUDGET,
+                stream_min_words=args.stream_words,
+                min_speech_ratio=args.min_speech_ratio,
+            )
+        )
+    failed = [result for result in results.values() if result.status == "failed"]
+    for result in failed:
+        print(f"{result.source_path}: {result.error}", file=sys.stderr)
+    print(f"Labeled {len(results) - len(failed)} clips, {len(failed)} failed")
+    return 1 if failed else 0
+
+
+def _scan(args: argparse.Namespace) -> int:
+    from src.utils.scanner import scan_videos
+
+    for file_path in scan_videos(args.work_dir, args.recursive, args.include, args.exclude):
+        print(file_path)
+    return 0
+
+
+def _status(args: argparse.Namespace) -> int:
+    from src.utils.journal import JOURNAL_FILE_NAME, ProcessedJournal
+    from src.utils.scanner import scan_videos
+
+    journal_path = args.journal or args.work_dir / JOURNAL_FILE_NAME
+    journal = ProcessedJournal(journal_path) if journal_path.exists() else None
+    counts: Counter[str] = Counter()
+    try:
+        for file_path in scan_videos(args.work_dir, args.recursive, args.include, args.exclude):
+            status = journal.status(file_path) if journal is not None else None
+            counts["labeled" if status == "ok" else status or "pending"] += 1
+    finally:
+        if journal is not None:
+            journal.close()
+    summary = ", ".join(f"{counts[key]} {key}" for key in ("labeled", "failed", "pending"))
+    print(f"{sum(counts.values())} clips: {summary}")
+    if args.catalog is not None and args.catalog.exists():
+        from src.cliptale.catalog import ClipCatalog
+
+        catalog = ClipCatalog(args.catalog)
+        try:
+            print(f"{len(catalog)} clips cataloged in {args.catalog}")
+        finally:
+            catalog.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import asyncio
+from pathlib import Path
+from typing import Optional, Union
+
+from src.cliptale.labeler import ClipLabeler
+from src.utils.perceptual import BKTree
+from src.utils.similarity import TranscriptIndex, normalize_text
+
+# Default minimum n-gram cosine similarity for two transcripts to count as the same dialogue
+DEFAULT_DUPLICATE_THRESHOLD = 0.85
+
+# Transcripts shorter than this (in characters) are too generic to group, e.g. "Okay, rolling."
+MIN_DUPLICATE_CHARS = 40
+
+# Default maximum Hamming distance between the video hashes of copies, summed over the sampled frames
+DEFAULT_COPY_DISTANCE = 40
+
+# Copies differ in duration by at most this many seconds, or this fraction of the duration if larger
+COPY_DURATION_TOLERANCE = 0.5
+COPY_DURATION_RATIO = 0.01
+
+
+class DuplicateGroup:
+    """Clips that are near-duplicates of the group's first clip and share its label."""
+
+    def __init__(self, leader: Path, row: int) -> None:
+        self.leader = leader
+        self.row = row
+        self.members = 1
+        self._label: asyncio.Future[Optional[str]] = asyncio.get_running_loop().create_future()
+
+    def resolve(self, label: Optional[str]) -> None:
+        if not self._label.done():
+            self._label.set_result(label)
+
+    def done(self) -> bool:
+        """Whether the label of the group's first clip is known."""
+        return self._label.done()
+
+    async def label(self) -> Optional[str]:
+        """Wait for the label of the group's first clip, None if labeling it failed."""
+        return await asyncio.shield(self._label)
+
+
+class DuplicateLabeler:
+    """Groups clips with near-identical transcripts, e.g. the cameras of a multi-cam shoot, so every
+    group is labeled with one agent call.
+
+    The first clip of a group is labeled as usual. Later clips wait for its label and get it with
+    their position in the group appended, so renamed clips do not collide.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_DUPLICATE_THRESHOLD, index: Optional[TranscriptIndex] = None):
+        """
+        Args:
+            threshold (float): Minimum cosine similarity of the transcripts' n-gram profiles.
+            index (Optional[TranscriptIndex]): Index of the transcripts of the groups' first clips.
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")  # noqa: TRY003
+        self.threshold = threshold
+        self.index = index or TranscriptIndex()
+        self._groups: dict[int, DuplicateGroup] = {}
+
+    def join(self, clip_labeler: ClipLabeler) -> tuple[Optional[DuplicateGroup], int]:
+        """
+        Add a transcribed clip to the group of its near-duplicates, founding a new group if there is none.
+
+        Args:
+            clip_labeler (ClipLabeler): The clip, with its transcript in `audio_text`.
+
+        Returns:
+            tuple[Optional[DuplicateGroup], int]: The group and the clip's position in it, 0 for the
+                clip whose label the group shares. No group for clips with short or no transcripts.
+        """
+        text = clip_labeler.audio_text
+        if not text or len(normalize_text(text)) < MIN_DUPLICATE_CHARS:
+            return None, 0
+        for row, _ in self.index.search(text, self.threshold, limit=1):
+            group = self._groups[row]
+            group.members += 1
+            return group, group.members - 1
+        row = self.index.add(text)
+        group = self._groups[row] = DuplicateGroup(clip_labeler.file_path, row)
+        return group, 0
+
+    def resolve(self, group: DuplicateGroup, label: Optional[str]) -> None:
+        """Share the label of a group's first clip, or disband the group if labeling it failed."""
+        group.resolve(label)
+        if not label and self._groups.pop(group.row, None) is not None:
+            self.index.remove(group.row)
+
+    @staticmethod
+    def member_label(label: str, position: int) -> str:
+        """The label of the clip at `position` in a group labeled `label`."""
+        return label if position == 0 else f"{label}_{position + 1}"
+
+
+class CopyDetector:
+    """Finds copies of the same footage, e.g. re-imported cards or exports in another container, by
+    the perceptual hashes of their frames, so only one of them is transcribed and labeled.
+
+    The first clip of a group is labeled as usual, or the group is seeded with an already labeled
+    clip. Later clips get its label with their position in the group appended.
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_COPY_DISTANCE):
+        """
+        Args:
+            max_distance (int): Maximum Hamming distance between the video hashes of copies.
+        """
+        if max_distance < 0:
+            raise ValueError("max_distance must not be negative")  # noqa: TRY003
+        self.max_distance = max_distance
+        self._tree = BKTree()
+        self._groups: dict[int, DuplicateGroup] = {}
+        self._durations: dict[int, Optional[float]] = {}
+        self._members: dict[Union[str, Path], tuple[DuplicateGroup, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def join(
+        self,
+        video_hash: int,
+        file_path: Path,
+        duration: Optional[float],
+        label: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+    ) -> tuple[DuplicateGroup, int]:
+        """
+        Add a clip to the group of its copies, founding a new group if there is none.
+
+        A clip that joined before, e.g. when the detector was seeded from the catalog of an earlier
+        run, gets its group and position back, so re-runs neither count it as a copy of itself nor
+        renumber its copies. Clips are recognized by fingerprint, or by path without one.
+
+        Args:
+            video_hash (int): The clip's hash from `compute_video_hash`.
+            file_path (Path): The clip.
+            duration (Optional[float]): Duration of the clip in seconds.
+            label (Optional[str]): The clip's label if it is already labeled, e.g. in the catalog.
+            fingerprint (Optional[str]): The clip's content fingerprint, see `fingerprint_file`.
+
+        Returns:
+            tuple[DuplicateGroup, int]: The group and the clip's position in it, 0 for the clip whose
+                label the group shares.
+        """
+        key = fingerprint or file_path
+        member = self._members.get(key)
+        if member is not None and self._groups.get(member[0].row) is member[0]:
+            return member
+        for _, row in self._tree.search(video_hash, self.max_distance):
+            group = self._groups.get(row)
+            if group is not None and self._same_length(duration, self._durations[row]):
+                group.members += 1
+                member = self._members[key] = (group, group.members - 1)
+                return member
+        row = len(self._durations)
+        group = self._groups[row] = DuplicateGroup(file_path, row)
+        self._durations[row] = duration
+        self._tree.add(video_hash, row)
+        if label is not None:
+            group.resolve(label)
+        member = self._members[key] = (group, 0)
+        return member
+
+    def resolve(self, group: DuplicateGroup, label: Optional[str]) -> None:
+        """Share the label of a group's first clip, or disband the group if labeling it failed."""
+        group.resolve(label)
+        if not label:
+            self._groups.pop(group.row, None)
+
+    def release(self) -> None:
+        """Disband the groups whose first clip never finished, so their copies stop waiting."""
+        for group in list(self._groups.values()):
+            if not group.done():
+                self.resolve(group, None)
+
+    @staticmethod
+    def _same_length(duration: Optional[float], other: Optional[float]) -> bool:
+        if duration is None or other is None:
+            return True
+        return abs(duration - other) <= max(COPY_DURATION_TOLERANCE, COPY_DURATION_RATIO * max(duration, other))
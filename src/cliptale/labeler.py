@@ -1,22 +1,43 @@
+import hashlib
+import importlib
+import os
+import tempfile
+from collections.abc import Sequence
+from functools import cached_property, partial
 from pathlib import Path
-from typing import NewType, Optional
+from typing import TYPE_CHECKING, Any, BinaryIO, NewType, Optional
 
-import ffmpeg
-
-from agents import Runner
-from src.agents import LabelerAgent
 from src.models.errors import (
     AgentCallError,
     AudioFileNotFoundError,
+    FFmpegProcessError,
     InvalidDurationError,
     InvalidTemplateError,
+    NoAudioStreamError,
     NoTemplateError,
+    UnusableClipError,
     VideoExtensionNotSupportedError,
     VideoFileNotFoundError,
 )
+from src.utils.audio import (
+    PIPE_MUXER_OPTIONS,
+    SPEECH_MP3_BITRATE,
+    SPEECH_SAMPLE_RATE,
+    fix_wav_header,
+    passthrough_format,
+)
 from src.utils.config import (
-    TMP_DIR,
+    VIDEO_EXTENSIONS,
+    tmp_dir,
 )
+from src.utils.ffmpeg_pool import FFmpegPool, get_ffmpeg_pool
+from src.utils.memo import ResponseMemo, response_key
+from src.utils.probe import MediaInfo, ProbeIndex, probe_duration, probe_media
+from src.utils.sampling import START_ONLY, SamplingWindow, plan_windows
+from src.utils.tokens import compact_transcript
+
+if TYPE_CHECKING:
+    from src.agents import LabelerAgent
 
 # Type alias for duration in seconds to improve type safety and readability
 Duration_s = NewType("Duration_s", int)
@@ -24,6 +45,23 @@ Duration_s = NewType("Duration_s", int)
 # Default duration limit for clip analysis (in seconds)
 DEFAULT_DURATION_LIMIT = Duration_s(15)
 
+# Default estimated tokens of a transcript sent for labeling; longer transcripts keep their start and end
+DEFAULT_LABEL_TOKEN_BUDGET = 512
+
+# Size above which in-memory extracted audio spills to a temporary file (in bytes)
+DEFAULT_SPILL_THRESHOLD = 16 * 1024 * 1024
+
+# Heavy dependencies imported on first use, so importing this module stays fast: name -> (module, attribute)
+_LAZY_ATTRIBUTES = {"ffmpeg": ("ffmpeg", None), "Runner": ("agents", "Runner")}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")  # noqa: TRY003
+    module_name, attribute = _LAZY_ATTRIBUTES[name]
+    module = importlib.import_module(module_name)
+    return module if attribute is None else getattr(module, attribute)
+
 
 class ClipLabeler:
     """A class for labeling video clips by analyzing their audio content.
@@ -31,64 +69,353 @@ class ClipLabeler:
     Attributes:
         file_path: Path to the video file
         rename_template: Optional template string for renaming labeled files
-        duration_limit: Maximum duration in seconds to analyze from start/end of clip
+        duration_limit: Total duration in seconds of audio to analyze, split between the sampling windows
+        sampling: Positions of the sampling windows as fractions of the clip, 0.0 at the start and 1.0 at the end
+        label_token_budget: Estimated tokens of the transcript sent for labeling, see `label_text`
+        audio_passthrough: Stream-copy source audio the transcription API accepts instead of re-encoding it
+        audio_codec: Codec of the extracted audio, set by the extraction
+        audio_copied: Whether the extracted audio was stream-copied from the clip
     """
 
-    SUPPORTED_VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+    SUPPORTED_VIDEO_EXTENSIONS = VIDEO_EXTENSIONS
 
-    def __init__(self, file_path: Path, duration_limit: Duration_s = DEFAULT_DURATION_LIMIT) -> None:
+    def __init__(
+        self,
+        file_path: Path,
+        duration_limit: Duration_s = DEFAULT_DURATION_LIMIT,
+        sampling: Sequence[float] = START_ONLY,
+        memo: Optional[ResponseMemo] = None,
+        label_token_budget: Optional[int] = DEFAULT_LABEL_TOKEN_BUDGET,
+        audio_passthrough: bool = True,
+    ) -> None:
         """Initialize ClipLabeler with video file path and analysis duration limit.
 
         Args:
             file_path: Path to the video file to analyze
-            duration_limit: Maximum duration in seconds to analyze from start/end of clip.
-                            Defaults to 15 seconds.
+            duration_limit: Total duration in seconds of audio to analyze, split between the
+                            sampling windows. Defaults to 15 seconds.
+            sampling: Positions of the sampling windows, e.g. (0.0, 0.5, 1.0) for start, middle
+                      and end. Defaults to the start of the clip only.
+            memo: Memo of agent responses shared between clips, so a transcript that was labeled
+                  before, or is being labeled right now, does not cost another call.
+            label_token_budget: Estimated tokens the transcript sent for labeling may cost, so
+                                labeling stays fast however long `duration_limit` is. Transcripts
+                                are only stripped of fillers and repetition when None.
+            audio_passthrough: Copy the audio of a probed clip as it is when its codec is one the
+                               transcription API accepts and a single window is extracted, instead
+                               of re-encoding it. Buffers only get pipe-friendly containers.
         """
         if not file_path.exists():
             raise VideoFileNotFoundError(VideoFileNotFoundError.message.format(file_path=file_path))
-        if file_path.suffix not in self.SUPPORTED_VIDEO_EXTENSIONS:
+        if file_path.suffix.lower() not in self.SUPPORTED_VIDEO_EXTENSIONS:
             raise VideoExtensionNotSupportedError(
-                VideoFileNotFoundError.message.format(
-                    file_path=file_path, supported_formats=self.SUPPORTED_VIDEO_EXTENSIONS
+                VideoExtensionNotSupportedError.message.format(
+                    file_extension=file_path.suffix, supported_formats=self.SUPPORTED_VIDEO_EXTENSIONS
                 )
             )
         if duration_limit <= 0:
             raise InvalidDurationError(InvalidDurationError.message)
+        if not sampling or any(not 0.0 <= position <= 1.0 for position in sampling):
+            raise ValueError(f"Sampling positions must be between 0 and 1, got {tuple(sampling)}")  # noqa: TRY003
+        if label_token_budget is not None and label_token_budget <= 0:
+            raise ValueError("label_token_budget must be positive")  # noqa: TRY003
 
         self.file_path = file_path
         self.rename_template: Optional[str] = None
         self.duration_limit: Duration_s = duration_limit
+        self.sampling = tuple(sampling)
+        self.memo = memo
+        self.label_token_budget = label_token_budget
+        self.audio_passthrough = audio_passthrough
+        self.audio_codec: Optional[str] = None
+        self.audio_copied = False
+        self._audio_buffer_suffix = ".wav"
+        self.clip_duration: Optional[float] = None
+        self.media_info: Optional[MediaInfo] = None
         self.audio_path: Optional[Path] = None
+        self.audio_buffer: Optional[BinaryIO] = None
         self.audio_text: Optional[str] = None
-        self.labeler_agent = LabelerAgent()
+
+    @cached_property
+    def labeler_agent(self) -> "LabelerAgent":
+        """The labeling agent, created on first use so the agents SDK is only imported when labeling."""
+        from src.agents import LabelerAgent
+
+        return LabelerAgent()
 
     def add_template(self, template: str) -> None:
         """Set the template string for renaming labeled files.
 
         Args:
-            template: String template containing {label} placeholder
+            template: String template containing {label} placeholder, and optionally {ext}, which
+                is replaced with the file's extension, e.g. ".mov"
         """
         if "{label}" not in template:
             raise InvalidTemplateError(InvalidTemplateError.message)
         self.rename_template = template
 
-    def extract_audio(self) -> Optional[Path]:
-        """Extract audio segments from start and end of video.
+    @property
+    def audio_version(self) -> str:
+        """Version of the extraction settings, used to invalidate cached extraction metadata and transcripts."""
+        if self.sampling == START_ONLY:
+            return f"start-{self.duration_limit}s"
+        positions = ",".join(f"{position:g}" for position in self.sampling)
+        return f"windows-{positions}-{self.duration_limit}s"
+
+    @property
+    def needs_duration(self) -> bool:
+        """Whether placing the sampling windows requires the clip duration."""
+        return self.sampling != START_ONLY and self.clip_duration is None
+
+    def sampling_windows(self) -> list[SamplingWindow]:
+        """The (start, duration) windows of the clip that audio is extracted from."""
+        return plan_windows(self.sampling, self.duration_limit, self.clip_duration)
+
+    async def probe_duration_async(self, pool: Optional[FFmpegPool] = None, timeout: Optional[float] = None) -> None:
+        """Probe the clip duration with ffprobe if the sampling windows depend on it."""
+        if self.needs_duration:
+            self.clip_duration = await probe_duration(self.file_path, pool, timeout)
+
+    async def probe_media_async(
+        self, pool: Optional[FFmpegPool] = None, timeout: Optional[float] = None, index: Optional[ProbeIndex] = None
+    ) -> MediaInfo:
+        """Probe the duration, streams and audio format of the clip with ffprobe, once.
 
-        Extracts the first self.duration_limit seconds of audio.
+        Args:
+            pool: Pool to run ffprobe in. Defaults to the process-wide pool sized to the core count.
+            timeout: Timeout in seconds. Defaults to the pool timeout.
+            index: Persistent index to reuse an earlier probe of the clip from, and to store this one in.
+
+        Returns:
+            The probed metadata, also kept in self.media_info
+        """
+        if self.media_info is None:
+            if index is not None:
+                self.media_info = await index.probe(self.file_path, pool, timeout)
+            else:
+                self.media_info = await probe_media(self.file_path, pool, timeout)
+            if self.media_info.duration is not None:
+                self.clip_duration = self.media_info.duration
+        return self.media_info
+
+    def _check_media(self) -> None:
+        """Fail before spawning ffmpeg if the probed metadata shows that no audio can be decoded."""
+        if self.media_info is None:
+            return
+        reason = self.media_info.unusable_reason
+        if reason is not None:
+            raise UnusableClipError(self.file_path, reason)
+        if not self.media_info.has_audio:
+            raise NoAudioStreamError(self.file_path)
+
+    def _audio_input(self) -> Any:
+        """The audio of all sampling windows as one ffmpeg stream.
+
+        Every window is a separate input of the same file with `-ss` before `-i`, so ffmpeg seeks
+        in the container instead of decoding everything before the window. Several windows are
+        joined with the concat filter, all in a single ffmpeg process.
+        """
+        import ffmpeg
+
+        inputs = [
+            ffmpeg.input(str(self.file_path), ss=f"{start:g}", t=f"{length:g}")
+            for start, length in self.sampling_windows()
+        ]
+        if len(inputs) == 1:
+            return inputs[0]
+        return ffmpeg.concat(*(stream.audio for stream in inputs), v=0, a=1)
+
+    @property
+    def label_version(self) -> str:
+        """Version of the labeling agent and transcript budget, used to invalidate cached labels when they change."""
+        agent_spec = f"{self.labeler_agent.model}\n{self.labeler_agent.instructions}\n{self.label_token_budget}"
+        return hashlib.sha256(agent_spec.encode()).hexdigest()[:16]
+
+    @property
+    def memo_key(self) -> str:
+        """Key of the labeling request for the current transcript in a `ResponseMemo`."""
+        model = self.labeler_agent.model or os.getenv("LLM_MODEL_NAME", "")
+        return response_key(str(model), str(self.labeler_agent.instructions), self.label_text)
+
+    @property
+    def label_text(self) -> str:
+        """The transcript as sent for labeling: without fillers and repetition, and cut to `label_token_budget`."""
+        if not self.audio_text:
+            return ""
+        return compact_transcript(self.audio_text, self.label_token_budget)
+
+    def _passthrough_format(self, to_pipe: bool = False) -> Optional[tuple[str, str]]:
+        """The container to stream-copy the audio into, None if it has to be re-encoded."""
+        if not self.audio_passthrough or self.media_info is None or len(self.sampling) != 1:
+            return None
+        return passthrough_format(self.media_info.audio_codec, to_pipe)
+
+    def _extract_audio_command(self) -> tuple[Any, Path]:
+        """Build the ffmpeg command extracting the audio segment and the path it writes to.
+
+        Audio in a codec the transcription API accepts is stream-copied into a matching container;
+        anything else is re-encoded to mono MP3 at a speech bitrate.
         """
         base_name = self.file_path.stem
-        start_audio_path = Path(TMP_DIR) / f"{base_name}_start.mp3"
+        audio_dir = Path(tmp_dir())
+        audio_dir.mkdir(parents=True, exist_ok=True)
+        passthrough = self._passthrough_format()
+        if passthrough is not None:
+            muxer, suffix = passthrough
+            start_audio_path = audio_dir / f"{base_name}_start{suffix}"
+            stream = self._audio_input().output(str(start_audio_path), format=muxer, acodec="copy", vn=None)
+            self._set_audio_codec(copied=True)
+            return stream, start_audio_path
+        start_audio_path = audio_dir / f"{base_name}_start.mp3"
+        stream = self._audio_input().output(
+            str(start_audio_path), acodec="mp3", ac=1, ar=SPEECH_SAMPLE_RATE, audio_bitrate=SPEECH_MP3_BITRATE
+        )
+        self._set_audio_codec("mp3")
+        return stream, start_audio_path
+
+    def _set_audio_codec(self, codec: Optional[str] = None, copied: bool = False) -> None:
+        self.audio_copied = copied
+        self.audio_codec = self.media_info.audio_codec if copied and self.media_info is not None else codec
+
+    def extract_audio(self) -> Optional[Path]:
+        """Extract the audio of the sampling windows of the video.
+
+        With the default sampling, extracts the first self.duration_limit seconds of audio.
+        Blocks until ffmpeg exits, use extract_audio_async() inside an event loop.
+        """
+        import ffmpeg
+
+        self._check_media()
         try:
-            ffmpeg.input(self.file_path, ss=0, t=self.duration_limit).output(
-                start_audio_path, acodec="mp3", audio_bitrate="192k"
-            ).run(overwrite_output=True)
+            if self.needs_duration:
+                self.clip_duration = float(ffmpeg.probe(str(self.file_path))["format"]["duration"])
+            stream, start_audio_path = self._extract_audio_command()
+            stream.run(overwrite_output=True, capture_stderr=True)
         except ffmpeg.Error as e:
             raise ffmpeg.Error(f"Failed to extract audio: {e.stderr.decode()}", stdout=e.stdout, stderr=e.stderr) from e  # noqa: TRY003
         else:
             self.audio_path = start_audio_path
             return start_audio_path
 
+    async def extract_audio_async(
+        self, pool: Optional[FFmpegPool] = None, timeout: Optional[float] = None
+    ) -> Optional[Path]:
+        """Extract the audio segment in an ffmpeg subprocess without blocking the event loop.
+
+        Args:
+            pool: Pool to run ffmpeg in. Defaults to the process-wide pool sized to the core count.
+            timeout: Per-job timeout in seconds. Defaults to the pool timeout.
+
+        Returns:
+            Path to the extracted audio file
+        """
+        import ffmpeg
+
+        self._check_media()
+        await self.probe_duration_async(pool, timeout)
+        stream, start_audio_path = self._extract_audio_command()
+        try:
+            await (pool or get_ffmpeg_pool()).run(stream.compile(overwrite_output=True), timeout=timeout)
+        except FFmpegProcessError as e:
+            raise ffmpeg.Error(f"Failed to extract audio: {e.stderr.decode()}", stdout=b"", stderr=e.stderr) from e  # noqa: TRY003
+        else:
+            self.audio_path = start_audio_path
+            return start_audio_path
+
+    async def extract_audio_buffer(
+        self,
+        pool: Optional[FFmpegPool] = None,
+        timeout: Optional[float] = None,
+        spill_threshold: int = DEFAULT_SPILL_THRESHOLD,
+    ) -> BinaryIO:
+        """Extract the audio segment as 16 kHz mono WAV streamed from ffmpeg's stdout into memory.
+
+        With `audio_passthrough`, AAC, MP3, Opus, Vorbis and FLAC audio is stream-copied into a
+        fragmented M4A, MP3, Ogg or FLAC stream instead, see `audio_buffer_name` for the format. No intermediate file is
+        written unless the audio exceeds spill_threshold bytes, in which case the buffer spills to
+        a temporary file in `tmp_dir()` that is removed when it is closed.
+
+        Args:
+            pool: Pool to run ffmpeg in. Defaults to the process-wide pool sized to the core count.
+            timeout: Per-job timeout in seconds. Defaults to the pool timeout.
+            spill_threshold: Size in bytes above which the buffer spills to disk.
+
+        Returns:
+            Seekable file-like object positioned at the start of the audio
+        """
+        import ffmpeg
+
+        self._check_media()
+        await self.probe_duration_async(pool, timeout)
+        passthrough = self._passthrough_format(to_pipe=True)
+        if passthrough is not None:
+            muxer, self._audio_buffer_suffix = passthrough
+            stream = self._audio_input().output(
+                "pipe:1", format=muxer, acodec="copy", vn=None, **PIPE_MUXER_OPTIONS[muxer]
+            )
+            self._set_audio_codec(copied=True)
+        else:
+            stream = self._audio_input().output(
+                "pipe:1", format="wav", acodec="pcm_s16le", ac=1, ar=SPEECH_SAMPLE_RATE, vn=None
+            )
+            self._audio_buffer_suffix = ".wav"
+            self._set_audio_codec("pcm_s16le")
+        spill_dir = Path(tmp_dir())
+        spill_dir.mkdir(parents=True, exist_ok=True)
+        buffer = tempfile.SpooledTemporaryFile(max_size=spill_threshold, dir=spill_dir)  # noqa: SIM115
+        try:
+            await (pool or get_ffmpeg_pool()).run(stream.compile(), timeout=timeout, stdout=buffer)
+        except FFmpegProcessError as e:
+            buffer.close()
+            raise ffmpeg.Error(f"Failed to extract audio: {e.stderr.decode()}", stdout=b"", stderr=e.stderr) from e  # noqa: TRY003
+        except BaseException:
+            buffer.close()
+            raise
+        fix_wav_header(buffer)  # type: ignore[arg-type]
+        self.audio_buffer = buffer  # type: ignore[assignment]
+        return buffer  # type: ignore[return-value]
+
+    async def extract_pcm(
+        self, pool: Optional[FFmpegPool] = None, timeout: Optional[float] = None, stdout: Optional[BinaryIO] = None
+    ) -> bytes:
+        """Decode the audio segment to raw 16 kHz mono 16-bit PCM, e.g. for voice-activity detection.
+
+        Args:
+            pool: Pool to run ffmpeg in. Defaults to the process-wide pool sized to the core count.
+            timeout: Per-job timeout in seconds. Defaults to the pool timeout.
+            stdout: File-like object receiving the samples as ffmpeg decodes them, instead of
+                    returning them once it is done.
+
+        Returns:
+            Little-endian signed 16-bit samples, empty if they were written to `stdout`
+        """
+        import ffmpeg
+
+        self._check_media()
+        await self.probe_duration_async(pool, timeout)
+        stream = self._audio_input().output(
+            "pipe:1", format="s16le", acodec="pcm_s16le", ac=1, ar=SPEECH_SAMPLE_RATE, vn=None
+        )
+        try:
+            result = await (pool or get_ffmpeg_pool()).run(stream.compile(), timeout=timeout, stdout=stdout)
+        except FFmpegProcessError as e:
+            raise ffmpeg.Error(f"Failed to decode audio: {e.stderr.decode()}", stdout=b"", stderr=e.stderr) from e  # noqa: TRY003
+        return result.stdout
+
+    @property
+    def audio_buffer_name(self) -> str:
+        """File name announced to the transcription API for the in-memory audio; its suffix tells the format."""
+        return f"{self.file_path.stem}{self._audio_buffer_suffix}"
+
+    def release_audio(self) -> None:
+        """Close the in-memory audio buffer and delete the extracted audio file, if any."""
+        if self.audio_buffer is not None:
+            self.audio_buffer.close()
+            self.audio_buffer = None
+        if self.audio_path is not None:
+            self.audio_path.unlink(missing_ok=True)
+            self.audio_path = None
+
     async def generate_label(self) -> Optional[str]:
         """Generate a label by analyzing the extracted audio segment's text content.
 
@@ -97,20 +424,29 @@ class ClipLabeler:
         """
         # pass the audio to the model and generate a label
         if not self.audio_text:
-            raise AudioFileNotFoundError(AudioFileNotFoundError.message.format(file_path=self.file_path))
+            raise AudioFileNotFoundError(self.file_path)
+        if self.memo is None:
+            return await self._run_agent(self.label_text)
+        return await self.memo.call(self.memo_key, partial(self._run_agent, self.label_text))
+
+    async def _run_agent(self, agent_input: str) -> Optional[str]:
+        from src.utils.providers import run_agent
+
         try:  # TODO: agent does not support audio files yet, have to use text
-            agent_input = self.audio_text
-            result = await Runner.run(starting_agent=self.labeler_agent, input=agent_input)
+            result = await run_agent(self.labeler_agent, agent_input)
         except Exception as e:
             raise AgentCallError(AgentCallError.message.format(error_message=str(e))) from e
         else:
             return result.final_output_as(str)
 
-    def save_label(self, label: Optional[str]) -> None:
+    def save_label(self, label: Optional[str]) -> Path:
         """Save the generated label to file.
 
         Args:
             label: The label string to save
+
+        Returns:
+            Path of the renamed file
         """
         if not self.rename_template:
             raise NoTemplateError(NoTemplateError.message)
@@ -122,8 +458,9 @@ class ClipLabeler:
             label = self.file_path.stem
 
         # Create the new file name using the template
-        new_file_name = self.rename_template.format(label=label)
+        new_file_name = self.rename_template.format(label=label, ext=self.file_path.suffix)
         new_file_path = self.file_path.with_name(new_file_name)
 
         # Rename the file
         self.file_path.rename(new_file_path)
+        return new_file_path
@@ -0,0 +1,190 @@
+import asyncio
+import io
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from src.agents.transcriber import AsyncTranscriber
+from src.cliptale.labeler import ClipLabeler
+from src.utils.audio import PCM_SAMPLE_WIDTH, SPEECH_SAMPLE_RATE, pcm_to_wav, quietest_split
+from src.utils.ffmpeg_pool import FFmpegPool
+
+# Default length of the audio chunks transcribed one by one (in seconds)
+DEFAULT_CHUNK_SECONDS = 5.0
+
+# Default number of words of transcript after which the rest of the audio is not transcribed
+DEFAULT_STREAM_MIN_WORDS = 12
+
+# Default number of chunk transcriptions in flight per clip
+DEFAULT_STREAM_CONCURRENCY = 3
+
+# Length of the end of a chunk searched for a pause to split it at (in seconds)
+SPLIT_SEARCH_SECONDS = 1.0
+
+# Shortest final chunk worth transcribing; shorter ones are mostly the tail of a word (in seconds)
+MIN_CHUNK_SECONDS = 0.5
+
+
+@dataclass
+class StreamedTranscript:
+    """Outcome of transcribing a clip chunk by chunk.
+
+    Attributes:
+        text: Transcript of the chunks transcribed, in order
+        chunks: Number of chunks the transcript is made of
+        cancelled: Number of chunk transcriptions cancelled because the transcript was long enough
+        complete: Whether the transcript covers all of the extracted audio
+    """
+
+    text: str
+    chunks: int
+    cancelled: int
+    complete: bool
+
+
+class PcmChunker:
+    """File-like sink of streamed 16-bit PCM that hands it on in chunks of about `chunk_bytes`.
+
+    Each chunk is split in the quietest frame of its last `search_bytes`, so words are rarely cut in two.
+    """
+
+    def __init__(self, chunk_bytes: int, search_bytes: int, on_chunk: Callable[[bytes], Any]) -> None:
+        self.chunk_bytes = chunk_bytes
+        self.search_bytes = min(search_bytes, chunk_bytes)
+        self.on_chunk = on_chunk
+        self._pending = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._pending.extend(data)
+        while len(self._pending) >= self.chunk_bytes:
+            split = quietest_split(self._pending, self.chunk_bytes - self.search_bytes, self.chunk_bytes)
+            self.on_chunk(bytes(self._pending[:split]))
+            del self._pending[:split]
+        return len(data)
+
+    def flush(self, min_bytes: int = 0) -> None:
+        """Hand on the audio written since the last chunk, if there are at least `min_bytes` of it."""
+        if self._pending and len(self._pending) >= min_bytes:
+            self.on_chunk(bytes(self._pending))
+        self._pending.clear()
+
+
+class StreamingTranscriber:
+    """Transcribes the audio of a clip in short chunks while ffmpeg is still decoding it.
+
+    Every chunk is sent to the transcription API as soon as ffmpeg has produced it, with up to
+    `max_concurrency` chunks in flight, and the texts are joined in the order of the chunks. Once
+    the chunks transcribed so far, in order, add up to `min_words` words, ffmpeg and the remaining
+    transcriptions are cancelled, since a label can already be generated from that much text.
+    """
+
+    def __init__(
+        self,
+        transcriber: Optional[AsyncTranscriber] = None,
+        chunk_seconds: float = DEFAULT_CHUNK_SECONDS,
+        min_words: Optional[int] = DEFAULT_STREAM_MIN_WORDS,
+        max_concurrency: int = DEFAULT_STREAM_CONCURRENCY,
+    ) -> None:
+        """
+        Args:
+            transcriber (Optional[AsyncTranscriber]): Transcribes the chunks. Defaults to one over
+                the connection pool shared on the running loop.
+            chunk_seconds (float): Length of the chunks in seconds; chunks are cut up to
+                `SPLIT_SEARCH_SECONDS` shorter, in a pause.
+            min_words (Optional[int]): Words of transcript after which the rest of the audio is
+                not transcribed. All of it is transcribed when None.
+            max_concurrency (int): Chunk transcriptions in flight per clip.
+        """
+        if chunk_seconds <= MIN_CHUNK_SECONDS:
+            raise ValueError(f"chunk_seconds must be longer than {MIN_CHUNK_SECONDS}s")  # noqa: TRY003
+        if min_words is not None and min_words <= 0:
+            raise ValueError("min_words must be positive")  # noqa: TRY003
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")  # noqa: TRY003
+        self.transcriber = transcriber
+        self.chunk_seconds = chunk_seconds
+        self.min_words = min_words
+        self.max_concurrency = max_concurrency
+
+    @property
+    def version(self) -> str:
+        """Version of the chunking settings, used to keep cached transcripts of other settings apart."""
+        return f"stream-{self.chunk_seconds:g}s-{self.min_words or 'all'}w"
+
+    async def transcribe(
+        self, clip_labeler: ClipLabeler, pool: Optional[FFmpegPool] = None, timeout: Optional[float] = None
+    ) -> StreamedTranscript:
+        """
+        Transcribe the audio of the clip's sampling windows, stopping once the transcript is long enough.
+
+        The transcript is also set as the clip's `audio_text`, ready for `ClipLabeler.generate_label`.
+
+        Args:
+            clip_labeler (ClipLabeler): The clip.
+            pool (Optional[FFmpegPool]): Pool to run ffmpeg in. Defaults to the process-wide pool.
+            timeout (Optional[float]): Timeout of the ffmpeg run in seconds. Defaults to the pool timeout.
+
+        Returns:
+            StreamedTranscript: The transcript and how much of the audio it covers.
+        """
+        transcriber = self.transcriber or AsyncTranscriber()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        transcriptions: asyncio.Queue[Optional[asyncio.Task]] = asyncio.Queue()
+        started: list[asyncio.Task] = []
+
+        async def transcribe_chunk(pcm: bytes, index: int) -> str:
+            async with semaphore:
+                wav = io.BytesIO(pcm_to_wav(pcm))
+                return await transcriber.transcribe_file(wav, f"{clip_labeler.file_path.stem}_{index}.wav")
+
+        def on_chunk(pcm: bytes) -> None:
+            task = asyncio.create_task(transcribe_chunk(pcm, len(started)))
+            started.append(task)
+            transcriptions.put_nowait(task)
+
+        bytes_per_second = SPEECH_SAMPLE_RATE * PCM_SAMPLE_WIDTH
+        chunker = PcmChunker(
+            int(self.chunk_seconds * SPEECH_SAMPLE_RATE) * PCM_SAMPLE_WIDTH,
+            int(SPLIT_SEARCH_SECONDS * SPEECH_SAMPLE_RATE) * PCM_SAMPLE_WIDTH,
+            on_chunk,
+        )
+
+        async def extract() -> None:
+            try:
+                await clip_labeler.extract_pcm(pool, timeout, stdout=chunker)  # type: ignore[arg-type]
+                chunker.flush(int(MIN_CHUNK_SECONDS * bytes_per_second))
+            finally:
+                transcriptions.put_nowait(None)
+
+        extraction = asyncio.create_task(extract())
+        texts: list[str] = []
+        words = used = 0
+        complete = False
+        try:
+            while (task := await transcriptions.get()) is not None:
+                text = (await task).strip()
+                used += 1
+                if text:
+                    texts.append(text)
+                    words += len(text.split())
+                if self.min_words is not None and words >= self.min_words:
+                    break
+            else:
+                # Raise the error that ended the extraction, if any
+                await extraction
+                complete = True
+        finally:
+            pending = [task for task in (extraction, *started) if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        clip_labeler.audio_text = " ".join(texts)
+        cancelled = sum(task.cancelled() for task in started)
+        return StreamedTranscript(clip_labeler.audio_text, used, cancelled, complete)
+
+    async def label(
+        self, clip_labeler: ClipLabeler, pool: Optional[FFmpegPool] = None, timeout: Optional[float] = None
+    ) -> Optional[str]:
+        """Transcribe the clip chunk by chunk, see `transcribe`, and label it from the transcript."""
+        await self.transcribe(clip_labeler, pool, timeout)
+        return await clip_labeler.generate_label()
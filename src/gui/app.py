@@ -0,0 +1,175 @@
+import threading
+from pathlib import Path
+from tkinter import filedialog
+from typing import TYPE_CHECKING, Any, Optional
+
+import customtkinter as ctk
+
+from src.utils.config import DEFAULT_RENAME_TEMPLATE
+
+from .splash_screen import SplashScreen
+
+if TYPE_CHECKING:
+    from src.gui.runner import PipelineRunner, ProgressEvent
+
+# Milliseconds between polls of the initialization thread and the progress queue
+POLL_INTERVAL_MS = 100
+
+
+def initialize() -> "PipelineRunner":
+    """Load `.env`, import the pipeline, which pulls in the OpenAI SDK and NumPy, and start its loop thread."""
+    from src.utils.config import load_env
+
+    load_env()
+    from src.gui.runner import PipelineRunner
+
+    return PipelineRunner()
+
+
+class ClipTaleApp(ctk.CTk):
+    """Main window: pick a folder, label its clips in the background and follow their progress."""
+
+    def __init__(self):
+        super().__init__()
+        self.title("ClipTale App")
+        self.geometry("560x420")
+        self.runner: Optional[PipelineRunner] = None
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.folder = ctk.StringVar()
+        self.template = ctk.StringVar(value=DEFAULT_RENAME_TEMPLATE)
+        form = ctk.CTkFrame(self)
+        form.pack(fill="x", padx=20, pady=(20, 10))
+        ctk.CTkEntry(form, textvariable=self.folder, placeholder_text="Folder of clips").pack(
+            side="left", fill="x", expand=True, padx=(0, 10)
+        )
+        ctk.CTkButton(form, text="Browse...", width=90, command=self.choose_folder).pack(side="left")
+        ctk.CTkEntry(self, textvariable=self.template).pack(fill="x", padx=20)
+
+        buttons = ctk.CTkFrame(self, fg_color="transparent")
+        buttons.pack(pady=10)
+        self.start_button = ctk.CTkButton(buttons, text="Start", command=self.start, state="disabled")
+        self.start_button.pack(side="left", padx=5)
+        self.pause_button = ctk.CTkButton(buttons, text="Pause", command=self.toggle_pause, state="disabled")
+        self.pause_button.pack(side="left", padx=5)
+        self.cancel_button = ctk.CTkButton(buttons, text="Cancel", command=self.cancel, state="disabled")
+        self.cancel_button.pack(side="left", padx=5)
+
+        self.progress = ctk.CTkProgressBar(self, orientation="horizontal")
+        self.progress.set(0)
+        self.progress.pack(fill="x", padx=20, pady=10)
+        self.status = ctk.CTkLabel(self, text="Choose a folder to start")
+        self.status.pack()
+        self.log = ctk.CTkTextbox(self, state="disabled")
+        self.log.pack(fill="both", expand=True, padx=20, pady=(10, 20))
+
+    def ready(self, runner: "PipelineRunner") -> None:
+        """Enable the controls once initialization has finished and start polling for progress."""
+        self.runner = runner
+        self.start_button.configure(state="normal")
+        self.after(POLL_INTERVAL_MS, self.poll)
+
+    def choose_folder(self) -> None:
+        folder = filedialog.askdirectory(parent=self)
+        if folder:
+            self.folder.set(folder)
+
+    def start(self) -> None:
+        from src.pipelines.labeler import LabelerPipeline
+
+        if self.runner is None or self.runner.running:
+            return
+        work_dir = Path(self.folder.get())
+        if not work_dir.is_dir():
+            self.status.configure(text=f"Not a folder: {work_dir}")
+            return
+        self.runner.start(LabelerPipeline(work_dir, self.template.get() or None))
+        self.start_button.configure(state="disabled")
+        self.pause_button.configure(state="normal", text="Pause")
+        self.cancel_button.configure(state="normal")
+        self.progress.set(0)
+
+    def toggle_pause(self) -> None:
+        if self.runner is None:
+            return
+        if self.pause_button.cget("text") == "Pause":
+            self.runner.pause()
+        else:
+            self.runner.resume()
+
+    def cancel(self) -> None:
+        if self.runner is not None:
+            self.runner.cancel()
+            self.cancel_button.configure(state="disabled")
+
+    def poll(self) -> None:
+        """Apply the progress events the pipeline thread queued since the last poll."""
+        if self.runner is None:
+            return
+        for event in self.runner.poll():
+            self.show(event)
+        self.after(POLL_INTERVAL_MS, self.poll)
+
+    def show(self, event: "ProgressEvent") -> None:
+        if event.found:
+            self.progress.set(event.done / event.found)
+        self.status.configure(
+            text=f"{event.done}/{event.found} clips, {event.failed} failed, {event.clips_per_minute:.1f} clips/min"
+        )
+        if event.kind == "clip" and event.result is not None:
+            result = event.result
+            outcome = result.new_path.name if result.status == "ok" and result.new_path else result.error
+            self.write(f"{result.status}: {result.source_path.name} -> {outcome}")
+        elif event.kind in ("paused", "resumed"):
+            self.pause_button.configure(text="Resume" if event.kind == "paused" else "Pause")
+            self.write(f"Pipeline {event.kind}")
+        elif event.kind in ("finished", "cancelled", "error"):
+            self.write(f"Pipeline {event.kind}" + (f": {event.error}" if event.error else ""))
+            self.start_button.configure(state="normal")
+            self.pause_button.configure(state="disabled", text="Pause")
+            self.cancel_button.configure(state="disabled")
+
+    def write(self, line: str) -> None:
+        self.log.configure(state="normal")
+        self.log.insert("end", line + "\n")
+        self.log.see("end")
+        self.log.configure(state="disabled")
+
+    def on_close(self) -> None:
+        if self.runner is not None:
+            self.runner.close()
+        self.destroy()
+
+
+def start_app():
+    app = ClipTaleApp()
+    app.withdraw()
+    splash = SplashScreen(app)
+    outcome: dict[str, Any] = {}
+
+    def run_initialize() -> None:
+        try:
+            outcome["runner"] = initialize()
+        except Exception as e:
+            outcome["error"] = e
+
+    initializer = threading.Thread(target=run_initialize, name="cliptale-init", daemon=True)
+    initializer.start()
+
+    def wait_for_initialize() -> None:
+        if initializer.is_alive():
+            app.after(POLL_INTERVAL_MS, wait_for_initialize)
+            return
+        splash.close()
+        app.deiconify()
+        if "error" in outcome:
+            app.status.configure(text=f"Failed to initialize: {outcome['error']}")
+        else:
+            app.ready(outcome["runner"])
+
+    app.after(POLL_INTERVAL_MS, wait_for_initialize)
+    app.mainloop()
+
+
+if __name__ == "__main__":
+    start_app()
@@ -0,0 +1,155 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Optional
+
+from src.models.results import ClipResult
+from src.pipelines.labeler import LabelerPipeline
+from src.utils.loggers import LoggerFactory
+
+# Seconds `close` waits for the loop thread to stop
+CLOSE_TIMEOUT = 5.0
+
+
+@dataclass
+class ProgressEvent:
+    """A progress update of a pipeline run, sent from the loop thread to the GUI.
+
+    Attributes:
+        kind: One of "started", "clip", "paused", "resumed", "finished", "cancelled" or "error"
+        result: The finished clip, for "clip" events
+        found: Number of video files found so far
+        done: Number of clips that left the pipeline
+        failed: Number of clips that failed
+        elapsed: Seconds since the run started
+        error: The error that aborted the run, for "error" events
+    """
+
+    kind: str
+    result: Optional[ClipResult] = None
+    found: int = 0
+    done: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def clips_per_minute(self) -> float:
+        return 60.0 * self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class PipelineRunner:
+    """Runs a LabelerPipeline on a dedicated asyncio loop thread, so the Tk main loop stays responsive.
+
+    Tk is not thread-safe, so progress is never pushed into widgets from the loop thread. Events
+    are put on a thread-safe queue instead, which the GUI drains with `poll` from an `after()`
+    callback. Pause, resume and cancel are handed to the loop thread with `call_soon_threadsafe`.
+    """
+
+    def __init__(self) -> None:
+        self.events: queue.Queue[ProgressEvent] = queue.Queue()
+        self.logger = LoggerFactory.get_logger()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="cliptale-pipeline", daemon=True)
+        self._thread.start()
+        self._future: Optional[Future] = None
+        self._pipeline: Optional[LabelerPipeline] = None
+        self._started = 0.0
+        self._done = 0
+        self._failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def start(self, pipeline: LabelerPipeline) -> Future:
+        """
+        Run a pipeline on the loop thread. Its results are reported through `events`.
+
+        Args:
+            pipeline (LabelerPipeline): The pipeline to run. Its `on_result` callback is replaced.
+
+        Returns:
+            Future: Resolves to the pipeline's results once the run ends.
+        """
+        if self.running:
+            raise RuntimeError("A pipeline is already running")  # noqa: TRY003
+        pipeline.on_result = self._on_result
+        self._pipeline = pipeline
+        self._future = asyncio.run_coroutine_threadsafe(self._run(pipeline), self._loop)
+        return self._future
+
+    def pause(self) -> None:
+        """Let running stages finish and start no new ones until `resume`."""
+        self._loop.call_soon_threadsafe(self._set_paused, True)
+
+    def resume(self) -> None:
+        self._loop.call_soon_threadsafe(self._set_paused, False)
+
+    def cancel(self) -> None:
+        """Cancel the running pipeline; finished clips keep their results."""
+        if self._future is not None:
+            self._future.cancel()
+
+    def poll(self, limit: int = 100) -> list[ProgressEvent]:
+        """Take up to `limit` pending events without blocking, for the GUI thread."""
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def close(self) -> None:
+        """Cancel any run and stop the loop thread."""
+        self.cancel()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(CLOSE_TIMEOUT)
+
+    async def _run(self, pipeline: LabelerPipeline) -> dict[str, ClipResult]:
+        self._started = time.perf_counter()
+        self._done = self._failed = 0
+        self._emit("started")
+        try:
+            results = await pipeline.run()
+        except asyncio.CancelledError:
+            self._emit("cancelled")
+            raise
+        except Exception as e:
+            self.logger.exception("Pipeline run failed")
+            self._emit("error", error=str(e))
+            raise
+        self._emit("finished")
+        return results
+
+    def _set_paused(self, paused: bool) -> None:
+        if self._pipeline is None or not self.running:
+            return
+        if paused:
+            self._pipeline.pause()
+        else:
+            self._pipeline.resume()
+        self._emit("paused" if paused else "resumed")
+
+    def _on_result(self, result: ClipResult) -> None:
+        self._done += 1
+        self._failed += result.status == "failed"
+        self._emit("clip", result=result)
+
+    def _emit(self, kind: str, result: Optional[ClipResult] = None, error: Optional[str] = None) -> None:
+        found = int(self._pipeline.metrics.files_scanned.value()) if self._pipeline is not None else 0
+        self.events.put(
+            ProgressEvent(
+                kind=kind,
+                result=result,
+                found=found,
+                done=self._done,
+                failed=self._failed,
+                elapsed=time.perf_counter() - self._started,
+                error=error,
+            )
+        )
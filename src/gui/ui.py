@@ -1,6 +1,6 @@
 import cProfile
 
-from .splash_screen import start_app
+from .app import start_app
 
 if __name__ == "__main__":
     profiler = cProfile.Profile()
@@ -0,0 +1,57 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass
+class ClipRecord:
+    """What the pipeline learned about a clip, to be upserted into the catalog.
+
+    Attributes:
+        fingerprint: Content fingerprint of the clip, stable across renames
+        path: Current path of the clip
+        label: The generated label, None to keep the one already cataloged
+        transcript: The transcript of the sampled audio, None to keep the one already cataloged
+        duration: Duration of the clip in seconds, if known
+        previous_paths: Earlier paths of the clip, e.g. its name before the pipeline renamed it
+        video_hash: Perceptual hash of sampled frames, to recognize copies of the clip in other files
+    """
+
+    fingerprint: str
+    path: Path
+    label: Optional[str] = None
+    transcript: Optional[str] = None
+    duration: Optional[float] = None
+    previous_paths: tuple[Path, ...] = ()
+    video_hash: Optional[int] = None
+
+
+@dataclass
+class CatalogEntry:
+    """A clip as stored in the catalog.
+
+    Attributes:
+        fingerprint: Content fingerprint of the clip
+        path: The last known path of the clip
+        label: The generated label
+        transcript: The transcript of the sampled audio
+        duration: Duration of the clip in seconds
+        created: Unix time the clip was first cataloged
+        updated: Unix time the clip was last cataloged
+        paths: Every path the clip has been seen under, oldest first
+        score: Relevance of a search hit, lower is better (FTS5 bm25)
+        snippet: Matching part of the transcript of a search hit, with matches in [brackets]
+        similarity: Transcript similarity of a similar-clips hit, between 0 and 1
+    """
+
+    fingerprint: str
+    path: Path
+    label: Optional[str]
+    transcript: Optional[str]
+    duration: Optional[float]
+    created: float
+    updated: float
+    paths: list[Path] = field(default_factory=list)
+    score: Optional[float] = None
+    snippet: Optional[str] = None
+    similarity: Optional[float] = None
@@ -36,7 +36,9 @@ class AudioFileNotFoundError(ClipLabelerError, FileNotFoundError):
 
 class UnsupportedAudioFormatError(ClipLabelerError, ValueError):
     def __init__(self, file_suffix):
-        self.message = f"Unsupported audio format: {file_suffix}. Supported formats are .wav and .mp3."
+        self.message = (
+            f"Unsupported audio format: {file_suffix}. Supported formats are .wav, .mp3, .m4a, .ogg and .flac."
+        )
         super().__init__(self.message)
 
 
@@ -44,3 +46,32 @@ class NoAudioTranscribedError(ClipLabelerError, ValueError):
     def __init__(self):
         self.message = "No audio file has been transcribed yet."
         super().__init__(self.message)
+
+
+class NoAudioStreamError(ClipLabelerError, ValueError):
+    def __init__(self, file_path):
+        self.message = f"Video file has no audio stream: {file_path}"
+        super().__init__(self.message)
+
+
+class UnusableClipError(ClipLabelerError, ValueError):
+    def __init__(self, file_path, reason):
+        self.reason = reason
+        self.message = f"Cannot decode {file_path}: {reason}"
+        super().__init__(self.message)
+
+
+class FFmpegProcessError(ClipLabelerError, RuntimeError):
+    def __init__(self, returncode, stderr):
+        self.returncode = returncode
+        self.stderr = stderr
+        self.message = f"ffmpeg exited with code {returncode}: {stderr.decode(errors='replace').strip()}"
+        super().__init__(self.message)
+
+
+class FFmpegTimeoutError(ClipLabelerError, TimeoutError):
+    def __init__(self, timeout, stderr):
+        self.timeout = timeout
+        self.stderr = stderr
+        self.message = f"ffmpeg did not finish within {timeout} seconds"
+        super().__init__(self.message)
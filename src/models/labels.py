@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+
+class ClipLabel(BaseModel):
+    """Label the batch labeler agent assigns to one clip."""
+
+    clip_id: str
+    label: str
+
+
+class BatchLabels(BaseModel):
+    """Structured output of the batch labeler agent: one entry per clip id in the request."""
+
+    labels: list[ClipLabel]
@@ -0,0 +1,39 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass
+class ClipResult:
+    """Outcome of processing a single clip through the labeling pipeline.
+
+    Attributes:
+        source_path: Path of the clip when it entered the pipeline
+        status: One of "pending", "ok" or "failed"
+        new_path: Path of the clip after renaming, if it was renamed
+        label: The label used for renaming
+        error: Error message for failed clips, including the stage that failed
+        timings: Wall time in seconds spent in each stage, keyed by stage name
+        speech_ratio: Fraction of the extracted audio detected as speech, if voice detection ran
+        time_saved: Estimated seconds of transcription and labeling skipped for this clip
+        duplicate_of: The clip whose label this clip shares because their transcripts are near-duplicates
+        audio_codec: Codec of the audio extracted for transcription
+        audio_copied: Whether that audio was stream-copied from the clip instead of re-encoded
+    """
+
+    source_path: Path
+    status: str = "pending"
+    new_path: Optional[Path] = None
+    label: Optional[str] = None
+    error: Optional[str] = None
+    timings: dict[str, float] = field(default_factory=dict)
+    speech_ratio: Optional[float] = None
+    time_saved: float = 0.0
+    duplicate_of: Optional[Path] = None
+    audio_codec: Optional[str] = None
+    audio_copied: bool = False
+
+    @property
+    def total_time(self) -> float:
+        """Total wall time spent in all stages."""
+        return sum(self.timings.values())
@@ -1,63 +1,1082 @@
+import asyncio
+import contextlib
+import os
+import time
+from collections.abc import AsyncIterable, Awaitable, Iterable, Iterator, Sequence
+from dataclasses import asdict
+from functools import partial
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Optional, Union
 
-from src.cliptale.labeler import ClipLabeler
+from src.agents.transcriber import AsyncTranscriber
+from src.cliptale.batch import BatchLabeler
+from src.cliptale.catalog import ClipCatalog
+from src.cliptale.duplicates import CopyDetector, DuplicateGroup, DuplicateLabeler
+from src.cliptale.labeler import DEFAULT_LABEL_TOKEN_BUDGET, ClipLabeler
+from src.cliptale.streaming import StreamingTranscriber
+from src.models.catalog import ClipRecord
+from src.models.errors import UnusableClipError
+from src.models.results import ClipResult
+from src.pipelines.metrics import PipelineMetrics, exporting_metrics
+from src.pipelines.watcher import DEFAULT_POLL_INTERVAL, DEFAULT_SETTLE_INTERVAL, DirectoryWatcher
+from src.utils.audio import SPEECH_SAMPLE_RATE
+from src.utils.cache import ResultCache
+from src.utils.concurrency import limiter_stats
+from src.utils.fingerprint import SAMPLE_SIZE, fingerprint_file
+from src.utils.journal import JOURNAL_FILE_NAME, ProcessedJournal
 from src.utils.loggers import LoggerFactory
+from src.utils.memo import ResponseMemo
+from src.utils.perceptual import compute_video_hash
+from src.utils.probe import MediaInfo, ProbeIndex
+from src.utils.sampling import START_ONLY
+from src.utils.scanner import iterate_in_thread, scan_videos
+from src.utils.tokens import estimate_tokens
+from src.utils.tracing import ActiveTimer, Tracer
+from src.utils.vad import detect_speech, read_wav_samples, samples_from_pcm
+
+# Default number of concurrent workers per stage
+DEFAULT_JOBS = 4
+
+# Pipeline stages in processing order
+STAGES = ("fingerprint", "probe", "dedupe", "extract", "vad", "transcribe", "label", "rename")
+
+# Seconds the first clip of a label batch waits for more clips before the batch is sent
+BATCH_LINGER = 0.2
+
+# Default seconds between metrics exports in watch mode
+DEFAULT_METRICS_INTERVAL = 15.0
+
+# Number of finished clips written to the catalog in one transaction
+CATALOG_FLUSH_SIZE = 64
+
+
+class ClipJob:
+    """A clip travelling through the pipeline stages together with its result record."""
+
+    def __init__(self, file_path: Path) -> None:
+        self.file_path = file_path
+        self.result = ClipResult(source_path=file_path)
+        self.clip_labeler: Optional[ClipLabeler] = None
+        self.fingerprint: Optional[str] = None
+        self.video_hash: Optional[int] = None
+        self.copy_group: Optional[DuplicateGroup] = None
+        self.label: Optional[str] = None
+        self.skip: set[str] = set()
+        self.trace_id = 0
+        self.submitted_at = time.perf_counter()
+        self.enqueued_at = self.submitted_at
+
+    @property
+    def labeler(self) -> ClipLabeler:
+        """The clip labeler created by the fingerprint stage."""
+        if self.clip_labeler is None:
+            raise RuntimeError(f"Clip {self.file_path} has not entered the pipeline yet")  # noqa: TRY003
+        return self.clip_labeler
+
+
+class _LabelBatcher:
+    """The label batch being filled: its clips, their estimated tokens and when it is due to be sent."""
+
+    def __init__(self, batch_labeler: BatchLabeler) -> None:
+        self.batch_labeler = batch_labeler
+        self.batch: list[ClipJob] = []
+        self.tokens = 0
+        self.deadline = 0.0
+        # The clip that arrived after the batch filled up, which starts the next batch
+        self._overflow: Optional[ClipJob] = None
+
+    @property
+    def full(self) -> bool:
+        return (
+            self._overflow is not None
+            or len(self.batch) >= self.batch_labeler.max_batch_size
+            or self.tokens >= self.batch_labeler.token_budget
+        )
+
+    def due(self) -> bool:
+        return bool(self.batch) and (self.full or time.perf_counter() >= self.deadline)
+
+    def add(self, job: ClipJob) -> None:
+        tokens = 0 if "label" in job.skip else self.batch_labeler.cost(job.labeler)
+        if self.batch and self.tokens + tokens > self.batch_labeler.token_budget:
+            self._overflow = job
+            return
+        if not self.batch:
+            self.deadline = time.perf_counter() + BATCH_LINGER
+        self.batch.append(job)
+        self.tokens += tokens
+
+    def take(self) -> list[ClipJob]:
+        batch, overflow = self.batch, self._overflow
+        self.batch, self.tokens, self._overflow = [], 0, None
+        if overflow is not None:
+            self.add(overflow)
+        return batch
 
 
 class LabelerPipeline:
-    def __init__(self, work_dir: Path, rename_template: Optional[str] = None):
+    def __init__(
+        self,
+        work_dir: Path,
+        rename_template: Optional[str] = None,
+        jobs: int = DEFAULT_JOBS,
+        stage_jobs: Optional[dict[str, int]] = None,
+        cache: Optional[ResultCache] = None,
+        journal: Optional[ProcessedJournal] = None,
+        recursive: bool = True,
+        include: Sequence[str] = (),
+        exclude: Sequence[str] = (),
+        in_memory_audio: bool = True,
+        min_speech_ratio: Optional[float] = None,
+        batch_labeler: Optional[BatchLabeler] = None,
+        metrics: Optional[PipelineMetrics] = None,
+        tracer: Optional[Tracer] = None,
+        sampling: Sequence[float] = START_ONLY,
+        probe_index: Optional[ProbeIndex] = None,
+        catalog: Optional[ClipCatalog] = None,
+        duplicates: Optional[DuplicateLabeler] = None,
+        copies: Optional[CopyDetector] = None,
+        memo: Optional[ResponseMemo] = None,
+        label_token_budget: Optional[int] = DEFAULT_LABEL_TOKEN_BUDGET,
+        streaming: Optional[StreamingTranscriber] = None,
+        on_result: Optional[Callable[[ClipResult], None]] = None,
+    ):
+        """
+        Args:
+            work_dir (Path): The directory containing files to process.
+            rename_template (Optional[str]): The template for renaming files.
+            jobs (int): Default number of concurrent workers for every stage.
+            stage_jobs (Optional[dict[str, int]]): Per-stage overrides of `jobs`, keyed by stage name.
+            cache (Optional[ResultCache]): Cache of audio, transcripts and labels from earlier runs.
+            journal (Optional[ProcessedJournal]): Journal recording every processed file.
+            recursive (bool): Whether to scan subdirectories of `work_dir`.
+            include (Sequence[str]): Glob patterns, relative to `work_dir`, of the files to process.
+            exclude (Sequence[str]): Glob patterns, relative to `work_dir`, of files and directories to skip.
+            in_memory_audio (bool): Stream extracted audio into memory instead of temporary MP3 files.
+            min_speech_ratio (Optional[float]): Clips whose extracted audio has a smaller fraction of
+                speech, e.g. 0.05, are renamed with the fallback label without calling any API. The
+                detector is a heuristic, so check a threshold against some of the footage first.
+                Voice-activity detection is off when None.
+            batch_labeler (Optional[BatchLabeler]): Label queued clips in token-budgeted batches with
+                one agent call per batch, instead of one call per clip.
+            metrics (Optional[PipelineMetrics]): Metrics to record stage latencies, queue depths
+                and API usage in. A fresh set is created when None.
+            tracer (Optional[Tracer]): Records a span for every stage of every clip, with its
+                queue wait and the time it was active on the event loop, and for every ffmpeg run.
+            sampling (Sequence[float]): Positions of the audio sampling windows in each clip, as
+                fractions of the clip. Defaults to the start of the clip only.
+            probe_index (Optional[ProbeIndex]): Index of ffprobe results from earlier runs, so
+                unchanged clips are not probed again. Every clip is probed when None.
+            catalog (Optional[ClipCatalog]): Catalog to record the transcript, label and path
+                history of every labeled clip in, for full-text search.
+            duplicates (Optional[DuplicateLabeler]): Groups clips with near-identical transcripts,
+                e.g. the angles of a multi-cam shoot, and labels every group with one agent call.
+            copies (Optional[CopyDetector]): Recognizes copies of clips in this run or the catalog by
+                their perceptual video hash and renames them after the original without extracting,
+                transcribing or labeling them.
+            memo (Optional[ResponseMemo]): Memo of labeling responses, so clips whose transcript
+                was labeled before, e.g. slates and countdowns, are not sent to the agent again.
+            label_token_budget (Optional[int]): Estimated tokens of a transcript sent for labeling,
+                after fillers and repetition are stripped; longer transcripts keep their start and
+                end. Transcripts are not truncated when None.
+            streaming (Optional[StreamingTranscriber]): Transcribe the audio in chunks while ffmpeg
+                decodes it, in the transcribe stage, and stop once the transcript is long enough to
+                label. Audio is then neither extracted ahead of it nor checked for speech.
+            on_result (Optional[Callable[[ClipResult], None]]): Called on the event loop with the
+                result of every clip that leaves the pipeline, e.g. to report progress.
+        """
+        if jobs <= 0:
+            raise ValueError("jobs must be positive")  # noqa: TRY003
+        unknown_stages = set(stage_jobs or {}) - set(STAGES)
+        if unknown_stages:
+            raise ValueError(f"Unknown pipeline stages: {sorted(unknown_stages)}")  # noqa: TRY003
+
         self.work_dir = work_dir
         self.file_paths: list[Path] = []
         self.rename_template = rename_template
-        self.results = dict[str, Any]  # Placeholder for results
+        self.stage_jobs = dict.fromkeys(STAGES, jobs)
+        self.stage_jobs.update(stage_jobs or {})
+        self.cache = cache
+        self.journal = journal
+        self.recursive = recursive
+        self.include = include
+        self.exclude = exclude
+        self.in_memory_audio = in_memory_audio
+        self.min_speech_ratio = min_speech_ratio
+        self.batch_labeler = batch_labeler
+        self.metrics = metrics or PipelineMetrics()
+        self.tracer = tracer
+        self.sampling = tuple(sampling)
+        self.probe_index = probe_index
+        self.catalog = catalog
+        self.duplicates = duplicates
+        self.copies = copies
+        self.memo = memo
+        self.label_token_budget = label_token_budget
+        self.streaming = streaming
+        self._copies_seeded = False
+        self._copy_tasks: set[asyncio.Task] = set()
+        self.on_result = on_result
+        self._resumed: Optional[asyncio.Event] = None
+        self._catalog_records: list[ClipRecord] = []
+        self.results: dict[str, ClipResult] = {}
         self.logger = LoggerFactory.get_logger()
 
-        _ = self.read_directory()
+    def scan_directory(self) -> Iterator[Path]:
+        """
+        Lazily yield the video files in `work_dir`, recording them in `self.file_paths`.
+
+        Yields:
+            Path: The video files matching the pipeline's scan settings.
+        """
+        self.file_paths = []
+        resumed = time.perf_counter()
+        for file_path in scan_videos(self.work_dir, self.recursive, self.include, self.exclude):
+            self.metrics.stage_seconds.observe(time.perf_counter() - resumed, stage="scan")
+            self.metrics.files_scanned.inc()
+            self.file_paths.append(file_path)
+            yield file_path
+            resumed = time.perf_counter()
+        self.logger.info(f"Found {len(self.file_paths)} video files in {self.work_dir}")
 
     def read_directory(self) -> list[Path]:
         """
         Read all the video files in the given directory.
 
+        Returns:
+            list[Path]: The video files matching the pipeline's scan settings.
+        """
+        return list(self.scan_directory())
+
+    @property
+    def paused(self) -> bool:
+        return self._resumed is not None and not self._resumed.is_set()
+
+    def pause(self) -> None:
+        """Stop starting stages of clips until `resume` is called; running stages finish. Call on the event loop."""
+        if self._resumed is None:
+            self._resumed = asyncio.Event()
+        self._resumed.clear()
+
+    def resume(self) -> None:
+        """Continue a paused pipeline. Call on the event loop."""
+        if self._resumed is not None:
+            self._resumed.set()
+
+    async def _wait_if_paused(self) -> None:
+        if self._resumed is not None:
+            await self._resumed.wait()
+
+    async def run(self) -> dict[str, ClipResult]:
+        """
+        Process all video files found in `work_dir` through the fingerprint, probe, dedupe,
+        extract, vad, transcribe, label and rename stages.
+
+        Stages run concurrently and are joined by bounded queues, so a clip can be
+        extracted while another one is waiting on the LLM. A failing clip is recorded
+        in `self.results` and does not abort the batch. The directory is scanned in a
+        worker thread while the first clips are already being processed.
+
+        Returns:
+            dict[str, ClipResult]: Per-file outcomes and timings, keyed by source path.
+        """
+        self.logger.info(f"Starting LabelerPipeline on {self.work_dir}.")
+        return await self.process(iterate_in_thread(self.scan_directory()))
+
+    async def watch(self, watcher: DirectoryWatcher) -> dict[str, ClipResult]:
+        """
+        Process files as the watcher reports them, until the watcher is stopped.
+
         Args:
-            work_dir (Path): The directory containing files to process.
+            watcher (DirectoryWatcher): Source of new or changed files in `work_dir`.
+
+        Returns:
+            dict[str, ClipResult]: Per-file outcomes and timings, keyed by source path.
+        """
+        self.logger.info(f"Starting LabelerPipeline in watch mode on {watcher.watch_dir}.")
+        return await self.process(watcher)
+
+    async def process(self, source: Union[Iterable[Path], AsyncIterable[Path]]) -> dict[str, ClipResult]:
+        """
+        Feed files from a source through the pipeline stages.
+
+        Args:
+            source (Union[Iterable[Path], AsyncIterable[Path]]): The files to process. Files are
+                pulled lazily, so the source may keep producing while earlier files are processed.
+
+        Returns:
+            dict[str, ClipResult]: Per-file outcomes and timings, keyed by source path.
         """
-        file_paths = []
-        for file_path in self.work_dir.iterdir():
-            if file_path.is_file():
-                file_paths.append(file_path)
-        self.file_paths = file_paths
-
-        self.logger.info(f"Found {len(file_paths)} files in {self.work_dir}")
-        self.logger.debug(f"Files: {file_paths}")
-
-        return file_paths
-
-    async def run(self) -> None:
-        # read all files in the work_dir
-        self.logger.info(f"Starting LabelerPipeline with {len(self.file_paths)} files.")
-        for file_path in self.file_paths:
-            clip_labeler = ClipLabeler(file_path)
-            if self.rename_template:
-                clip_labeler.add_template(self.rename_template)
-            clip_labeler.extract_audio()
-            new_label = await clip_labeler.generate_label()
-            clip_labeler.save_label(new_label)
-        # Placeholder for any additional pipeline logic
-        # e.g. cleanup, logging, etc.
-        return
+        started = time.perf_counter()
+        await self._seed_copies()
+
+        handlers: dict[str, Callable[[ClipJob], Awaitable[None]]] = {
+            "fingerprint": self._fingerprint,
+            "probe": self._probe,
+            "dedupe": self._dedupe,
+            "extract": self._extract,
+            "vad": self._vad,
+            "transcribe": self._transcribe,
+            "label": self._label,
+            "rename": self._rename,
+        }
+        queues: list[asyncio.Queue] = [asyncio.Queue(maxsize=2 * self.stage_jobs[stage]) for stage in STAGES]
+        stage_tasks = [
+            asyncio.create_task(
+                self._run_stage(
+                    stage,
+                    handlers[stage],
+                    queues[index],
+                    queues[index + 1] if index + 1 < len(queues) else None,
+                )
+            )
+            for index, stage in enumerate(STAGES)
+        ]
+
+        async def submit(file_path: Path) -> None:
+            await self._wait_if_paused()
+            job = ClipJob(file_path)
+            job.trace_id = len(self.results)
+            self.results[str(file_path)] = job.result
+            await self._enqueue(queues[0], job)
+
+        try:
+            if isinstance(source, AsyncIterable):
+                async for file_path in source:
+                    await submit(file_path)
+            else:
+                for file_path in source:
+                    await submit(file_path)
+            for _ in range(self.stage_jobs[STAGES[0]]):
+                await queues[0].put(None)
+            await asyncio.gather(*stage_tasks)
+            if self.copies is not None:
+                self.copies.release()
+            await asyncio.gather(*self._copy_tasks)
+        finally:
+            for task in (*stage_tasks, *self._copy_tasks):
+                task.cancel()
+            self._flush_catalog()
+
+        self._estimate_time_saved()
+        failed = [result for result in self.results.values() if result.status == "failed"]
+        self.logger.info(
+            f"LabelerPipeline finished {len(self.results)} files in {time.perf_counter() - started:.2f}s "
+            f"({len(failed)} failed)."
+        )
+        self._log_stats()
+        return self.results
+
+    def _log_stats(self) -> None:
+        if self.cache is not None:
+            self.logger.info(f"Cache stats: {self.cache.stats()}")
+        if self.probe_index is not None:
+            self.logger.info(f"Probe index stats: {self.probe_index.stats()}")
+        if self.memo is not None:
+            self.logger.info(f"Response memo stats: {self.memo.stats()}")
+        tokens_saved = self.metrics.api_tokens_saved.value(api="label")
+        if tokens_saved:
+            self.logger.info(f"Transcript compaction saved about {tokens_saved:.0f} labeling input tokens")
+
+    async def _run_stage(
+        self,
+        stage: str,
+        handler: Callable[[ClipJob], Awaitable[None]],
+        in_queue: asyncio.Queue,
+        out_queue: Optional[asyncio.Queue],
+    ) -> None:
+        """Run the workers of one stage and signal the next stage once they are all done."""
+        if stage == "label" and self.batch_labeler is not None and out_queue is not None:
+            # One consumer fills the batches, which are labeled `stage_jobs["label"]` at a time
+            workers = [asyncio.create_task(self._label_batch_worker(self.batch_labeler, in_queue, out_queue))]
+        else:
+            worker_factory = partial(self._stage_worker, stage, handler, in_queue, out_queue)
+            workers = [asyncio.create_task(worker_factory()) for _ in range(self.stage_jobs[stage])]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+        if out_queue is not None:
+            next_stage = STAGES[STAGES.index(stage) + 1]
+            for _ in range(self.stage_jobs[next_stage]):
+                await out_queue.put(None)
+
+    async def _stage_worker(
+        self,
+        stage: str,
+        handler: Callable[[ClipJob], Awaitable[None]],
+        in_queue: asyncio.Queue,
+        out_queue: Optional[asyncio.Queue],
+    ) -> None:
+        track = self.tracer.track(f"{stage} worker") if self.tracer is not None else 0
+        while True:
+            job = await in_queue.get()
+            self._record_queue_depth(stage, in_queue)
+            if job is None:
+                return
+            await self._wait_if_paused()
+            if stage in job.skip:
+                self.metrics.clips.inc(stage=stage, status="skipped")
+                if out_queue is not None:
+                    await self._enqueue(out_queue, job)
+                continue
+
+            started = time.perf_counter()
+            try:
+                await self._call_handler(stage, handler, job, track)
+            except Exception as e:
+                self._fail(job, stage, e)
+                continue
+            finally:
+                job.result.timings[stage] = time.perf_counter() - started
+                self.metrics.stage_seconds.observe(job.result.timings[stage], stage=stage)
+            self.metrics.clips.inc(stage=stage, status="ok")
+
+            if out_queue is not None:
+                await self._enqueue(out_queue, job)
+            else:
+                job.result.status = "ok"
+                self._finish(job)
+
+    async def _enqueue(self, queue: asyncio.Queue, job: ClipJob) -> None:
+        job.enqueued_at = time.perf_counter()
+        await queue.put(job)
+
+    def _record_queue_depth(self, stage: str, queue: asyncio.Queue) -> None:
+        self.metrics.queue_depth.set(queue.qsize(), stage=stage)
+        if self.tracer is not None:
+            self.tracer.counter(f"{stage} queue", {"depth": queue.qsize()})
+
+    async def _call_handler(
+        self, stage: str, handler: Callable[[ClipJob], Awaitable[None]], job: ClipJob, track: int
+    ) -> None:
+        if self.tracer is None:
+            await handler(job)
+            return
+        timer = ActiveTimer(handler(job))
+        started = time.perf_counter()
+        status = "failed"
+        try:
+            with self.tracer.activate(track):
+                await timer
+            status = "ok"
+        finally:
+            self._trace_stage(stage, job, track, started, time.perf_counter(), timer.active, status)
+
+    def _trace_stage(
+        self,
+        stage: str,
+        job: ClipJob,
+        track: Optional[int],
+        started: float,
+        ended: float,
+        active: float,
+        status: str,
+    ) -> None:
+        """Record a stage span on the worker track and, with the queue wait before it, on the clip's track."""
+        if self.tracer is None:
+            return
+        args = {
+            "clip": job.file_path.name,
+            "status": status,
+            "queue_wait_ms": (started - job.enqueued_at) * 1e3,
+            "active_ms": active * 1e3,
+            "suspended_ms": (ended - started - active) * 1e3,
+        }
+        if track is not None:
+            self.tracer.complete(stage, "stage", started, ended, track, args)
+        self.tracer.async_span(f"{stage} queue", "clip", job.enqueued_at, started, job.trace_id)
+        self.tracer.async_span(stage, "clip", started, ended, job.trace_id, args)
+
+    async def _label_batch_worker(
+        self, batch_labeler: BatchLabeler, in_queue: asyncio.Queue, out_queue: asyncio.Queue
+    ) -> None:
+        """
+        The only consumer of the label queue: collects clips into batches labeled with one agent call each.
+
+        Clips move from the queue into the batch as soon as they arrive, so a batch is not limited
+        by the queue's size. A batch is sent once the next clip would not fit the token budget or
+        `max_batch_size`, or once its first clip has waited `BATCH_LINGER` seconds, and keeps
+        filling while all `stage_jobs["label"]` batch calls are busy.
+        """
+        track = self.tracer.track("label batch worker") if self.tracer is not None else 0
+        batcher = _LabelBatcher(batch_labeler)
+        calls: set[asyncio.Future] = set()
+        getter: Optional[asyncio.Future] = asyncio.ensure_future(in_queue.get())
+        try:
+            while getter is not None or batcher.batch:
+                due = getter is None or batcher.due()
+                if due and len(calls) < self.stage_jobs["label"]:
+                    await self._wait_if_paused()
+                    batch = batcher.take()
+                    calls.add(asyncio.ensure_future(self._label_batch(batch_labeler, batch, out_queue, track)))
+                    continue
+                waiting = set(calls) if batcher.full or getter is None else {getter, *calls}
+                timeout = batcher.deadline - time.perf_counter() if batcher.batch and not due else None
+                done, _ = await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                calls -= done
+                for call in done - {getter}:
+                    call.result()
+                if getter in done:
+                    job = getter.result()
+                    self._record_queue_depth("label", in_queue)
+                    getter = None if job is None else asyncio.ensure_future(in_queue.get())
+                    if job is not None:
+                        batcher.add(job)
+            await asyncio.gather(*calls)
+        finally:
+            for task in (getter, *calls):
+                if task is not None:
+                    task.cancel()
+
+    async def _label_batch(
+        self, batch_labeler: BatchLabeler, batch: list[ClipJob], out_queue: asyncio.Queue, track: int = 0
+    ) -> None:
+        to_label = [job for job in batch if "label" not in job.skip]
+        self.metrics.clips.inc(len(batch) - len(to_label), stage="label", status="skipped")
+        started = time.perf_counter()
+        timer = ActiveTimer(self._generate_batch_labels(batch_labeler, to_label))
+        labels = await timer
+        elapsed = time.perf_counter() - started
+        if self.tracer is not None and to_label:
+            self.tracer.complete("label batch", "stage", started, started + elapsed, track, {"clips": len(to_label)})
+        for job, label in zip(to_label, labels):
+            status = "failed" if isinstance(label, Exception) else "ok"
+            self._trace_stage("label", job, None, started, started + elapsed, timer.active, status)
+            job.result.timings["label"] = elapsed / len(to_label)
+            self.metrics.stage_seconds.observe(job.result.timings["label"], stage="label")
+            if isinstance(label, Exception):
+                self._fail(job, "label", label)
+                continue
+            job.label = label
+            if job.result.duplicate_of is None:
+                self._count_label_tokens(job)
+            self._store_label(job)
+            self.metrics.clips.inc(stage="label", status="ok")
+        for job in batch:
+            if job.result.status != "failed":
+                await out_queue.put(job)
+
+    async def _generate_batch_labels(self, batch_labeler: BatchLabeler, to_label: list[ClipJob]) -> list[Any]:
+        """Label the first clip of every near-duplicate group with one batched call and share the labels."""
+        groups = [self._join_duplicates(job) for job in to_label]
+        to_call = [job for job, (_, position) in zip(to_label, groups) if position == 0]
+        try:
+            with self.metrics.api_call("label"):
+                called = await batch_labeler.generate_labels([job.labeler for job in to_call], return_exceptions=True)
+        except Exception as e:
+            called = [e] * len(to_call)
+        called_labels = dict(zip(map(id, to_call), called))
+        labels = []
+        for job, (group, position) in zip(to_label, groups):
+            if group is None or position == 0:
+                label = called_labels[id(job)]
+                self._resolve_duplicates(group, None if isinstance(label, Exception) else label)
+            else:
+                try:
+                    label = await self._label_duplicate(job, group, position)
+                except Exception as e:
+                    label = e
+            labels.append(label)
+        return labels
+
+    def _fail(self, job: ClipJob, stage: str, error: BaseException) -> None:
+        self.metrics.clips.inc(stage=stage, status="failed")
+        job.result.status = "failed"
+        job.result.error = f"{stage}: {error}"
+        self.logger.error(f"Failed to {stage} {job.file_path}", exc_info=error)
+        self._finish(job)
+
+    def _estimate_time_saved(self) -> None:
+        """Credit clips that skipped the API stages with the mean time those stages took for other clips."""
+        api_times = [
+            result.timings["transcribe"] + result.timings["label"]
+            for result in self.results.values()
+            if "transcribe" in result.timings and "label" in result.timings
+        ]
+        if not api_times:
+            return
+        mean_api_time = sum(api_times) / len(api_times)
+        skipped = [
+            result
+            for result in self.results.values()
+            if result.speech_ratio is not None
+            and self.min_speech_ratio is not None
+            and result.speech_ratio < self.min_speech_ratio
+        ]
+        for result in skipped:
+            result.time_saved = mean_api_time
+        if skipped:
+            self.logger.info(
+                f"Voice-activity detection skipped {len(skipped)} clips, saving about "
+                f"{mean_api_time * len(skipped):.1f}s of transcription and labeling."
+            )
+
+    def _finish(self, job: ClipJob) -> None:
+        """Record a clip that left the pipeline in the catalog and the journal, under its old and new names."""
+        if self.copies is not None and job.copy_group is not None:
+            self.copies.resolve(job.copy_group, job.result.label if job.result.status == "ok" else None)
+        if self.tracer is not None:
+            self.tracer.async_span(
+                job.file_path.name,
+                "clip",
+                job.submitted_at,
+                time.perf_counter(),
+                job.trace_id,
+                {"status": job.result.status},
+            )
+        self._catalog(job)
+        self._record_api_state()
+        if self.on_result is not None:
+            self.on_result(job.result)
+        if self.journal is None:
+            return
+        with contextlib.suppress(FileNotFoundError):
+            self.journal.record(job.file_path, job.result.status)
+        if job.result.new_path is not None:
+            self.journal.record(job.result.new_path, job.result.status)
+
+    def _record_api_state(self) -> None:
+        """Update the metrics of the response memo and the adaptive API concurrency limits."""
+        if self.memo is not None:
+            self.metrics.record_memo(self.memo.stats())
+        self.metrics.record_limits(limiter_stats())
+
+    def _catalog(self, job: ClipJob) -> None:
+        """Queue a labeled clip for the catalog, writing the queue once it is large enough."""
+        if self.catalog is None or job.result.status != "ok" or not job.fingerprint:
+            return
+        clip_labeler = job.labeler
+        self._catalog_records.append(
+            ClipRecord(
+                fingerprint=job.fingerprint,
+                path=job.result.new_path or job.file_path,
+                label=job.label,
+                transcript=clip_labeler.audio_text,
+                duration=clip_labeler.clip_duration,
+                previous_paths=(job.file_path,),
+                video_hash=job.video_hash,
+            )
+        )
+        if len(self._catalog_records) >= CATALOG_FLUSH_SIZE:
+            self._flush_catalog()
+
+    def _flush_catalog(self) -> None:
+        if self.catalog is None or not self._catalog_records:
+            return
+        records, self._catalog_records = self._catalog_records, []
+        self.catalog.upsert(records)
+
+    async def _fingerprint(self, job: ClipJob) -> None:
+        clip_labeler = ClipLabeler(
+            job.file_path,
+            sampling=self.sampling,
+            memo=self.memo,
+            label_token_budget=self.label_token_budget,
+        )
+        if self.rename_template:
+            clip_labeler.add_template(self.rename_template)
+        job.clip_labeler = clip_labeler
+        if self.cache is None and self.catalog is None:
+            return
+
+        job.fingerprint = await asyncio.to_thread(fingerprint_file, job.file_path)
+        self.metrics.bytes_read.inc(min(job.file_path.stat().st_size, 2 * SAMPLE_SIZE), stage="fingerprint")
+        if self.cache is None:
+            return
+        label = self.cache.get(job.fingerprint, "label", self._label_version(clip_labeler))
+        if label is not None:
+            job.label = label
+            job.skip.update(("probe", "dedupe", "extract", "vad", "transcribe", "label"))
+            return
+        transcript = self.cache.get(job.fingerprint, "transcript", self._transcript_version(clip_labeler))
+        if transcript is not None:
+            clip_labeler.audio_text = transcript
+            job.skip.update(("probe", "dedupe", "extract", "vad", "transcribe"))
+            return
+        audio = self.cache.get(job.fingerprint, "audio", clip_labeler.audio_version)
+        if audio is not None:
+            # The clip was extracted before, so it is usable and has audio; only ffprobe is skipped
+            clip_labeler.media_info = MediaInfo(**audio["media_info"])
+            clip_labeler.clip_duration = audio["duration"]
+            job.skip.add("probe")
+
+    async def _probe(self, job: ClipJob) -> None:
+        """Fail clips ffmpeg cannot decode and route clips without audio straight to renaming."""
+        media_info = await job.labeler.probe_media_async(index=self.probe_index)
+        reason = media_info.unusable_reason
+        if reason is not None:
+            raise UnusableClipError(job.file_path, reason)
+        if not media_info.has_audio:
+            self.logger.info(f"Skipping extraction of {job.file_path}: it has no audio stream")
+            job.skip.update(("dedupe", "extract", "vad", "transcribe", "label"))
+
+    async def _seed_copies(self) -> None:
+        """Let the copy detector recognize copies of clips labeled in earlier runs."""
+        if self.copies is None or self.catalog is None or self._copies_seeded:
+            return
+        self._copies_seeded = True
+        for video_hash, path, duration, label, fingerprint in await asyncio.to_thread(self.catalog.video_hashes):
+            self.copies.join(video_hash, path, duration, label, fingerprint)
+
+    async def _dedupe(self, job: ClipJob) -> None:
+        """Hash sampled frames of the clip and route copies of known footage past every stage to `_link_copy`."""
+        if self.copies is None:
+            return
+        duration = job.labeler.clip_duration
+        job.video_hash = await compute_video_hash(job.file_path, duration)
+        if job.video_hash is None:
+            return
+        group, position = self.copies.join(job.video_hash, job.file_path, duration, fingerprint=job.fingerprint)
+        if position == 0:
+            job.copy_group = group
+            return
+        job.skip.update(STAGES[STAGES.index("dedupe") + 1 :])
+        # Wait outside the stage workers, so copies cannot hold the workers their original needs
+        task = asyncio.create_task(self._link_copy(job, group, position))
+        self._copy_tasks.add(task)
+        task.add_done_callback(self._copy_tasks.discard)
+
+    async def _link_copy(self, job: ClipJob, group: DuplicateGroup, position: int) -> None:
+        """Rename a copy after its original once the original is labeled."""
+        label = await group.label()
+        if not label:
+            error = RuntimeError(f"its original {group.leader} failed")
+            self._fail(job, "dedupe", error)
+            return
+        job.label = DuplicateLabeler.member_label(label, position)
+        job.result.duplicate_of = group.leader
+        started = time.perf_counter()
+        try:
+            await self._rename(job)
+        except Exception as e:
+            self._fail(job, "rename", e)
+            return
+        finally:
+            job.result.timings["rename"] = time.perf_counter() - started
+        self.metrics.clips.inc(stage="dedupe", status="copy")
+        job.result.status = "ok"
+        self._finish(job)
+
+    async def _extract(self, job: ClipJob) -> None:
+        if self.streaming is not None:
+            return
+        if self.in_memory_audio:
+            buffer = await job.labeler.extract_audio_buffer()
+            self.metrics.bytes_read.inc(buffer.seek(0, os.SEEK_END), stage="extract")
+            buffer.seek(0)
+        else:
+            audio_path = await job.labeler.extract_audio_async()
+            self.metrics.bytes_read.inc(audio_path.stat().st_size, stage="extract")
+        job.result.audio_codec = job.labeler.audio_codec
+        job.result.audio_copied = job.labeler.audio_copied
+        self.metrics.audio_extractions.inc(mode="copy" if job.labeler.audio_copied else "encode")
+        self._cache_audio(job)
+
+    def _cache_audio(self, job: ClipJob) -> None:
+        """Store what the extraction found out about the clip, so a re-run does not probe it again."""
+        clip_labeler = job.labeler
+        if self.cache is None or not job.fingerprint or clip_labeler.media_info is None:
+            return
+        audio = {
+            "media_info": asdict(clip_labeler.media_info),
+            "duration": clip_labeler.clip_duration,
+            "windows": clip_labeler.sampling_windows(),
+            "codec": clip_labeler.audio_codec,
+            "copied": clip_labeler.audio_copied,
+        }
+        self.cache.put(job.fingerprint, "audio", audio, clip_labeler.audio_version)
+
+    async def _vad(self, job: ClipJob) -> None:
+        if self.min_speech_ratio is None or self.streaming is not None:
+            return
+        clip_labeler = job.labeler
+        if clip_labeler.audio_buffer is not None and not clip_labeler.audio_copied:
+            samples, sample_rate = await asyncio.to_thread(read_wav_samples, clip_labeler.audio_buffer)
+        else:
+            # Stream-copied audio is still compressed, so the detector decodes the clip's audio a second time
+            samples, sample_rate = samples_from_pcm(await clip_labeler.extract_pcm()), SPEECH_SAMPLE_RATE
+        self.metrics.bytes_read.inc(samples.nbytes, stage="vad")
+        vad_result = await asyncio.to_thread(detect_speech, samples, sample_rate)
+        job.result.speech_ratio = vad_result.speech_ratio
+        if vad_result.speech_ratio < self.min_speech_ratio:
+            self.logger.info(
+                f"Skipping transcription of {job.file_path}: speech ratio {vad_result.speech_ratio:.2f} "
+                f"is below {self.min_speech_ratio:.2f}"
+            )
+            job.skip.update(("transcribe", "label"))
+            clip_labeler.release_audio()
+
+    async def _transcribe(self, job: ClipJob) -> None:
+        transcriber = AsyncTranscriber()
+        clip_labeler = job.labeler
+        try:
+            with self.metrics.api_call("transcribe"):
+                if self.streaming is not None:
+                    await self._transcribe_streaming(job)
+                elif clip_labeler.audio_buffer is not None:
+                    clip_labeler.audio_text = await transcriber.transcribe_file(
+                        clip_labeler.audio_buffer, clip_labeler.audio_buffer_name
+                    )
+                else:
+                    clip_labeler.audio_text = await transcriber.transcribe(clip_labeler.audio_path)
+        finally:
+            clip_labeler.release_audio()
+        self.metrics.api_tokens.inc(
+            estimate_tokens(clip_labeler.audio_text or ""), api="transcribe", direction="output"
+        )
+        if self.cache is not None and job.fingerprint:
+            version = self._transcript_version(job.labeler)
+            self.cache.put(job.fingerprint, "transcript", job.labeler.audio_text, version)
+
+    async def _transcribe_streaming(self, job: ClipJob) -> None:
+        transcript = await self.streaming.transcribe(job.labeler)  # type: ignore[union-attr]
+        self.metrics.transcription_chunks.inc(transcript.chunks, outcome="used")
+        self.metrics.transcription_chunks.inc(transcript.cancelled, outcome="cancelled")
+        if not transcript.complete:
+            self.metrics.clips.inc(stage="transcribe", status="early_stop")
+
+    async def _label(self, job: ClipJob) -> None:
+        group, position = self._join_duplicates(job)
+        if group is not None and position > 0:
+            job.label = await self._label_duplicate(job, group, position)
+        else:
+            try:
+                with self.metrics.api_call("label"):
+                    job.label = await job.labeler.generate_label()
+            finally:
+                self._resolve_duplicates(group, job.label)
+        if job.result.duplicate_of is None:
+            self._count_label_tokens(job)
+        self._store_label(job)
+
+    def _join_duplicates(self, job: ClipJob) -> tuple[Optional[DuplicateGroup], int]:
+        if self.duplicates is None:
+            return None, 0
+        return self.duplicates.join(job.labeler)
+
+    def _resolve_duplicates(self, group: Optional[DuplicateGroup], label: Optional[str]) -> None:
+        if self.duplicates is not None and group is not None:
+            self.duplicates.resolve(group, label)
+
+    async def _label_duplicate(self, job: ClipJob, group: DuplicateGroup, position: int) -> Optional[str]:
+        """Share the label of the clip's near-duplicate group, labeling the clip alone if the group has none."""
+        label = await group.label()
+        if label:
+            job.result.duplicate_of = group.leader
+            self.metrics.clips.inc(stage="label", status="duplicate")
+            return DuplicateLabeler.member_label(label, position)
+        with self.metrics.api_call("label"):
+            return await job.labeler.generate_label()
+
+    def _count_label_tokens(self, job: ClipJob) -> None:
+        label_tokens = estimate_tokens(job.labeler.label_text)
+        self.metrics.api_tokens.inc(label_tokens, api="label", direction="input")
+        self.metrics.api_tokens_saved.inc(
+            max(0, estimate_tokens(job.labeler.audio_text or "") - label_tokens), api="label"
+        )
+        self.metrics.api_tokens.inc(estimate_tokens(job.label or ""), api="label", direction="output")
+
+    def _store_label(self, job: ClipJob) -> None:
+        if self.cache is not None and job.fingerprint and job.label:
+            self.cache.put(job.fingerprint, "label", job.label, self._label_version(job.labeler))
+
+    async def _rename(self, job: ClipJob) -> None:
+        job.result.new_path = job.labeler.save_label(job.label)
+        if self.probe_index is not None:
+            self.probe_index.rename(job.file_path, job.result.new_path)
+        job.result.label = job.label or job.file_path.stem
+
+    def _transcript_version(self, clip_labeler: ClipLabeler) -> str:
+        version = f"{AsyncTranscriber.MODEL}:{clip_labeler.audio_version}"
+        return version if self.streaming is None else f"{version}:{self.streaming.version}"
+
+    def _label_version(self, clip_labeler: ClipLabeler) -> str:
+        return f"{clip_labeler.label_version}:{self._transcript_version(clip_labeler)}"
 
     def __str__(self) -> str:
         return f"LabelerPipeline(work_dir={self.work_dir}, rename_template={self.rename_template})"
 
 
-async def run_labeler_pipeline(work_dir: Path, rename_template: Optional[str] = None) -> None:
+async def run_labeler_pipeline(
+    work_dir: Path,
+    rename_template: Optional[str] = None,
+    jobs: int = DEFAULT_JOBS,
+    stage_jobs: Optional[dict[str, int]] = None,
+    cache_path: Optional[Path] = None,
+    label_batch_tokens: Optional[int] = None,
+    metrics_path: Optional[Path] = None,
+    metrics_interval: Optional[float] = None,
+    trace_path: Optional[Path] = None,
+    sampling: Sequence[float] = START_ONLY,
+    probe_index_path: Optional[Path] = None,
+    catalog_path: Optional[Path] = None,
+    duplicate_threshold: Optional[float] = None,
+    copy_distance: Optional[int] = None,
+    memo_path: Optional[Path] = None,
+    label_token_budget: Optional[int] = DEFAULT_LABEL_TOKEN_BUDGET,
+    stream_min_words: Optional[int] = None,
+    min_speech_ratio: Optional[float] = None,
+) -> dict[str, ClipResult]:
     """
     Run the LabelerPipeline asynchronously.
 
     Args:
         work_dir (Path): The directory containing files to process.
         rename_template (Optional[str]): The template for renaming files.
+        jobs (int): Default number of concurrent workers for every stage.
+        stage_jobs (Optional[dict[str, int]]): Per-stage overrides of `jobs`, keyed by stage name.
+        cache_path (Optional[Path]): Result cache database, so re-runs skip finished clips.
+            Caching is disabled when None.
+        label_batch_tokens (Optional[int]): Token budget of batched labeling calls. Every clip is
+            labeled with its own call when None.
+        metrics_path (Optional[Path]): Prometheus textfile, or JSON snapshot if the suffix is
+            `.json`, to write the run's metrics to.
+        metrics_interval (Optional[float]): Seconds between metrics exports during the run.
+            The metrics are only written at the end when None.
+        trace_path (Optional[Path]): Chrome trace-event JSON file to record a timeline of the run
+            in, for chrome://tracing or ui.perfetto.dev. Tracing is disabled when None.
+        sampling (Sequence[float]): Positions of the audio sampling windows in each clip, see
+            `src.utils.sampling`.
+        probe_index_path (Optional[Path]): Index database of ffprobe results, so re-runs do not
+            probe unchanged clips again. Clips are probed on every run when None.
+        catalog_path (Optional[Path]): Clip catalog database to record labeled clips in, for
+            full-text search. Clips are not cataloged when None.
+        duplicate_threshold (Optional[float]): Transcript similarity, between 0 and 1, above which
+            clips are grouped and labeled once, with a numbered suffix per clip. Every clip is
+            labeled on its own when None.
+        copy_distance (Optional[int]): Maximum Hamming distance between the perceptual video hashes
+            of copies of the same footage, which are renamed after the first copy instead of being
+            labeled, see `src.cliptale.duplicates.CopyDetector`. Copies are not detected when None.
+        memo_path (Optional[Path]): Response memo database, so transcripts labeled before are
+            not sent to the agent again. Responses are not memoized when None.
+        label_token_budget (Optional[int]): Estimated tokens of a transcript sent for labeling,
+            see `LabelerPipeline`. Transcripts are not truncated when None.
+        stream_min_words (Optional[int]): Transcribe the audio in chunks as ffmpeg decodes it and
+            label a clip as soon as this many words are transcribed, see `StreamingTranscriber`.
+            All of the audio is extracted and transcribed at once when None.
+        min_speech_ratio (Optional[float]): Fraction of speech below which clips skip transcription
+            and labeling, see `LabelerPipeline`. Every clip is transcribed when None.
+
+    Returns:
+        dict[str, ClipResult]: Per-file outcomes and timings, keyed by source path.
+    """
+    cache = ResultCache(cache_path) if cache_path is not None else None
+    batch_labeler = BatchLabeler(token_budget=label_batch_tokens) if label_batch_tokens is not None else None
+    tracer = Tracer() if trace_path is not None else None
+    probe_index = ProbeIndex(probe_index_path) if probe_index_path is not None else None
+    catalog = ClipCatalog(catalog_path) if catalog_path is not None else None
+    duplicates = DuplicateLabeler(duplicate_threshold) if duplicate_threshold is not None else None
+    copies = CopyDetector(copy_distance) if copy_distance is not None else None
+    memo = ResponseMemo(memo_path) if memo_path is not None else None
+    streaming = StreamingTranscriber(min_words=stream_min_words) if stream_min_words is not None else None
+    try:
+        pipeline = LabelerPipeline(
+            work_dir,
+            rename_template,
+            jobs=jobs,
+            stage_jobs=stage_jobs,
+            cache=cache,
+            batch_labeler=batch_labeler,
+            tracer=tracer,
+            sampling=sampling,
+            probe_index=probe_index,
+            catalog=catalog,
+            duplicates=duplicates,
+            copies=copies,
+            memo=memo,
+            label_token_budget=label_token_budget,
+            streaming=streaming,
+            min_speech_ratio=min_speech_ratio,
+        )
+        async with exporting_metrics(pipeline.metrics, metrics_path, metrics_interval):
+            return await pipeline.run()
+    finally:
+        if memo is not None:
+            memo.close()
+        if cache is not None:
+            cache.close()
+        if probe_index is not None:
+            probe_index.close()
+        if catalog is not None:
+            catalog.close()
+        if tracer is not None and trace_path is not None:
+            tracer.write(trace_path)
+
+
+async def run_watch_mode(
+    work_dir: Path,
+    rename_template: Optional[str] = None,
+    jobs: int = DEFAULT_JOBS,
+    stage_jobs: Optional[dict[str, int]] = None,
+    cache_path: Optional[Path] = None,
+    journal_path: Optional[Path] = None,
+    settle_interval: float = DEFAULT_SETTLE_INTERVAL,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    metrics_path: Optional[Path] = None,
+    metrics_interval: Optional[float] = DEFAULT_METRICS_INTERVAL,
+    probe_index_path: Optional[Path] = None,
+    catalog_path: Optional[Path] = None,
+    memo_path: Optional[Path] = None,
+    min_speech_ratio: Optional[float] = None,
+) -> dict[str, ClipResult]:
+    """
+    Watch a drop folder and label clips as they finish copying, until cancelled.
+
+    Args:
+        work_dir (Path): The directory to watch.
+        rename_template (Optional[str]): The template for renaming files.
+        jobs (int): Default number of concurrent workers for every stage.
+        stage_jobs (Optional[dict[str, int]]): Per-stage overrides of `jobs`, keyed by stage name.
+        cache_path (Optional[Path]): Result cache database. Caching is disabled when None.
+        journal_path (Optional[Path]): Journal of processed files, so restarts only pick up new
+            files. Defaults to `.cliptale-journal.jsonl` in `work_dir`.
+        settle_interval (float): Seconds a file's size must stay unchanged before it is processed.
+        poll_interval (float): Seconds between scans when inotify is not available.
+        metrics_path (Optional[Path]): Prometheus textfile, or JSON snapshot if the suffix is
+            `.json`, that the metrics are written to while watching.
+        metrics_interval (Optional[float]): Seconds between metrics exports.
+        probe_index_path (Optional[Path]): Index database of ffprobe results. Clips are probed
+            every time they are processed when None.
+        catalog_path (Optional[Path]): Clip catalog database to record labeled clips in. Clips
+            are not cataloged when None.
+        memo_path (Optional[Path]): Response memo database, so transcripts labeled before are
+            not sent to the agent again. Responses are not memoized when None.
+        min_speech_ratio (Optional[float]): Fraction of speech below which clips skip transcription
+            and labeling, see `LabelerPipeline`. Every clip is transcribed when None.
+
+    Returns:
+        dict[str, ClipResult]: Per-file outcomes and timings, keyed by source path.
     """
-    pipeline = LabelerPipeline(work_dir, rename_template)
-    await pipeline.run()
+    journal = ProcessedJournal(journal_path or work_dir / JOURNAL_FILE_NAME)
+    cache = ResultCache(cache_path) if cache_path is not None else None
+    probe_index = ProbeIndex(probe_index_path) if probe_index_path is not None else None
+    catalog = ClipCatalog(catalog_path) if catalog_path is not None else None
+    watcher = DirectoryWatcher(work_dir, journal, settle_interval=settle_interval, poll_interval=poll_interval)
+    memo = ResponseMemo(memo_path) if memo_path is not None else None
+    try:
+        pipeline = LabelerPipeline(
+            work_dir,
+            rename_template,
+            jobs=jobs,
+            stage_jobs=stage_jobs,
+            cache=cache,
+            journal=journal,
+            probe_index=probe_index,
+            catalog=catalog,
+            memo=memo,
+            min_speech_ratio=min_speech_ratio,
+        )
+        async with exporting_metrics(pipeline.metrics, metrics_path, metrics_interval):
+            return await pipeline.watch(watcher)
+    finally:
+        journal.close()
+        if memo is not None:
+            memo.close()
+        if cache is not None:
+            cache.close()
+        if probe_index is not None:
+            probe_index.close()
+        if catalog is not None:
+            catalog.close()
@@ -0,0 +1,114 @@
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Any, Optional
+
+from src.utils.metrics import MetricsRegistry
+
+
+class PipelineMetrics:
+    """Counters, gauges and latency histograms of a labeling pipeline run.
+
+    All metrics live in one registry, so they can be written out together as a Prometheus
+    textfile or a JSON snapshot with `registry.write()`.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None) -> None:
+        self.registry = registry or MetricsRegistry()
+        self.stage_seconds = self.registry.histogram(
+            "cliptale_stage_duration_seconds", "Wall time a clip spent in a pipeline stage.", ("stage",)
+        )
+        self.clips = self.registry.counter(
+            "cliptale_stage_clips_total", "Clips that left a pipeline stage, by outcome.", ("stage", "status")
+        )
+        self.queue_depth = self.registry.gauge(
+            "cliptale_queue_depth", "Clips waiting in the input queue of a pipeline stage.", ("stage",)
+        )
+        self.api_in_flight = self.registry.gauge("cliptale_api_in_flight", "API calls currently in flight.", ("api",))
+        self.api_calls = self.registry.counter("cliptale_api_calls_total", "Finished API calls.", ("api", "status"))
+        self.api_tokens = self.registry.counter(
+            "cliptale_api_tokens_total",
+            "Estimated text tokens sent to and received from the API.",
+            ("api", "direction"),
+        )
+        self.api_tokens_saved = self.registry.counter(
+            "cliptale_api_tokens_saved_total",
+            "Estimated input tokens transcript compaction kept from the API.",
+            ("api",),
+        )
+        self.bytes_read = self.registry.counter(
+            "cliptale_bytes_read_total", "Bytes read from clips and extracted audio.", ("stage",)
+        )
+        self.audio_extractions = self.registry.counter(
+            "cliptale_audio_extractions_total",
+            "Audio extractions, by whether the audio was copied or encoded.",
+            ("mode",),
+        )
+        self.transcription_chunks = self.registry.counter(
+            "cliptale_transcription_chunks_total",
+            "Audio chunks of streamed transcriptions, by whether their text was used or they were cancelled.",
+            ("outcome",),
+        )
+        self.files_scanned = self.registry.counter("cliptale_files_scanned_total", "Video files found by scans.")
+        self.memo_requests = self.registry.gauge(
+            "cliptale_memo_requests", "Labeling requests looked up in the response memo, by outcome.", ("outcome",)
+        )
+        self.memo_saved_seconds = self.registry.gauge(
+            "cliptale_memo_saved_seconds", "Seconds of agent calls the response memo answered instead."
+        )
+        self.api_concurrency_limit = self.registry.gauge(
+            "cliptale_api_concurrency_limit", "Current adaptive concurrency limit of an API.", ("endpoint", "model")
+        )
+
+    def record_memo(self, stats: dict[str, Any]) -> None:
+        """Copy the counters of a `ResponseMemo`, from its `stats()`, into the registry."""
+        for outcome in ("memory", "disk", "coalesced", "miss"):
+            self.memo_requests.set(stats[outcome], outcome=outcome)
+        self.memo_saved_seconds.set(stats["saved_seconds"])
+
+    def record_limits(self, stats: dict[tuple[str, str], dict[str, Any]]) -> None:
+        """Copy the current limits of the adaptive limiters, from `limiter_stats()`, into the registry."""
+        for (endpoint, model), limiter in stats.items():
+            self.api_concurrency_limit.set(limiter["limit"], endpoint=endpoint, model=model)
+
+    @contextmanager
+    def api_call(self, api: str) -> Iterator[None]:
+        """Count the enclosed API call as in flight, and as ok or failed once it returns."""
+        with self.api_in_flight.track(api=api):
+            try:
+                yield
+            except Exception:
+                self.api_calls.inc(api=api, status="error")
+                raise
+            self.api_calls.inc(api=api, status="ok")
+
+
+@asynccontextmanager
+async def exporting_metrics(
+    metrics: PipelineMetrics, path: Optional[Path], interval: Optional[float] = None
+) -> AsyncIterator[None]:
+    """
+    Write the metrics to `path` when the enclosed block ends, and every `interval` seconds while it runs.
+
+    Args:
+        metrics (PipelineMetrics): The metrics to export.
+        path (Optional[Path]): Prometheus textfile, or JSON snapshot if the suffix is `.json`.
+            Nothing is exported when None.
+        interval (Optional[float]): Seconds between exports during the run. Only the final
+            export is written when None.
+    """
+    if path is None:
+        yield
+        return
+    exporter = asyncio.create_task(metrics.registry.export_periodically(path, interval)) if interval else None
+    try:
+        yield
+    finally:
+        if exporter is None:
+            metrics.registry.write(path)
+        else:
+            exporter.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await exporter
@@ -0,0 +1,219 @@
+import asyncio
+import contextlib
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from collections.abc import AsyncIterator, Iterator
+from pathlib import Path
+from typing import Optional
+
+from src.cliptale.labeler import ClipLabeler
+from src.utils.journal import FileSignature, ProcessedJournal
+from src.utils.loggers import LoggerFactory
+
+# Seconds between two size checks of a file that is still being written
+DEFAULT_SETTLE_INTERVAL = 2.0
+
+# Seconds between two directory scans when inotify is not available
+DEFAULT_POLL_INTERVAL = 5.0
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal ctypes binding to the Linux inotify API."""
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._directories: dict[int, Path] = {}
+
+    def add_watch(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), str(directory))
+        self._directories[wd] = directory
+
+    def read_events(self) -> list[tuple[Path, int]]:
+        """Read all pending events as (path, mask) pairs."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            directory = self._directories.get(wd)
+            if directory is not None or mask & IN_Q_OVERFLOW:
+                events.append(((directory or Path()) / os.fsdecode(name), mask))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class DirectoryWatcher:
+    """Yields video files as they appear in a directory tree and are fully written.
+
+    Changes are picked up with inotify on Linux and by periodic scans elsewhere. A candidate file
+    is only yielded once its size and mtime have stayed the same for one settle interval, so files
+    that are still being copied are not processed early. Files already recorded in the journal in
+    their current state are skipped.
+    """
+
+    def __init__(
+        self,
+        watch_dir: Path,
+        journal: Optional[ProcessedJournal] = None,
+        settle_interval: float = DEFAULT_SETTLE_INTERVAL,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        use_inotify: bool = True,
+    ) -> None:
+        self.watch_dir = watch_dir
+        self.journal = journal
+        self.settle_interval = settle_interval
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self.logger = LoggerFactory.get_logger()
+        self._candidates: dict[Path, Optional[FileSignature]] = {}
+        self._snapshot: dict[Path, FileSignature] = {}
+        self._stopped = False
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def stop(self) -> None:
+        """Stop watching; the iteration ends after the current check."""
+        self._stopped = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _is_video(self, path: Path) -> bool:
+        return path.suffix.lower() in ClipLabeler.SUPPORTED_VIDEO_EXTENSIONS
+
+    def _walk(self, directory: Path) -> Iterator[tuple[Path, bool]]:
+        """Yield (path, is_dir) for every entry below directory."""
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        yield Path(entry.path), True
+                        yield from self._walk(Path(entry.path))
+                    elif entry.is_file():
+                        yield Path(entry.path), False
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            return
+
+    def _watch(self, directory: Path, inotify: _Inotify) -> None:
+        try:
+            inotify.add_watch(directory)
+        except OSError as e:
+            self.logger.warning(f"Cannot watch {directory}: {e}")
+
+    def _add_directory(self, directory: Path, inotify: Optional[_Inotify]) -> None:
+        """Start watching a directory and queue the video files already in it."""
+        if inotify is not None:
+            self._watch(directory, inotify)
+        for path, is_dir in self._walk(directory):
+            if is_dir:
+                if inotify is not None:
+                    self._watch(path, inotify)
+            elif self._is_video(path):
+                self._candidates.setdefault(path, None)
+
+    def _on_inotify_events(self, inotify: _Inotify) -> None:
+        for path, mask in inotify.read_events():
+            if mask & IN_Q_OVERFLOW:
+                self.logger.warning("inotify queue overflowed, rescanning watch directory")
+                self._add_directory(self.watch_dir, None)
+            elif mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_directory(path, inotify)
+            elif self._is_video(path):
+                self._candidates.setdefault(path, None)
+
+    def _poll(self) -> None:
+        """Scan the tree and queue files whose signature changed since the last scan."""
+        snapshot = {}
+        for path, is_dir in self._walk(self.watch_dir):
+            if is_dir or not self._is_video(path):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+            if self._snapshot.get(path) != snapshot[path]:
+                self._candidates.setdefault(path, None)
+        self._snapshot = snapshot
+
+    def _settled(self) -> list[Path]:
+        """Return candidates whose signature did not change since the previous check."""
+        ready = []
+        for path, previous in list(self._candidates.items()):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                del self._candidates[path]
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if signature != previous or stat.st_size == 0:
+                self._candidates[path] = signature
+                continue
+            del self._candidates[path]
+            if self.journal is not None and self.journal.is_processed(path, signature):
+                continue
+            ready.append(path)
+        return ready
+
+    async def __aiter__(self) -> AsyncIterator[Path]:
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        inotify: Optional[_Inotify] = None
+        if self.use_inotify:
+            try:
+                inotify = _Inotify()
+            except OSError as e:
+                self.logger.warning(f"inotify unavailable ({e}), falling back to polling")
+        if inotify is not None:
+            self._add_directory(self.watch_dir, inotify)
+            loop.add_reader(inotify.fd, self._on_inotify_events, inotify)
+            self.logger.info(f"Watching {self.watch_dir} with inotify")
+        else:
+            self._poll()
+            self.logger.info(f"Watching {self.watch_dir} by polling every {self.poll_interval}s")
+
+        last_poll = loop.time()
+        try:
+            while not self._stopped:
+                for path in self._settled():
+                    yield path
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), self.settle_interval)
+                if inotify is None and loop.time() - last_poll >= self.poll_interval:
+                    self._poll()
+                    last_poll = loop.time()
+        finally:
+            if inotify is not None:
+                loop.remove_reader(inotify.fd)
+                inotify.close()
@@ -0,0 +1,133 @@
+import io
+import os
+import struct
+import sys
+import wave
+from array import array
+from typing import Any, BinaryIO, Optional
+
+# Sample rate of the mono audio extracted for transcription (in Hz)
+SPEECH_SAMPLE_RATE = 16000
+
+# Bytes per sample of 16-bit PCM
+PCM_SAMPLE_WIDTH = 2
+
+# Length of the frames whose loudness is compared when looking for a pause to split audio at (in samples)
+SPLIT_FRAME_SAMPLES = 320
+
+# Bitrate of the mono MP3 audio is re-encoded to when it cannot be stream-copied; plenty for speech
+SPEECH_MP3_BITRATE = "32k"
+
+# Source audio codecs the transcription API accepts as they are: codec -> (ffmpeg muxer, file suffix)
+PASSTHROUGH_FORMATS = {
+    "aac": ("ipod", ".m4a"),
+    "mp3": ("mp3", ".mp3"),
+    "opus": ("ogg", ".ogg"),
+    "vorbis": ("ogg", ".ogg"),
+    "flac": ("flac", ".flac"),
+}
+
+# Muxers that can write to a pipe, with the output options that keep them from seeking back to fill in an
+# index: MP4 is written as 1 s fragments after an empty header, which the transcription API still reads as M4A
+PIPE_MUXER_OPTIONS: dict[str, dict[str, Any]] = {
+    "mp3": {},
+    "ogg": {},
+    "flac": {},
+    "ipod": {"movflags": "empty_moov+default_base_moof", "frag_duration": 1_000_000},
+}
+
+
+def passthrough_format(codec: Optional[str], to_pipe: bool = False) -> Optional[tuple[str, str]]:
+    """
+    The container audio of a codec is stream-copied into for transcription, instead of re-encoding it.
+
+    Args:
+        codec (Optional[str]): The source audio codec, as ffprobe names it.
+        to_pipe (bool): Whether the container is written to a pipe rather than a file.
+
+    Returns:
+        Optional[tuple[str, str]]: The ffmpeg muxer and file suffix, or None if the audio must be re-encoded.
+    """
+    passthrough = PASSTHROUGH_FORMATS.get(codec or "")
+    if passthrough is None or (to_pipe and passthrough[0] not in PIPE_MUXER_OPTIONS):
+        return None
+    return passthrough
+
+
+def fix_wav_header(audio_file: BinaryIO) -> None:
+    """
+    Patch the RIFF and data chunk sizes of a WAV stream written to a pipe.
+
+    ffmpeg cannot seek back on a pipe to fill in the sizes once it knows them, and leaves
+    placeholder values that some decoders reject. The file position is left at the start.
+
+    Args:
+        audio_file (BinaryIO): A seekable file containing the complete WAV stream.
+    """
+    total_size = audio_file.seek(0, os.SEEK_END)
+    audio_file.seek(0)
+    header = audio_file.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        audio_file.seek(0)
+        return
+    audio_file.seek(4)
+    audio_file.write(struct.pack("<I", min(total_size - 8, 0xFFFFFFFF)))
+
+    offset = 12
+    while offset + 8 <= total_size:
+        audio_file.seek(offset)
+        chunk_id, chunk_size = struct.unpack("<4sI", audio_file.read(8))
+        if chunk_id == b"data":
+            audio_file.seek(offset + 4)
+            audio_file.write(struct.pack("<I", min(total_size - offset - 8, 0xFFFFFFFF)))
+            break
+        offset += 8 + chunk_size + (chunk_size & 1)
+    audio_file.seek(0)
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int = SPEECH_SAMPLE_RATE) -> bytes:
+    """
+    Wrap raw mono 16-bit PCM in a WAV header, e.g. to transcribe a chunk of decoded audio.
+
+    Args:
+        pcm (bytes): Little-endian signed 16-bit samples.
+        sample_rate (int): Sample rate of the samples in Hz.
+
+    Returns:
+        bytes: The complete WAV file.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(PCM_SAMPLE_WIDTH)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def quietest_split(pcm: bytes, start: int, end: int, frame_samples: int = SPLIT_FRAME_SAMPLES) -> int:
+    """
+    Byte offset in the quietest frame between `start` and `end` of mono 16-bit PCM.
+
+    Audio split there is most likely split in a pause rather than in the middle of a word.
+
+    Args:
+        pcm (bytes): Little-endian signed 16-bit samples.
+        start (int): Byte offset to start looking at.
+        end (int): Byte offset to stop looking at; returned if no whole frame fits before it.
+        frame_samples (int): Samples per compared frame.
+
+    Returns:
+        int: Sample-aligned byte offset in the middle of the quietest frame.
+    """
+    frame_bytes = frame_samples * PCM_SAMPLE_WIDTH
+    start -= start % PCM_SAMPLE_WIDTH
+    split, quietest = end - end % PCM_SAMPLE_WIDTH, None
+    for offset in range(start, end - frame_bytes + 1, frame_bytes):
+        frame = array("h", pcm[offset : offset + frame_bytes])
+        if sys.byteorder == "big":
+            frame.byteswap()
+        loudness = sum(map(abs, frame))
+        if quietest is None or loudness < quietest:
+            split, quietest = offset + frame_samples // 2 * PCM_SAMPLE_WIDTH, loudness
+    return split
@@ -0,0 +1,148 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Optional
+
+from src.utils.config import default_cache_path, resolve_cache_path
+
+# Default location of the result cache database
+DEFAULT_CACHE_PATH = default_cache_path("results.sqlite3")
+
+# Default upper bound for the total size of cached values (in bytes)
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Number of cache hits whose access times are buffered before they are written in one transaction
+ACCESS_FLUSH_INTERVAL = 256
+
+
+class ResultCache:
+    """Persistent SQLite cache for per-clip pipeline results.
+
+    Entries are keyed by a content fingerprint (see `fingerprint_file`), a kind such as
+    "audio", "transcript" or "label", and a version string. The version should change whenever the
+    producer changes (model, instructions, extraction settings) so stale entries are missed.
+    Least recently used entries are evicted once the stored values exceed `max_bytes`. Access
+    times of hits are buffered and written with the next `put`, every `ACCESS_FLUSH_INTERVAL`
+    hits or on `close`, so lookups do not wait for a commit.
+    """
+
+    KINDS = ("audio", "transcript", "label")
+
+    def __init__(self, db_path: Path = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_CACHE_MAX_BYTES) -> None:
+        db_path = resolve_cache_path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._accessed: dict[tuple[str, str, str], float] = {}
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                fingerprint TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                version TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (fingerprint, kind, version)
+            )
+            """
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._connection.commit()
+
+    def get(self, fingerprint: str, kind: str, version: str = "") -> Optional[Any]:
+        """
+        Look up a cached value and mark it as recently used.
+
+        Args:
+            fingerprint (str): Content fingerprint of the clip.
+            kind (str): The kind of value, one of `ResultCache.KINDS`.
+            version (str): Version of the producer of the value.
+
+        Returns:
+            Optional[Any]: The cached value, or None on a miss.
+        """
+        key = (fingerprint, kind, version)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM entries WHERE fingerprint = ? AND kind = ? AND version = ?", key
+            ).fetchone()
+            if row is None:
+                self.misses[kind] += 1
+                return None
+            self._accessed[key] = time.time()
+            if len(self._accessed) >= ACCESS_FLUSH_INTERVAL:
+                self._flush_accessed()
+                self._connection.commit()
+            self.hits[kind] += 1
+        return json.loads(row[0])
+
+    def put(self, fingerprint: str, kind: str, value: Any, version: str = "") -> None:
+        """
+        Store a JSON-serializable value, evicting old entries if the cache grows too large.
+
+        Args:
+            fingerprint (str): Content fingerprint of the clip.
+            kind (str): The kind of value, one of `ResultCache.KINDS`.
+            value (Any): The value to store.
+            version (str): Version of the producer of the value.
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown cache kind: {kind}")  # noqa: TRY003
+        encoded = json.dumps(value)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (fingerprint, kind, version, encoded, len(encoded), time.time()),
+            )
+            self._accessed.pop((fingerprint, kind, version), None)
+            # Evict by the latest access times
+            self._flush_accessed()
+            self._evict()
+            self._connection.commit()
+
+    def _flush_accessed(self) -> None:
+        if not self._accessed:
+            return
+        self._connection.executemany(
+            "UPDATE entries SET accessed = ? WHERE fingerprint = ? AND kind = ? AND version = ?",
+            [(accessed, *key) for key, accessed in self._accessed.items()],
+        )
+        self._accessed.clear()
+
+    def _evict(self) -> None:
+        (total,) = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._connection.execute("SELECT rowid, size FROM entries ORDER BY accessed").fetchall()
+        evicted = []
+        for rowid, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((rowid,))
+            total -= size
+        self._connection.executemany("DELETE FROM entries WHERE rowid = ?", evicted)
+
+    @property
+    def size(self) -> int:
+        """Total size of the cached values in bytes."""
+        with self._lock:
+            (total,) = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return int(total)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Hit and miss counters per kind since the cache was opened."""
+        return {kind: {"hits": self.hits[kind], "misses": self.misses[kind]} for kind in self.KINDS}
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_accessed()
+            self._connection.commit()
+            self._connection.close()
@@ -0,0 +1,253 @@
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+from src.utils.loggers import LoggerFactory
+
+
+@dataclass
+class LimiterSettings:
+    """Tuning of an `AdaptiveLimiter`.
+
+    Attributes:
+        initial: Concurrency limit to start with
+        min_limit: Lowest limit, however overloaded the API is
+        max_limit: Highest limit, however fast the API answers
+        increase: Calls added to the limit per limit's worth of fast calls
+        backoff: Factor the limit is multiplied by on overload
+        latency_tolerance: A call slower than this multiple of the latency average counts as a spike
+        alpha: Weight of the newest call in the latency average
+    """
+
+    initial: int = 4
+    min_limit: int = 1
+    max_limit: int = 64
+    increase: float = 1.0
+    backoff: float = 0.5
+    latency_tolerance: float = 2.0
+    alpha: float = 0.1
+
+
+def is_overload(error: BaseException) -> bool:
+    """Whether an API error means the server is overloaded: HTTP 429, a 5xx response or a timeout."""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(error, (TimeoutError, asyncio.TimeoutError)) or type(error).__name__ == "APITimeoutError"
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Seconds an API error's `Retry-After` or `retry-after-ms` header asks to wait before calling again.
+
+    Args:
+        error (BaseException): The error, e.g. an `openai.RateLimitError` with its HTTP response.
+
+    Returns:
+        Optional[float]: The seconds, or None if the error carries no such header.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    with_ms = headers.get("retry-after-ms")
+    if with_ms:
+        try:
+            return max(0.0, float(with_ms) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimiter:
+    """An AIMD concurrency limit for the calls to one API endpoint and model.
+
+    Every limit's worth of calls that answer about as fast as usual raises the limit by
+    `increase`; an overload error (HTTP 429, 5xx, timeout) or a latency spike multiplies it by
+    `backoff`, at most once per average call latency, so a burst of errors from the same moment
+    counts once. A `Retry-After` header holds back every call until it has passed. Callers wait
+    for a slot in FIFO order; the limit, the calls in flight and waiting are visible in `stats()`.
+    """
+
+    def __init__(
+        self, name: str = "", settings: Optional[LimiterSettings] = None, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.name = name
+        self.settings = settings or LimiterSettings()
+        if not 1 <= self.settings.min_limit <= self.settings.initial <= self.settings.max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial <= max_limit")  # noqa: TRY003
+        if not 0.0 < self.settings.backoff < 1.0:
+            raise ValueError("backoff must be between 0 and 1")  # noqa: TRY003
+        self.clock = clock
+        self.limit = float(self.settings.initial)
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.blocked_until = 0.0
+        self.decreases = 0
+        self._last_decrease = -math.inf
+        self._waiters: deque[asyncio.Future] = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.logger = LoggerFactory.get_logger()
+
+    @property
+    def capacity(self) -> int:
+        """Calls allowed in flight at once."""
+        return max(self.settings.min_limit, int(self.limit))
+
+    async def acquire(self) -> None:
+        """Wait for a slot; every call must be followed by a `release`."""
+        if not self._waiters and self.in_flight < self.capacity and self.clock() >= self.blocked_until:
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._wake()
+        try:
+            # The slot is taken for us before the future is resolved
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                if future in self._waiters:
+                    self._waiters.remove(future)
+            else:
+                self.in_flight -= 1
+                self._wake()
+            raise
+
+    def release(self, latency: Optional[float] = None, error: Optional[BaseException] = None) -> None:
+        """
+        Free a slot and adapt the limit to how the call went.
+
+        Args:
+            latency (Optional[float]): Seconds a successful call took.
+            error (Optional[BaseException]): The error a failed call raised. Errors other than
+                overload errors, e.g. invalid requests, leave the limit as it is.
+        """
+        saturated = self.in_flight >= self.capacity
+        self.in_flight -= 1
+        if error is not None and is_overload(error):
+            delay = retry_after(error)
+            if delay:
+                self.blocked_until = max(self.blocked_until, self.clock() + delay)
+            self._decrease(f"{type(error).__name__}: {error}")
+        elif error is None and latency is not None:
+            self._observe(latency, saturated)
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Run the enclosed call in a slot, measuring its latency or catching its error."""
+        await self.acquire()
+        started = self.clock()
+        try:
+            yield
+        except Exception as e:
+            self.release(error=e)
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.release(latency=self.clock() - started)
+
+    def _observe(self, latency: float, saturated: bool) -> None:
+        settings = self.settings
+        if self.latency is None:
+            self.latency = latency
+        spike = latency > settings.latency_tolerance * self.latency
+        self.latency += settings.alpha * (latency - self.latency)
+        if spike:
+            self._decrease(f"latency {latency:.2f}s")
+        elif saturated:
+            # Additive increase, about `increase` per limit's worth of calls, while the limit holds calls back
+            self.limit = min(float(settings.max_limit), self.limit + settings.increase / self.limit)
+
+    def _decrease(self, reason: str) -> None:
+        now = self.clock()
+        if now - self._last_decrease < (self.latency or 0.0):
+            return
+        self._last_decrease = now
+        self.decreases += 1
+        self.limit = max(float(self.settings.min_limit), self.limit * self.settings.backoff)
+        self.logger.info(f"Concurrency limit of {self.name or 'API'} cut to {self.capacity} after {reason}")
+
+    def _wake(self) -> None:
+        """Hand free slots to the waiting callers, or retry once a `Retry-After` has passed."""
+        blocked_for = self.blocked_until - self.clock()
+        if blocked_for > 0:
+            if self._waiters and self._timer is None:
+                self._timer = self._waiters[0].get_loop().call_later(blocked_for, self._unblock)
+            return
+        while self._waiters and self.in_flight < self.capacity:
+            future = self._waiters.popleft()
+            if future.done() or future.get_loop().is_closed():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _unblock(self) -> None:
+        self._timer = None
+        self._wake()
+
+    def stats(self) -> dict[str, Any]:
+        """The current limit, calls in flight and waiting, latency average and seconds until unblocked."""
+        return {
+            "limit": self.capacity,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "latency": self.latency,
+            "blocked_for": max(0.0, self.blocked_until - self.clock()),
+            "decreases": self.decreases,
+        }
+
+
+_settings: dict[tuple[Optional[str], Optional[str]], LimiterSettings] = {}
+_limiters: dict[tuple[str, str], AdaptiveLimiter] = {}
+
+
+def configure_limiter(settings: LimiterSettings, endpoint: Optional[str] = None, model: Optional[str] = None) -> None:
+    """
+    Set the tuning of the limiters created from now on for an endpoint, a model, or both.
+
+    Args:
+        settings (LimiterSettings): The tuning.
+        endpoint (Optional[str]): Base URL of the API, None for any endpoint.
+        model (Optional[str]): Model name, None for any model.
+    """
+    _settings[(endpoint, model)] = settings
+
+
+def get_limiter(endpoint: str, model: str) -> AdaptiveLimiter:
+    """Return the process-wide limiter of an endpoint and model, configured by the most specific settings."""
+    key = (endpoint, model)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        settings = next(
+            (
+                _settings[candidate]
+                for candidate in (key, (endpoint, None), (None, model), (None, None))
+                if candidate in _settings
+            ),
+            None,
+        )
+        limiter = _limiters[key] = AdaptiveLimiter(f"{model} at {endpoint}", settings)
+    return limiter
+
+
+def limiter_stats() -> dict[tuple[str, str], dict[str, Any]]:
+    """Stats of every limiter in use, keyed by endpoint and model."""
+    return {key: limiter.stats() for key, limiter in _limiters.items()}
@@ -1,5 +1,66 @@
-from dotenv import load_dotenv
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
 
-load_dotenv()
+# Lower-case extensions of the video files ClipTale can label
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
 
-TMP_DIR = "../tmp"
+# Template clips are renamed with by default; `{ext}` keeps the extension, so the name matches the container
+DEFAULT_RENAME_TEMPLATE = "{label}{ext}"
+
+# First part of default paths that lie in the cache directory, see `resolve_cache_path`
+CACHE_DIR_PLACEHOLDER = "$CLIPTALE_CACHE_DIR"
+
+_env_loaded = False
+
+
+def load_env(dotenv_path: Optional[str] = None) -> bool:
+    """
+    Load a `.env` file into the environment, without overriding variables that are already set.
+
+    Importing the config has no side effects. The directories and API clients call `ensure_env`
+    when they are first used; entry points may call this earlier, e.g. to load another file.
+
+    Args:
+        dotenv_path (Optional[str]): The file to load. Defaults to the nearest `.env` file.
+
+    Returns:
+        bool: Whether a file set any variables.
+    """
+    global _env_loaded
+
+    from dotenv import load_dotenv
+
+    _env_loaded = True
+    return load_dotenv(dotenv_path)
+
+
+def ensure_env() -> None:
+    """Load the nearest `.env` file unless `load_env` has run already."""
+    if not _env_loaded:
+        load_env()
+
+
+def tmp_dir() -> str:
+    """Directory of temporary audio files, `CLIPTALE_TMP_DIR` from the environment or `.env` if set."""
+    ensure_env()
+    return os.getenv("CLIPTALE_TMP_DIR", os.path.join(tempfile.gettempdir(), "cliptale"))
+
+
+def cache_dir() -> str:
+    """Directory of the cache databases, `CLIPTALE_CACHE_DIR` from the environment or `.env` if set."""
+    ensure_env()
+    return os.getenv("CLIPTALE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "cliptale"))
+
+
+def default_cache_path(file_name: str) -> Path:
+    """Default path of a database in the cache directory, resolved when it is opened, see `resolve_cache_path`."""
+    return Path(CACHE_DIR_PLACEHOLDER, file_name)
+
+
+def resolve_cache_path(path: Path) -> Path:
+    """Replace the placeholder of a `default_cache_path` with the cache directory configured now."""
+    if path.parts and path.parts[0] == CACHE_DIR_PLACEHOLDER:
+        return Path(cache_dir(), *path.parts[1:])
+    return path
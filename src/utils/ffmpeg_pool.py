@@ -0,0 +1,162 @@
+import asyncio
+import os
+import time
+import weakref
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Optional, Union
+
+from src.models.errors import FFmpegProcessError, FFmpegTimeoutError
+from src.utils.tracing import current_span
+
+# Default per-job timeout for ffmpeg invocations (in seconds)
+DEFAULT_FFMPEG_TIMEOUT = 120.0
+
+
+@dataclass
+class FFmpegResult:
+    """Outcome of a finished ffmpeg subprocess.
+
+    Attributes:
+        returncode: Exit code of the process
+        stdout: Captured standard output
+        stderr: Captured standard error
+        wait_time: Seconds spent waiting for a free slot in the pool
+        wall_time: Seconds the subprocess was running
+    """
+
+    returncode: int
+    stdout: bytes
+    stderr: bytes
+    wait_time: float
+    wall_time: float
+
+
+class FFmpegPool:
+    """Runs ffmpeg subprocesses without blocking the event loop.
+
+    At most `max_workers` processes run at the same time; further jobs wait for a free slot.
+    A job that exceeds its timeout or whose awaiting task is cancelled has its process killed.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: Optional[float] = DEFAULT_FFMPEG_TIMEOUT) -> None:
+        """
+        Args:
+            max_workers (Optional[int]): Maximum number of concurrent processes. Defaults to the core count.
+            timeout (Optional[float]): Default per-job timeout in seconds, None to wait forever.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Semaphores are bound to the loop they first wait on, so keep one per running loop.
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_workers)
+        return semaphore
+
+    async def run(
+        self,
+        args: Sequence[Union[str, os.PathLike]],
+        timeout: Optional[float] = None,
+        stdout: Optional[BinaryIO] = None,
+    ) -> FFmpegResult:
+        """
+        Run a command in the pool and capture its output.
+
+        Args:
+            args (Sequence[Union[str, os.PathLike]]): The full command line, e.g. from `ffmpeg.compile()`.
+            timeout (Optional[float]): Per-job timeout in seconds. Defaults to the pool timeout.
+            stdout (Optional[BinaryIO]): File object receiving standard output as it is produced,
+                instead of collecting it in `FFmpegResult.stdout`.
+
+        Raises:
+            FFmpegProcessError: If the process exits with a non-zero code.
+            FFmpegTimeoutError: If the process does not finish in time.
+
+        Returns:
+            FFmpegResult: The captured output and timings.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        queued = time.perf_counter()
+        started: Optional[float] = None
+        try:
+            async with self._semaphore():
+                started = time.perf_counter()
+                process = await asyncio.create_subprocess_exec(
+                    *(str(arg) for arg in args),
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                captured, stderr = bytearray(), bytearray()
+                try:
+                    await asyncio.wait_for(
+                        asyncio.gather(
+                            process.wait(),
+                            self._drain(process.stdout, stdout.write if stdout is not None else captured.extend),
+                            self._drain(process.stderr, stderr.extend),
+                        ),
+                        timeout,
+                    )
+                except asyncio.TimeoutError:
+                    await self._kill(process)
+                    raise FFmpegTimeoutError(timeout, bytes(stderr)) from None
+                except BaseException:
+                    await self._kill(process)
+                    raise
+        finally:
+            self._trace(args, queued, started)
+
+        result = FFmpegResult(
+            returncode=process.returncode or 0,
+            stdout=bytes(captured),
+            stderr=bytes(stderr),
+            wait_time=started - queued,
+            wall_time=time.perf_counter() - started,
+        )
+        if result.returncode != 0:
+            raise FFmpegProcessError(result.returncode, result.stderr)
+        return result
+
+    @staticmethod
+    def _trace(args: Sequence[Union[str, os.PathLike]], queued: float, started: Optional[float]) -> None:
+        """Record the slot wait and the process run as spans of the traced stage that started it, if any."""
+        span = current_span()
+        if span is None:
+            return
+        tracer, tid = span
+        ended = time.perf_counter()
+        program = Path(str(args[0])).name if args else "ffmpeg"
+        tracer.complete(f"{program} slot wait", "subprocess", queued, started or ended, tid)
+        if started is not None:
+            tracer.complete(program, "subprocess", started, ended, tid, {"wait_ms": (started - queued) * 1e3})
+
+    @staticmethod
+    async def _drain(stream: Optional[asyncio.StreamReader], write: Callable[[bytes], Any]) -> None:
+        if stream is None:
+            return
+        while chunk := await stream.read(64 * 1024):
+            write(chunk)
+
+    @staticmethod
+    async def _kill(process: asyncio.subprocess.Process) -> None:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+
+_default_pool: Optional[FFmpegPool] = None
+
+
+def get_ffmpeg_pool() -> FFmpegPool:
+    """Return the process-wide ffmpeg pool, sized to the core count."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = FFmpegPool()
+    return _default_pool
@@ -0,0 +1,33 @@
+import hashlib
+import mmap
+import os
+from pathlib import Path
+
+# Number of bytes hashed from the start and the end of a file
+SAMPLE_SIZE = 1024 * 1024
+
+
+def fingerprint_file(file_path: Path, sample_size: int = SAMPLE_SIZE) -> str:
+    """
+    Compute a cheap content fingerprint of a file.
+
+    The fingerprint combines the size, the modification time and a hash of the first and last
+    `sample_size` bytes, read through mmap. It does not depend on the file name, so it survives
+    renames.
+
+    Args:
+        file_path (Path): The file to fingerprint.
+        sample_size (int): Number of bytes hashed from each end of the file.
+
+    Returns:
+        str: A hex digest identifying the file content.
+    """
+    with open(file_path, "rb") as file:
+        stat = os.fstat(file.fileno())
+        digest = hashlib.blake2b(f"{stat.st_size}:{stat.st_mtime_ns}".encode(), digest_size=16)
+        if stat.st_size > 0:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped[:sample_size])
+                if stat.st_size > sample_size:
+                    digest.update(mapped[max(sample_size, stat.st_size - sample_size) :])
+    return digest.hexdigest()
@@ -0,0 +1,98 @@
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+# Default name of the processed-files journal kept in watched directories
+JOURNAL_FILE_NAME = ".cliptale-journal.jsonl"
+
+# Signature of a file on disk: (size in bytes, modification time in ns)
+FileSignature = tuple[int, int]
+
+
+def file_signature(file_path: Path) -> FileSignature:
+    """Return the (size, mtime_ns) signature used to detect new or changed files."""
+    stat = file_path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ProcessedJournal:
+    """Append-only journal of files the pipeline has already processed.
+
+    Each line is a JSON record with the path, its signature and the outcome. A file counts as
+    processed while its size and mtime match the journal, so a restarted pipeline only picks up
+    new or changed files. Renamed files are journaled under their new name as well.
+    """
+
+    def __init__(self, journal_path: Path) -> None:
+        self.journal_path = journal_path
+        self._entries: dict[str, FileSignature] = {}
+        self._statuses: dict[str, str] = {}
+        if journal_path.exists():
+            self._load()
+        journal_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(journal_path, "a", encoding="utf-8")  # noqa: SIM115
+
+    def _load(self) -> None:
+        with open(self.journal_path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                    self._entries[record["path"]] = (record["size"], record["mtime_ns"])
+                    self._statuses[record["path"]] = record.get("status", "")
+                except (ValueError, KeyError):
+                    # A torn last line from a crash, ignore it
+                    continue
+
+    def is_processed(self, file_path: Path, signature: Optional[FileSignature] = None) -> bool:
+        """
+        Check whether a file has been processed in its current state.
+
+        Args:
+            file_path (Path): The file to check.
+            signature (Optional[FileSignature]): The current signature, stat'ed if not given.
+        """
+        recorded = self._entries.get(str(file_path))
+        if recorded is None:
+            return False
+        if signature is None:
+            try:
+                signature = file_signature(file_path)
+            except FileNotFoundError:
+                return False
+        return recorded == signature
+
+    def status(self, file_path: Path, signature: Optional[FileSignature] = None) -> Optional[str]:
+        """The recorded outcome of a file, e.g. "ok" or "failed", None if it changed since or was never processed."""
+        if not self.is_processed(file_path, signature):
+            return None
+        return self._statuses.get(str(file_path))
+
+    def record(self, file_path: Path, status: str, signature: Optional[FileSignature] = None) -> None:
+        """
+        Append a record for a processed file.
+
+        Args:
+            file_path (Path): The processed file.
+            status (str): The outcome, e.g. "ok" or "failed".
+            signature (Optional[FileSignature]): The file signature, stat'ed if not given.
+        """
+        if signature is None:
+            signature = file_signature(file_path)
+        self._entries[str(file_path)] = signature
+        self._statuses[str(file_path)] = status
+        record = {
+            "path": str(file_path),
+            "size": signature[0],
+            "mtime_ns": signature[1],
+            "status": status,
+            "time": time.time(),
+        }
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        self._file.close()
@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from src.utils.config import default_cache_path, resolve_cache_path
+from src.utils.tokens import normalize_text
+
+# Default location of the on-disk tier of the response memo
+DEFAULT_MEMO_PATH = default_cache_path("responses.sqlite3")
+
+# Default number of responses kept in the in-memory tier
+DEFAULT_MEMO_ENTRIES = 1024
+
+# Default seconds a response stays valid in the on-disk tier
+DEFAULT_MEMO_TTL = 30 * 24 * 3600.0
+
+
+def response_key(model: str, instructions: str, text: str) -> str:
+    """
+    Key of an agent request, equal for requests whose input differs only in case, punctuation or spacing.
+
+    Args:
+        model (str): Name of the model the agent runs on.
+        instructions (str): The agent's instructions.
+        text (str): The input, e.g. a transcript.
+
+    Returns:
+        str: Hex digest of the model, the instructions and the normalized input.
+    """
+    request = f"{model}\n{instructions}\n{normalize_text(text)}"
+    return hashlib.sha256(request.encode()).hexdigest()
+
+
+class ResponseMemo:
+    """Memoizes agent responses by request key, with single-flight coalescing of identical calls.
+
+    Slates, "rolling, speed" and countdowns produce the same transcript over and over; with a
+    memo each of them reaches the model once. Responses live in an LRU tier in memory of at
+    most `max_entries`, backed by an optional SQLite tier whose entries expire after `ttl`
+    seconds. Concurrent calls with the same key share the one call in flight. Every response
+    is stored with the seconds its call took, which hits count as saved.
+
+    Calls are coalesced per event loop; `lookup` and `store` may be used from any thread.
+    """
+
+    OUTCOMES = ("memory", "disk", "coalesced", "miss")
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = DEFAULT_MEMO_PATH,
+        max_entries: int = DEFAULT_MEMO_ENTRIES,
+        ttl: float = DEFAULT_MEMO_TTL,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Args:
+            db_path (Optional[Path]): Database of the on-disk tier. Responses are only kept in
+                memory when None.
+            max_entries (int): Responses kept in the in-memory tier.
+            ttl (float): Seconds a response stays valid in the on-disk tier.
+            clock (Callable[[], float]): Wall clock the expiry of disk entries is measured with.
+        """
+        if max_entries <= 0 or ttl <= 0:
+            raise ValueError("max_entries and ttl must be positive")  # noqa: TRY003
+        if db_path is not None:
+            db_path = resolve_cache_path(db_path)
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.counts: Counter[str] = Counter()
+        self.saved_seconds = 0.0
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        if db_path is not None:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(db_path, check_same_thread=False)
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    seconds REAL NOT NULL,
+                    created REAL NOT NULL
+                )
+                """
+            )
+            self._connection.execute("DELETE FROM responses WHERE created < ?", (self.clock() - self.ttl,))
+            self._connection.commit()
+
+    def lookup(self, key: str) -> Optional[Any]:
+        """
+        Look up a memoized response, counting a hit of the tier it was found in.
+
+        Args:
+            key (str): The request key, see `response_key`.
+
+        Returns:
+            Optional[Any]: The response, or None if it is not memoized or has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                outcome = "memory"
+            elif self._connection is not None:
+                row = self._connection.execute(
+                    "SELECT value, seconds FROM responses WHERE key = ? AND created >= ?",
+                    (key, self.clock() - self.ttl),
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = (json.loads(row[0]), row[1])
+                self._remember(key, entry)
+                outcome = "disk"
+            else:
+                return None
+            self._count(outcome, entry[1])
+        return entry[0]
+
+    def store(self, key: str, value: Any, seconds: float = 0.0) -> None:
+        """
+        Memoize a JSON-serializable response in both tiers.
+
+        Args:
+            key (str): The request key, see `response_key`.
+            value (Any): The response.
+            seconds (float): Seconds the call producing the response took.
+        """
+        with self._lock:
+            self._remember(key, (value, seconds))
+            if self._connection is not None:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), seconds, self.clock()),
+                )
+                self._connection.commit()
+
+    async def call(self, key: str, function: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the memoized response of a request, calling `function` only if no identical call is in flight.
+
+        Empty responses and errors are not memoized; an error is raised in every coalesced caller.
+
+        Args:
+            key (str): The request key, see `response_key`.
+            function (Callable[[], Awaitable[Any]]): Makes the call, e.g. runs the agent.
+
+        Returns:
+            Any: The response.
+        """
+        value = self.lookup(key)
+        if value is not None:
+            return value
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            await asyncio.wait((in_flight,))
+            if in_flight.cancelled():
+                # The caller making the call was cancelled, so make it again
+                return await self.call(key, function)
+            value, seconds = in_flight.result()
+            with self._lock:
+                self._count("coalesced", seconds)
+            return value
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        with self._lock:
+            self.counts["miss"] += 1
+        started = time.perf_counter()
+        try:
+            value = await function()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when no call was coalesced into this one
+            future.exception()
+            raise
+        else:
+            seconds = time.perf_counter() - started
+            future.set_result((value, seconds))
+            if value:
+                self.store(key, value, seconds)
+        finally:
+            del self._in_flight[key]
+        return value
+
+    def _remember(self, key: str, entry: tuple[Any, float]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _count(self, outcome: str, seconds: float) -> None:
+        self.counts[outcome] += 1
+        self.saved_seconds += seconds
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of requests answered without a call of their own."""
+        total = sum(self.counts.values())
+        return (total - self.counts["miss"]) / total if total else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        """Requests per outcome, hit rate and seconds of calls saved since the memo was created."""
+        return {
+            **{outcome: self.counts[outcome] for outcome in self.OUTCOMES},
+            "hit_rate": self.hit_rate,
+            "saved_seconds": self.saved_seconds,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
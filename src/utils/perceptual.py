@@ -0,0 +1,196 @@
+from collections.abc import Sequence
+from typing import Any, Callable, Optional
+
+import ffmpeg
+import numpy as np
+
+from src.models.errors import FFmpegProcessError
+from src.utils.ffmpeg_pool import FFmpegPool, get_ffmpeg_pool
+
+# Positions of the sampled frames as fractions of the clip, away from fades at the ends
+DEFAULT_FRAME_POSITIONS = (0.1, 0.3, 0.5, 0.7, 0.9)
+
+# Side of the square grayscale thumbnails the frames are scaled to (in pixels)
+FRAME_SIDE = 32
+
+# Bits of one frame hash
+HASH_BITS = 64
+
+# Thumbnails with a smaller standard deviation of pixel values are blank, e.g. black or a slate
+BLANK_FRAME_STD = 2.0
+
+# DCT-II basis of the thumbnails, rows are frequencies
+_DCT = np.cos(np.pi * np.outer(np.arange(FRAME_SIDE), 2 * np.arange(FRAME_SIDE) + 1) / (2 * FRAME_SIDE))
+
+
+def _pack_bits(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(np.uint8)).tobytes(), "big")
+
+
+def phash(frame: np.ndarray) -> int:
+    """
+    Perceptual hash of a grayscale thumbnail: the signs of its lowest 8x8 DCT frequencies around their median.
+
+    Args:
+        frame (np.ndarray): A FRAME_SIDE x FRAME_SIDE grayscale image.
+
+    Returns:
+        int: A 64-bit hash. Re-encoded, rescaled or slightly color-graded copies differ in a few bits.
+    """
+    coefficients = (_DCT @ frame.astype(np.float64) @ _DCT.T)[:8, :8].flatten()
+    # The DC term only reflects the brightness, leave it out of the median
+    return _pack_bits(coefficients > np.median(coefficients[1:]))
+
+
+def dhash(frame: np.ndarray) -> int:
+    """
+    Difference hash of a grayscale thumbnail: whether brightness increases between neighbouring cells of a 9x8 grid.
+
+    Args:
+        frame (np.ndarray): A grayscale image.
+
+    Returns:
+        int: A 64-bit hash.
+    """
+    rows = np.linspace(0, frame.shape[0], 9).astype(int)[:-1]
+    columns = np.linspace(0, frame.shape[1], 10).astype(int)[:-1]
+    cells = np.add.reduceat(np.add.reduceat(frame.astype(np.float64), rows, axis=0), columns, axis=1)
+    sizes = np.outer(np.diff([*rows, frame.shape[0]]), np.diff([*columns, frame.shape[1]]))
+    means = cells / sizes
+    return _pack_bits(means[:, 1:] > means[:, :-1])
+
+
+def hamming_distance(first: int, second: int) -> int:
+    """Number of differing bits of two hashes."""
+    return bin(first ^ second).count("1")
+
+
+def video_hash(frames: np.ndarray, frame_hash: Callable[[np.ndarray], int] = phash) -> Optional[int]:
+    """
+    Concatenate the hashes of a clip's sampled frames into one integer.
+
+    The Hamming distance between two video hashes is the sum of the distances of their frames at
+    the same positions. Blank frames hash to 0, so copies agree on them.
+
+    Args:
+        frames (np.ndarray): Grayscale thumbnails, one per sampled position.
+        frame_hash (Callable[[np.ndarray], int]): The per-frame hash, `phash` or `dhash`.
+
+    Returns:
+        Optional[int]: The video hash, None if every frame is blank and the clip cannot be told apart.
+    """
+    blank = [float(frame.std()) < BLANK_FRAME_STD for frame in frames]
+    if all(blank):
+        return None
+    combined = 0
+    for frame, is_blank in zip(frames, blank):
+        combined = (combined << HASH_BITS) | (0 if is_blank else frame_hash(frame))
+    return combined
+
+
+def frames_command(file_path: Any, times: Sequence[float]) -> list[str]:
+    """
+    Build the ffmpeg command writing one FRAME_SIDE x FRAME_SIDE grayscale frame per time to stdout as raw video.
+
+    Every frame is a separate input with `-ss` before `-i`, so ffmpeg seeks instead of decoding the
+    whole clip, and the scaled frames are joined with the concat filter in a single process.
+    """
+    frames = [
+        ffmpeg
+        .input(str(file_path), ss=f"{time:.3f}")
+        .video.filter("scale", FRAME_SIDE, FRAME_SIDE, flags="area")
+        .filter("setsar", 1)
+        .filter("format", "gray")
+        .trim(end_frame=1)
+        for time in times
+    ]
+    joined = ffmpeg.concat(*frames, v=1, a=0) if len(frames) > 1 else frames[0]
+    return joined.output("pipe:1", format="rawvideo", pix_fmt="gray").compile()
+
+
+async def compute_video_hash(
+    file_path: Any,
+    duration: Optional[float],
+    positions: Sequence[float] = DEFAULT_FRAME_POSITIONS,
+    pool: Optional[FFmpegPool] = None,
+    timeout: Optional[float] = None,
+) -> Optional[int]:
+    """
+    Sample thumbnails of a clip through an ffmpeg rawvideo pipe and hash them with `phash`.
+
+    Args:
+        file_path (Any): The video file.
+        duration (Optional[float]): Duration of the clip in seconds, e.g. from ffprobe.
+        positions (Sequence[float]): Positions of the frames as fractions of the clip.
+        pool (Optional[FFmpegPool]): Pool to run ffmpeg in. Defaults to the process-wide pool.
+        timeout (Optional[float]): Timeout in seconds. Defaults to the pool timeout.
+
+    Returns:
+        Optional[int]: The video hash, None if the duration is unknown, ffmpeg could not decode
+            every frame or all frames are blank.
+    """
+    if not duration or duration <= 0:
+        return None
+    command = frames_command(file_path, [position * duration for position in positions])
+    try:
+        result = await (pool or get_ffmpeg_pool()).run(command, timeout=timeout)
+    except FFmpegProcessError:
+        return None
+    frame_size = FRAME_SIDE * FRAME_SIDE
+    if len(result.stdout) != frame_size * len(positions):
+        return None
+    frames = np.frombuffer(result.stdout, dtype=np.uint8).reshape(len(positions), FRAME_SIDE, FRAME_SIDE)
+    return video_hash(frames)
+
+
+class BKTree:
+    """A Burkhard-Keller tree of integer hashes for Hamming-distance range queries.
+
+    Children are keyed by their distance to the parent, so the triangle inequality prunes every
+    subtree that cannot hold a match and a query with a small radius visits few nodes.
+    """
+
+    def __init__(self) -> None:
+        self._root: Optional[list[Any]] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, key: int, value: Any) -> None:
+        """Store a value under a hash. Values of equal hashes are kept together."""
+        self._size += 1
+        if self._root is None:
+            self._root = [key, [value], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming_distance(key, node[0])
+            if distance == 0:
+                node[1].append(value)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [key, [value], {}]
+                return
+            node = child
+
+    def search(self, key: int, radius: int) -> list[tuple[int, Any]]:
+        """
+        Find the values stored under hashes within `radius` bits of a hash.
+
+        Returns:
+            list[tuple[int, Any]]: (distance, value) pairs, nearest first.
+        """
+        matches: list[tuple[int, Any]] = []
+        pending = [self._root] if self._root is not None else []
+        while pending:
+            node_key, values, children = pending.pop()
+            distance = hamming_distance(key, node_key)
+            if distance <= radius:
+                matches.extend((distance, value) for value in values)
+            pending.extend(
+                child for child_distance, child in children.items() if abs(child_distance - distance) <= radius
+            )
+        matches.sort(key=lambda match: match[0])
+        return matches
@@ -0,0 +1,257 @@
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from src.models.errors import FFmpegProcessError
+from src.utils.config import default_cache_path, resolve_cache_path
+from src.utils.ffmpeg_pool import FFmpegPool, get_ffmpeg_pool
+from src.utils.journal import FileSignature, file_signature
+
+# Default location of the persistent probe index
+DEFAULT_PROBE_INDEX_PATH = default_cache_path("probe.sqlite3")
+
+# ffprobe entries needed to place sampling windows
+DURATION_ENTRIES = "format=duration"
+
+# ffprobe entries stored in the probe index
+MEDIA_ENTRIES = (
+    "format=duration,format_name,size:format_tags=creation_time:stream=codec_type,codec_name,sample_rate,channels"
+)
+
+
+@dataclass
+class MediaInfo:
+    """What ffprobe reports about a media file.
+
+    Attributes:
+        duration: Container duration in seconds, None if unknown
+        format_name: The demuxer ffprobe picked, e.g. "mov,mp4,m4a,3gp,3g2,mj2"
+        size: File size in bytes
+        video_streams: Number of video streams
+        audio_streams: Number of audio streams
+        audio_codec: Codec of the first audio stream
+        sample_rate: Sample rate of the first audio stream in Hz
+        channels: Channel count of the first audio stream
+        creation_time: Creation time from the container tags, as ISO 8601
+        error: Why ffprobe could not read the file, None if it could
+    """
+
+    duration: Optional[float] = None
+    format_name: Optional[str] = None
+    size: Optional[int] = None
+    video_streams: int = 0
+    audio_streams: int = 0
+    audio_codec: Optional[str] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    creation_time: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio_streams > 0
+
+    @property
+    def unusable_reason(self) -> Optional[str]:
+        """Why no decode of the file can succeed, None if it looks usable."""
+        if self.error is not None:
+            return self.error
+        if self.duration is not None and self.duration <= 0:
+            return "zero duration"
+        return None
+
+
+def ffprobe_command(file_path: Path, entries: str = DURATION_ENTRIES) -> list[str]:
+    """The ffprobe command line printing the given entries of a file as JSON."""
+    return ["ffprobe", "-v", "error", "-show_entries", entries, "-of", "json", str(file_path)]
+
+
+def _number(value: Any, kind: type) -> Any:
+    try:
+        return kind(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def parse_duration(output: bytes) -> Optional[float]:
+    """Read the container duration from ffprobe's JSON output, None if it is unknown."""
+    try:
+        duration = json.loads(output or b"{}").get("format", {}).get("duration")
+    except ValueError:
+        return None
+    return _number(duration, float)
+
+
+def parse_media_info(output: bytes) -> MediaInfo:
+    """Build a `MediaInfo` from ffprobe's JSON output of `MEDIA_ENTRIES`."""
+    try:
+        probed = json.loads(output or b"{}")
+    except ValueError:
+        return MediaInfo(error="unreadable ffprobe output")
+    container = probed.get("format", {})
+    streams = probed.get("streams", [])
+    audio = [stream for stream in streams if stream.get("codec_type") == "audio"]
+    first_audio = audio[0] if audio else {}
+    return MediaInfo(
+        duration=_number(container.get("duration"), float),
+        format_name=container.get("format_name"),
+        size=_number(container.get("size"), int),
+        video_streams=sum(1 for stream in streams if stream.get("codec_type") == "video"),
+        audio_streams=len(audio),
+        audio_codec=first_audio.get("codec_name"),
+        sample_rate=_number(first_audio.get("sample_rate"), int),
+        channels=_number(first_audio.get("channels"), int),
+        creation_time=container.get("tags", {}).get("creation_time"),
+    )
+
+
+async def probe_duration(
+    file_path: Path, pool: Optional[FFmpegPool] = None, timeout: Optional[float] = None
+) -> Optional[float]:
+    """
+    Probe the duration of a media file with ffprobe, in the ffmpeg pool.
+
+    Args:
+        file_path (Path): The media file.
+        pool (Optional[FFmpegPool]): Pool to run ffprobe in. Defaults to the process-wide pool.
+        timeout (Optional[float]): Timeout in seconds. Defaults to the pool timeout.
+
+    Returns:
+        Optional[float]: The duration in seconds, None if ffprobe cannot tell.
+    """
+    try:
+        result = await (pool or get_ffmpeg_pool()).run(ffprobe_command(file_path), timeout=timeout)
+    except FFmpegProcessError:
+        return None
+    return parse_duration(result.stdout)
+
+
+async def probe_media(file_path: Path, pool: Optional[FFmpegPool] = None, timeout: Optional[float] = None) -> MediaInfo:
+    """
+    Probe the duration, stream layout and audio format of a media file with ffprobe, in the ffmpeg pool.
+
+    Args:
+        file_path (Path): The media file.
+        pool (Optional[FFmpegPool]): Pool to run ffprobe in. Defaults to the process-wide pool.
+        timeout (Optional[float]): Timeout in seconds. Defaults to the pool timeout.
+
+    Raises:
+        FFmpegTimeoutError: If ffprobe does not finish in time.
+
+    Returns:
+        MediaInfo: The probed metadata. Files ffprobe cannot read, e.g. corrupt or empty ones,
+            get a `MediaInfo` with `error` set.
+    """
+    try:
+        result = await (pool or get_ffmpeg_pool()).run(ffprobe_command(file_path, MEDIA_ENTRIES), timeout=timeout)
+    except FFmpegProcessError as e:
+        return MediaInfo(error=e.stderr.decode(errors="replace").strip() or e.message)
+    return parse_media_info(result.stdout)
+
+
+class ProbeIndex:
+    """Persistent SQLite index of ffprobe results, keyed by file path.
+
+    An entry is valid while the file's size and mtime match the ones it was probed at, so
+    repeated runs over the same directory only probe new or changed files. Files ffprobe could
+    not read are indexed too, so they are not probed again either.
+    """
+
+    def __init__(self, db_path: Path = DEFAULT_PROBE_INDEX_PATH) -> None:
+        db_path = resolve_cache_path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS media (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                info TEXT NOT NULL,
+                probed REAL NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    def get(self, file_path: Path, signature: Optional[FileSignature] = None) -> Optional[MediaInfo]:
+        """
+        Look up the indexed metadata of a file.
+
+        Args:
+            file_path (Path): The media file.
+            signature (Optional[FileSignature]): The current signature, stat'ed if not given.
+
+        Returns:
+            Optional[MediaInfo]: The metadata, or None if the file is not indexed or has changed.
+        """
+        if signature is None:
+            signature = file_signature(file_path)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT info FROM media WHERE path = ? AND size = ? AND mtime_ns = ?", (str(file_path), *signature)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return MediaInfo(**json.loads(row[0]))
+
+    def put(self, file_path: Path, info: MediaInfo, signature: Optional[FileSignature] = None) -> None:
+        """
+        Store the metadata of a file, replacing what was indexed for it before.
+
+        Args:
+            file_path (Path): The media file.
+            info (MediaInfo): The probed metadata.
+            signature (Optional[FileSignature]): The signature the file was probed at, stat'ed if not given.
+        """
+        if signature is None:
+            signature = file_signature(file_path)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?)",
+                (str(file_path), *signature, json.dumps(asdict(info)), time.time()),
+            )
+            self._connection.commit()
+
+    def rename(self, old_path: Path, new_path: Path) -> None:
+        """Move the entry of a renamed file to its new path. Renaming keeps the size and mtime."""
+        if old_path == new_path:
+            return
+        with self._lock:
+            self._connection.execute("DELETE FROM media WHERE path = ?", (str(new_path),))
+            self._connection.execute("UPDATE media SET path = ? WHERE path = ?", (str(new_path), str(old_path)))
+            self._connection.commit()
+
+    async def probe(
+        self, file_path: Path, pool: Optional[FFmpegPool] = None, timeout: Optional[float] = None
+    ) -> MediaInfo:
+        """Return the indexed metadata of a file, probing and indexing it first if needed."""
+        signature = file_signature(file_path)
+        info = self.get(file_path, signature)
+        if info is None:
+            info = await probe_media(file_path, pool, timeout)
+            self.put(file_path, info, signature)
+        return info
+
+    def stats(self) -> dict[str, int]:
+        """Hit and miss counters since the index was opened."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute("SELECT COUNT(*) FROM media").fetchone()
+        return int(count)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -1,5 +1,11 @@
+import asyncio
+import math
 import os
-from typing import Optional
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
 
 from openai import AsyncOpenAI
 
@@ -7,10 +13,46 @@ from agents import (
     Model,
     ModelProvider,
     OpenAIChatCompletionsModel,
+    RunConfig,
     set_default_openai_api,
     set_default_openai_client,
     set_tracing_disabled,
 )
+from src.agents.transcriber import TRANSIENT_ERRORS, backoff_delay
+from src.utils.concurrency import AdaptiveLimiter, get_limiter
+from src.utils.config import ensure_env
+from src.utils.loggers import LoggerFactory
+
+# Weight of the newest sample in the latency and error-rate moving averages
+DEFAULT_EWMA_ALPHA = 0.2
+
+# Latencies kept per endpoint to estimate the hedging delay from
+LATENCY_WINDOW = 64
+
+# Quantile of an endpoint's recent latencies after which a hedged request is sent elsewhere
+DEFAULT_HEDGE_QUANTILE = 0.95
+
+# Requests an endpoint must have answered before its latency quantile is trusted for hedging
+MIN_HEDGE_SAMPLES = 8
+
+# An endpoint is drained after this many consecutive failures, or once its error rate reaches
+# DRAIN_ERROR_RATE over at least MIN_DRAIN_REQUESTS requests
+DRAIN_CONSECUTIVE_FAILURES = 3
+DRAIN_ERROR_RATE = 0.5
+MIN_DRAIN_REQUESTS = 5
+
+# Seconds a drained endpoint receives no traffic before it is tried again
+DEFAULT_DRAIN_SECONDS = 30.0
+
+# Endpoints asked per request: the best one, plus one for a hedge or a failover
+DEFAULT_MAX_ATTEMPTS = 2
+
+# Endpoint agent calls go to when no LLM_BASE_URL is set
+DEFAULT_OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+# Default number of retries of an agent call that failed with a transient error. The clients
+# themselves never retry, so every rate limit reaches the adaptive limiter, see `run_agent`
+DEFAULT_AGENT_RETRIES = 3
 
 
 def set_global_provider() -> None:
@@ -33,6 +75,7 @@ def set_global_provider() -> None:
         >>> set_global_provider()
         # Sets up OpenAI client globally using environment variables
     """
+    ensure_env()
     BASE_URL = os.getenv("LLM_BASE_URL")
     API_KEY = os.getenv("LLM_API_KEY")
 
@@ -42,6 +85,7 @@ def set_global_provider() -> None:
     client = AsyncOpenAI(
         base_url=BASE_URL,
         api_key=API_KEY,
+        max_retries=0,
     )
     set_default_openai_client(client=client, use_for_tracing=False)
     set_default_openai_api("chat_completions")
@@ -50,6 +94,7 @@ def set_global_provider() -> None:
 
 class CustomModelProvider(ModelProvider):
     def __init__(self, BASE_URL: Optional[str] = None, API_KEY: Optional[str] = None) -> None:
+        ensure_env()
         self.BASE_URL = os.getenv("LLM_BASE_URL")
         self.API_KEY = os.getenv("LLM_API_KEY")
         self.MODEL_NAME = os.getenv("LLM_MODEL_NAME")
@@ -60,6 +105,7 @@ class CustomModelProvider(ModelProvider):
         self.client = AsyncOpenAI(
             base_url=self.BASE_URL,
             api_key=self.API_KEY,
+            max_retries=0,
         )
 
     def get_model(self, model_name: Optional[str] = None) -> Model:
@@ -81,6 +127,381 @@ class CustomModelProvider(ModelProvider):
         return OpenAIChatCompletionsModel(model=model_name, openai_client=self.client)  # type: ignore # noqa: PGH003
 
 
+@dataclass
+class Endpoint:
+    """An OpenAI-compatible inference server.
+
+    Attributes:
+        base_url: Base URL of the API, e.g. http://gpu-1:8000/v1
+        api_key: API key for the server
+        name: Name used in logs, defaults to the base URL
+    """
+
+    base_url: str
+    api_key: str = "none"
+    name: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        self.name = self.name or self.base_url
+
+
+@dataclass
+class EndpointStats:
+    """Moving averages of an endpoint's latency and error rate.
+
+    Attributes:
+        latency: EWMA of the seconds successful requests took, None before the first one
+        error_rate: EWMA of the fraction of failed requests
+        requests: Number of finished requests
+        in_flight: Number of requests currently running
+        failures: Number of consecutive failed requests
+        drained_until: Clock time until which the endpoint receives no traffic
+        recent: Latencies of the latest successful requests
+    """
+
+    latency: Optional[float] = None
+    error_rate: float = 0.0
+    requests: int = 0
+    in_flight: int = 0
+    failures: int = 0
+    drained_until: float = 0.0
+    recent: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+
+class EndpointRouter:
+    """Ranks endpoints by their expected latency and drains the unhealthy ones.
+
+    The expected latency of an endpoint is its latency EWMA, scaled by the requests already
+    queued on it and inflated by its error rate. Endpoints without any answered request rank
+    first, so every endpoint is measured. An endpoint that keeps failing is drained: it gets no
+    traffic for `drain_seconds`, after which it is tried again with a clean error rate.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[Endpoint],
+        alpha: float = DEFAULT_EWMA_ALPHA,
+        drain_seconds: float = DEFAULT_DRAIN_SECONDS,
+        hedge_quantile: float = DEFAULT_HEDGE_QUANTILE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")  # noqa: TRY003
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError("alpha must be in (0, 1]")  # noqa: TRY003
+        self.endpoints = list(endpoints)
+        self.stats = [EndpointStats() for _ in self.endpoints]
+        self.alpha = alpha
+        self.drain_seconds = drain_seconds
+        self.hedge_quantile = hedge_quantile
+        self.clock = clock
+        self.logger = LoggerFactory.get_logger()
+
+    def healthy(self, index: int) -> bool:
+        return self.clock() >= self.stats[index].drained_until
+
+    def score(self, index: int) -> float:
+        """Expected seconds a request sent to the endpoint now would take, lower is better."""
+        stats = self.stats[index]
+        if stats.latency is None:
+            return 0.0 if stats.in_flight == 0 else math.inf
+        return stats.latency * (1 + stats.in_flight) / max(1.0 - stats.error_rate, 0.05)
+
+    def ranked(self) -> list[int]:
+        """Indices of the healthy endpoints, best first, or of all endpoints by drain expiry if none is healthy."""
+        healthy = [index for index in range(len(self.endpoints)) if self.healthy(index)]
+        if not healthy:
+            return sorted(range(len(self.endpoints)), key=lambda index: self.stats[index].drained_until)
+        return sorted(healthy, key=self.score)
+
+    def hedge_delay(self, index: int) -> Optional[float]:
+        """Seconds after which a request to the endpoint is hedged, None until enough latencies are known."""
+        recent = sorted(self.stats[index].recent)
+        if len(recent) < MIN_HEDGE_SAMPLES:
+            return None
+        return recent[min(len(recent) - 1, int(self.hedge_quantile * len(recent)))]
+
+    def start(self, index: int) -> float:
+        self.stats[index].in_flight += 1
+        return self.clock()
+
+    def finish(self, index: int, started: float, error: Optional[BaseException] = None) -> None:
+        """Record a finished request, draining the endpoint if it keeps failing."""
+        stats = self.stats[index]
+        stats.in_flight -= 1
+        stats.requests += 1
+        stats.error_rate += self.alpha * ((error is not None) - stats.error_rate)
+        if error is None:
+            elapsed = self.clock() - started
+            stats.latency = elapsed if stats.latency is None else stats.latency + self.alpha * (elapsed - stats.latency)
+            stats.recent.append(elapsed)
+            stats.failures = 0
+            return
+        stats.failures += 1
+        if stats.failures >= DRAIN_CONSECUTIVE_FAILURES or (
+            stats.requests >= MIN_DRAIN_REQUESTS and stats.error_rate >= DRAIN_ERROR_RATE
+        ):
+            self.logger.warning(
+                f"Draining LLM endpoint {self.endpoints[index].name} for {self.drain_seconds:g}s "
+                f"after {stats.failures} failures: {error}"
+            )
+            stats.drained_until = self.clock() + self.drain_seconds
+            stats.failures = 0
+            stats.error_rate = 0.0
+
+    def abandon(self, index: int) -> None:
+        """Forget a request that was cancelled, e.g. the slower half of a hedged pair."""
+        self.stats[index].in_flight -= 1
+
+
+class RoutedModel(Model):
+    """A model served by several endpoints, called on the best one with an optional hedge.
+
+    A request goes to the best endpoint first. If it is still running after that endpoint's
+    p95 latency, the same request is also sent to the next best endpoint and the first answer
+    wins; if it fails, the request fails over to the next endpoint instead. A hedge is an extra
+    request in flight, so it waits for a slot of `limiter`, if one is given, like any other call.
+    """
+
+    def __init__(
+        self,
+        models: Sequence[Model],
+        router: EndpointRouter,
+        hedge: bool = True,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        limiter: Optional[AdaptiveLimiter] = None,
+    ) -> None:
+        self.models = list(models)
+        self.router = router
+        self.hedge = hedge
+        self.max_attempts = max_attempts
+        self.limiter = limiter
+        self.hedged = 0
+
+    async def get_response(self, *args: Any, **kwargs: Any) -> Any:
+        candidates = self.router.ranked()[: self.max_attempts]
+        pending: set[asyncio.Future] = set()
+        error: Optional[BaseException] = None
+        try:
+            for attempt, index in enumerate(candidates):
+                hedging = attempt > 0 and bool(pending)
+                if hedging:
+                    self.hedged += 1
+                call = self._hedge(index, args, kwargs) if hedging else self._call(index, args, kwargs)
+                pending.add(asyncio.ensure_future(call))
+                last = attempt == len(candidates) - 1
+                delay = None if last or not self.hedge else self.router.hedge_delay(index)
+                while pending:
+                    done, pending = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        # Slower than usual: ask the next endpoint as well
+                        break
+                    for task in done:
+                        if task.exception() is None:
+                            return task.result()
+                        error = task.exception()
+                    if not last:
+                        # Fail over to the next endpoint
+                        break
+        finally:
+            for task in pending:
+                task.cancel()
+        raise error  # type: ignore[misc]
+
+    async def _hedge(self, index: int, args: tuple, kwargs: dict) -> Any:
+        if self.limiter is None:
+            return await self._call(index, args, kwargs)
+        async with self.limiter.slot():
+            return await self._call(index, args, kwargs)
+
+    async def _call(self, index: int, args: tuple, kwargs: dict) -> Any:
+        started = self.router.start(index)
+        try:
+            response = await self.models[index].get_response(*args, **kwargs)
+        except asyncio.CancelledError:
+            self.router.abandon(index)
+            raise
+        except Exception as e:
+            self.router.finish(index, started, e)
+            raise
+        self.router.finish(index, started)
+        return response
+
+    async def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        """Stream from the best endpoint; streams are not hedged."""
+        index = self.router.ranked()[0]
+        started = self.router.start(index)
+        try:
+            async for event in self.models[index].stream_response(*args, **kwargs):
+                yield event
+        except (asyncio.CancelledError, GeneratorExit):
+            self.router.abandon(index)
+            raise
+        except Exception as e:
+            self.router.finish(index, started, e)
+            raise
+        self.router.finish(index, started)
+
+
+class RoutingModelProvider(ModelProvider):
+    """Model provider that spreads agent calls over several OpenAI-compatible endpoints.
+
+    One provider, and so one set of latency statistics, is meant to be shared by every agent
+    call of a process; see `get_run_config`.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[Endpoint],
+        model_name: Optional[str] = None,
+        hedge: bool = True,
+        drain_seconds: float = DEFAULT_DRAIN_SECONDS,
+    ) -> None:
+        """
+        Args:
+            endpoints (Sequence[Endpoint]): The servers, all serving the same models.
+            model_name (Optional[str]): Model used for agents that do not name one.
+            hedge (bool): Send slow requests to a second endpoint as well.
+            drain_seconds (float): Seconds an unhealthy endpoint receives no traffic.
+        """
+        self.router = EndpointRouter(endpoints, drain_seconds=drain_seconds)
+        self.model_name = model_name
+        self.hedge = hedge
+        # The limiter and `run_agent` retry, so that every rate limit reaches the limiter
+        self.clients = [
+            AsyncOpenAI(base_url=endpoint.base_url, api_key=endpoint.api_key, max_retries=0) for endpoint in endpoints
+        ]
+        self._models: dict[Optional[str], RoutedModel] = {}
+
+    @classmethod
+    def from_env(cls) -> "RoutingModelProvider":
+        """
+        Create a provider from LLM_BASE_URLS (comma-separated, or LLM_BASE_URL), LLM_API_KEY and LLM_MODEL_NAME.
+        """
+        ensure_env()
+        base_urls = os.getenv("LLM_BASE_URLS") or os.getenv("LLM_BASE_URL") or ""
+        api_key = os.getenv("LLM_API_KEY") or "none"
+        endpoints = [Endpoint(base_url.strip(), api_key) for base_url in base_urls.split(",") if base_url.strip()]
+        if not endpoints:
+            raise ValueError("Please set LLM_BASE_URLS or LLM_BASE_URL via env var.")  # noqa: TRY003
+        return cls(endpoints, os.getenv("LLM_MODEL_NAME"))
+
+    def get_model(self, model_name: Optional[str] = None) -> Model:
+        model_name = model_name or self.model_name
+        if model_name not in self._models:
+            models = [
+                OpenAIChatCompletionsModel(model=model_name, openai_client=client)  # type: ignore[arg-type]
+                for client in self.clients
+            ]
+            limiter = get_limiter(self.limiter_endpoint, str(model_name or "default"))
+            self._models[model_name] = RoutedModel(models, self.router, hedge=self.hedge, limiter=limiter)
+        return self._models[model_name]
+
+    @property
+    def limiter_endpoint(self) -> str:
+        """Name of the limiter endpoint shared by all endpoints, since they draw on one quota."""
+        return ",".join(endpoint.base_url for endpoint in self.router.endpoints)
+
+
+_routing_provider: Optional[RoutingModelProvider] = None
+
+
+def set_routing_provider(provider: Optional[RoutingModelProvider]) -> None:
+    """Route the agent calls of ClipLabeler and BatchLabeler through a provider, or stop routing with None."""
+    global _routing_provider
+    _routing_provider = provider
+
+
+def get_run_config() -> Optional[RunConfig]:
+    """
+    The run config for agent calls: routed through the shared provider if one is set, or if
+    LLM_BASE_URLS lists endpoints, in which case the provider is created on first use.
+
+    Returns:
+        Optional[RunConfig]: None to use the SDK's default client.
+    """
+    provider = _get_routing_provider()
+    if provider is None:
+        _disable_default_client_retries()
+        return None
+    return RunConfig(model_provider=provider)
+
+
+def _get_routing_provider() -> Optional[RoutingModelProvider]:
+    global _routing_provider
+    ensure_env()
+    if _routing_provider is None and os.getenv("LLM_BASE_URLS"):
+        _routing_provider = RoutingModelProvider.from_env()
+    return _routing_provider
+
+
+def _disable_default_client_retries() -> None:
+    """Make the SDK's default client, which reads OPENAI_API_KEY, leave the retries to `run_agent`."""
+    from agents.models._openai_shared import get_default_openai_client, get_default_openai_key
+
+    client = get_default_openai_client()
+    if client is None:
+        api_key = get_default_openai_key() or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            # Without credentials the SDK fails on its own, when the agent runs
+            return
+        client = AsyncOpenAI(api_key=api_key, max_retries=0)
+    elif client.max_retries != 0:
+        client = client.with_options(max_retries=0)
+    else:
+        return
+    set_default_openai_client(client, use_for_tracing=False)
+
+
+def get_agent_limiter(agent: Any) -> AdaptiveLimiter:
+    """
+    The adaptive concurrency limiter of the endpoint and model an agent's calls go to.
+
+    Routed calls share one limiter for all of LLM_BASE_URLS, since they draw on one quota.
+    """
+    provider = _get_routing_provider()
+    if provider is not None:
+        endpoint, default_model = provider.limiter_endpoint, provider.model_name
+    else:
+        endpoint = os.getenv("LLM_BASE_URL") or DEFAULT_OPENAI_BASE_URL
+        default_model = os.getenv("LLM_MODEL_NAME")
+    model = getattr(agent, "model", None)
+    if model is not None and not isinstance(model, str):
+        model = getattr(model, "model", None)
+    return get_limiter(endpoint, str(model or default_model or "default"))
+
+
+async def run_agent(agent: Any, agent_input: str, max_retries: int = DEFAULT_AGENT_RETRIES) -> Any:
+    """
+    Run an agent in a slot of its endpoint's adaptive limiter, see `get_agent_limiter`.
+
+    The API clients do not retry, so the limiter sees every rate limit and 5xx response and backs
+    off, and a `Retry-After` holds back the retry as well as every other call. Transient errors
+    are retried here, with exponential backoff and full jitter.
+
+    Args:
+        agent (Any): The agent to run.
+        agent_input (str): The input of the run.
+        max_retries (int): Number of retries of a run that failed with a transient error.
+
+    Returns:
+        Any: The `RunResult` of the run.
+    """
+    from agents import Runner
+
+    limiter = get_agent_limiter(agent)
+    attempt = 0
+    while True:
+        try:
+            async with limiter.slot():
+                return await Runner.run(starting_agent=agent, input=agent_input, run_config=get_run_config())
+        except TRANSIENT_ERRORS:
+            if attempt >= max_retries:
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+
+
 async def main() -> None:
     from agents import Agent, Runner
 
@@ -105,6 +526,7 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
-    import asyncio
+    from src.utils.config import load_env
 
+    load_env()
     asyncio.run(main())
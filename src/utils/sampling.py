@@ -0,0 +1,74 @@
+from collections.abc import Sequence
+from typing import Optional
+
+# A sampled stretch of a clip as (start, duration), in seconds
+SamplingWindow = tuple[float, float]
+
+# Window positions as fractions of the clip, from 0.0 (at the start) to 1.0 (ending at the end)
+START_ONLY = (0.0,)
+
+SAMPLING_PRESETS: dict[str, tuple[float, ...]] = {
+    "start": START_ONLY,
+    "start-end": (0.0, 1.0),
+    "start-middle-end": (0.0, 0.5, 1.0),
+}
+
+
+def evenly_spaced(count: int) -> tuple[float, ...]:
+    """Positions of `count` windows spread evenly over a clip, the first at the start and the last at the end."""
+    if count <= 0:
+        raise ValueError("count must be positive")  # noqa: TRY003
+    if count == 1:
+        return START_ONLY
+    return tuple(index / (count - 1) for index in range(count))
+
+
+def parse_sampling(spec: str) -> tuple[float, ...]:
+    """
+    Parse a sampling spec: a preset name, a number of evenly spaced windows, or comma-separated positions.
+
+    Examples: "start-middle-end", "5", "0,0.25,1".
+    """
+    if spec in SAMPLING_PRESETS:
+        return SAMPLING_PRESETS[spec]
+    try:
+        if spec.isdigit():
+            return evenly_spaced(int(spec))
+        positions = tuple(float(position) for position in spec.split(","))
+    except ValueError as e:
+        raise ValueError(f"Invalid sampling spec: {spec!r}") from e  # noqa: TRY003
+    if any(not 0.0 <= position <= 1.0 for position in positions):
+        raise ValueError(f"Invalid sampling spec: {spec!r}")  # noqa: TRY003
+    return positions
+
+
+def plan_windows(
+    positions: Sequence[float], total_duration: float, clip_duration: Optional[float] = None
+) -> list[SamplingWindow]:
+    """
+    Place sampling windows in a clip.
+
+    The `total_duration` is split evenly between the windows, so sampling more windows does not
+    make the extracted audio longer. Windows that overlap are merged. Clips no longer than
+    `total_duration`, or of unknown duration, are sampled from the start.
+
+    Args:
+        positions (Sequence[float]): Window positions as fractions of the clip, between 0 and 1.
+        total_duration (float): Combined length of all windows in seconds.
+        clip_duration (Optional[float]): Duration of the clip in seconds, if known.
+
+    Returns:
+        list[SamplingWindow]: The windows as (start, duration), sorted by start.
+    """
+    if clip_duration is None or clip_duration <= total_duration or tuple(positions) == START_ONLY:
+        return [(0.0, float(total_duration))]
+    length = total_duration / len(positions)
+    starts = sorted({round(min(max(position, 0.0), 1.0) * (clip_duration - length), 3) for position in positions})
+    windows: list[SamplingWindow] = []
+    for start in starts:
+        if windows and start <= windows[-1][0] + windows[-1][1]:
+            previous_start = windows[-1][0]
+            windows[-1] = (previous_start, start + length - previous_start)
+        else:
+            windows.append((start, length))
+    return windows
@@ -0,0 +1,106 @@
+import os
+from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import TypeVar
+
+from src.utils.config import VIDEO_EXTENSIONS
+
+T = TypeVar("T")
+
+# Number of items pulled from a blocking iterator per worker-thread hop
+DEFAULT_BATCH_SIZE = 64
+
+
+def _matches(relative_path: str, patterns: Sequence[str]) -> bool:
+    return any(fnmatch(relative_path, pattern) for pattern in patterns)
+
+
+def _is_wanted(relative_path: str, extensions: tuple[str, ...], include: Sequence[str], exclude: Sequence[str]) -> bool:
+    if not relative_path.lower().endswith(extensions):
+        return False
+    if include and not _matches(relative_path, include):
+        return False
+    return not _matches(relative_path, exclude)
+
+
+def scan_videos(
+    root: Path,
+    recursive: bool = True,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+    extensions: Sequence[str] = VIDEO_EXTENSIONS,
+    skip_hidden: bool = True,
+) -> Iterator[Path]:
+    """
+    Lazily yield the video files below a directory.
+
+    Built on `os.scandir`, so file types come from the cached `DirEntry` data and no extra stat
+    call is made per entry. Nothing is materialized beyond the directory being read, so the first
+    file is available long before a large library has been walked.
+
+    Args:
+        root (Path): The directory to scan.
+        recursive (bool): Whether to descend into subdirectories.
+        include (Sequence[str]): Glob patterns matched against the path relative to root. When
+            given, only matching files are yielded.
+        exclude (Sequence[str]): Glob patterns matched against the path relative to root. Matching
+            files are skipped and matching directories are not descended into.
+        extensions (Sequence[str]): File extensions to keep, compared case-insensitively.
+        skip_hidden (bool): Whether to skip files and directories whose name starts with a dot.
+
+    Yields:
+        Path: The matching video files.
+    """
+    extensions = tuple(extension.lower() for extension in extensions)
+    root_prefix = len(os.path.join(str(root), ""))
+    pending = [str(root)]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = os.scandir(directory)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+        with entries:
+            for entry in entries:
+                if skip_hidden and entry.name.startswith("."):
+                    continue
+                relative_path = entry.path[root_prefix:].replace(os.sep, "/")
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and not _matches(relative_path, exclude):
+                            pending.append(entry.path)
+                        continue
+                    is_file = entry.is_file()
+                except OSError:
+                    continue
+                if is_file and _is_wanted(relative_path, extensions, include, exclude):
+                    yield Path(entry.path)
+
+
+async def iterate_in_thread(iterable: Iterable[T], batch_size: int = DEFAULT_BATCH_SIZE) -> AsyncIterator[T]:
+    """
+    Consume a blocking iterator from a worker thread without stalling the event loop.
+
+    Items are pulled in small batches, so consumers start receiving them right away.
+
+    Args:
+        iterable (Iterable[T]): The blocking iterable, e.g. from `scan_videos`.
+        batch_size (int): Number of items pulled per thread hop.
+    """
+    # Imported here so that scanning from the command line does not load asyncio
+    import asyncio
+
+    iterator = iter(iterable)
+
+    def next_batch() -> list[T]:
+        batch = []
+        for item in iterator:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                break
+        return batch
+
+    while batch := await asyncio.to_thread(next_batch):
+        for item in batch:
+            yield item
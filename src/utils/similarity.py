@@ -0,0 +1,188 @@
+import hashlib
+from collections import defaultdict
+from collections.abc import Sequence
+from typing import Optional
+
+import numpy as np
+
+from src.utils.tokens import normalize_text
+
+# Length of the character n-grams transcripts are compared by
+DEFAULT_NGRAM = 3
+
+# Dimension of the hashed n-gram vectors
+DEFAULT_VECTOR_DIM = 4096
+
+# Rows per block of the index matrix, which grows a block at a time instead of being copied
+BLOCK_ROWS = 1024
+
+# LSH bands and MinHash rows per band; 16 x 4 finds pairs with a Jaccard similarity above about 0.5
+DEFAULT_BANDS = 16
+DEFAULT_ROWS = 4
+
+# Modulus and seeded coefficients of the MinHash permutations, fixed so signatures can be persisted
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_PERMUTATIONS = np.random.default_rng(0x5EED).integers(1, 1 << 61, size=(2, 256), dtype=np.uint64)
+
+
+def shingle_hashes(text: str, ngram: int = DEFAULT_NGRAM) -> np.ndarray:
+    """
+    Hash every character n-gram of a normalized text with a rolling polynomial hash.
+
+    Args:
+        text (str): The text, normalized with `normalize_text` first.
+        ngram (int): The n-gram length.
+
+    Returns:
+        np.ndarray: One uint64 hash per n-gram position, empty for texts shorter than `ngram`.
+    """
+    codes = np.frombuffer(normalize_text(text).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < ngram:
+        return np.zeros(0, dtype=np.uint64)
+    hashes = np.zeros(len(codes) - ngram + 1, dtype=np.uint64)
+    for offset in range(ngram):
+        hashes = hashes * np.uint64(1_000_003) + codes[offset : len(codes) - ngram + 1 + offset]
+    # Mix the bits, so the low bits used for vector buckets depend on every character
+    hashes ^= hashes >> np.uint64(29)
+    hashes *= np.uint64(0xBF58476D1CE4E5B9)
+    hashes ^= hashes >> np.uint64(32)
+    return hashes
+
+
+def ngram_vectors(texts: Sequence[str], dim: int = DEFAULT_VECTOR_DIM, ngram: int = DEFAULT_NGRAM) -> np.ndarray:
+    """
+    Embed texts as L2-normalized hashed character n-gram count vectors.
+
+    The dot product of two rows is the cosine similarity of the texts' n-gram profiles, so a
+    matrix product compares a query against a whole library at once.
+
+    Args:
+        texts (Sequence[str]): The texts to embed.
+        dim (int): Number of hash buckets.
+        ngram (int): The n-gram length.
+
+    Returns:
+        np.ndarray: A float32 matrix with one row per text. Texts without n-grams get a zero row.
+    """
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        hashes = shingle_hashes(text, ngram)
+        if len(hashes):
+            vectors[row] = np.bincount((hashes % np.uint64(dim)).astype(np.intp), minlength=dim)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+
+def minhash_signature(
+    text: str, num_perm: int = DEFAULT_BANDS * DEFAULT_ROWS, ngram: int = DEFAULT_NGRAM
+) -> np.ndarray:
+    """
+    MinHash signature of the set of character n-grams of a text.
+
+    The fraction of positions two signatures agree on estimates the Jaccard similarity of the
+    texts' n-gram sets. Texts without n-grams get an all-ones signature that matches nothing.
+    """
+    if num_perm > _PERMUTATIONS.shape[1]:
+        raise ValueError(f"At most {_PERMUTATIONS.shape[1]} permutations are supported")  # noqa: TRY003
+    shingles = np.unique(shingle_hashes(text, ngram) % _MERSENNE_PRIME)
+    if not len(shingles):
+        return np.full(num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+    multipliers, increments = _PERMUTATIONS[:, :num_perm, None]
+    with np.errstate(over="ignore"):
+        permuted = (multipliers * shingles[None, :] + increments) % _MERSENNE_PRIME
+    return (permuted.min(axis=1) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def lsh_band_keys(signature: np.ndarray, bands: int = DEFAULT_BANDS) -> list[int]:
+    """
+    Hash each band of a MinHash signature to a signed 64-bit key.
+
+    Texts that share a key for any band are candidate near-duplicates. Keys are stable across
+    processes, so they can be stored in a database index.
+    """
+    if len(signature) % bands:
+        raise ValueError(f"Signature length {len(signature)} is not a multiple of {bands} bands")  # noqa: TRY003
+    keys = []
+    for band, rows in enumerate(signature.reshape(bands, -1)):
+        digest = hashlib.blake2b(rows.tobytes(), digest_size=8, person=band.to_bytes(16, "little")).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+class TranscriptIndex:
+    """An in-memory near-duplicate index over transcripts.
+
+    Transcripts are stored as rows of NumPy blocks of hashed n-gram vectors. Queries collect
+    candidates from MinHash LSH buckets, so their cost grows with the number of similar
+    transcripts rather than the library size, and score them with one batched cosine product.
+    """
+
+    def __init__(
+        self,
+        dim: int = DEFAULT_VECTOR_DIM,
+        ngram: int = DEFAULT_NGRAM,
+        bands: int = DEFAULT_BANDS,
+        rows: int = DEFAULT_ROWS,
+    ) -> None:
+        self.dim = dim
+        self.ngram = ngram
+        self.bands = bands
+        self.rows = rows
+        self._blocks: list[np.ndarray] = []
+        self._active = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._buckets: defaultdict[int, list[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return int(self._active[: self._size].sum())
+
+    def add(self, text: str) -> int:
+        """Index a transcript and return its row id."""
+        if self._size == len(self._blocks) * BLOCK_ROWS:
+            self._blocks.append(np.zeros((BLOCK_ROWS, self.dim), dtype=np.float32))
+            self._active = np.concatenate([self._active, np.zeros(BLOCK_ROWS, dtype=bool)])
+        row = self._size
+        self._blocks[row // BLOCK_ROWS][row % BLOCK_ROWS] = ngram_vectors([text], self.dim, self.ngram)[0]
+        self._active[row] = True
+        self._size += 1
+        for key in self._band_keys(text):
+            self._buckets[key].append(row)
+        return row
+
+    def remove(self, row: int) -> None:
+        """Exclude a row from future queries."""
+        self._active[row] = False
+
+    def search(
+        self, text: str, threshold: float = 0.0, limit: Optional[int] = None, exhaustive: bool = False
+    ) -> list[tuple[int, float]]:
+        """
+        Find indexed transcripts similar to a text.
+
+        Args:
+            text (str): The transcript to look up.
+            threshold (float): Minimum cosine similarity of the n-gram profiles, between 0 and 1.
+            limit (Optional[int]): Maximum number of matches.
+            exhaustive (bool): Score every indexed transcript instead of the LSH candidates only.
+
+        Returns:
+            list[tuple[int, float]]: (row id, similarity) pairs, most similar first.
+        """
+        if exhaustive:
+            candidates = np.flatnonzero(self._active[: self._size])
+        else:
+            rows = {row for key in self._band_keys(text) for row in self._buckets.get(key, ())}
+            candidates = np.fromiter((row for row in rows if self._active[row]), dtype=np.intp)
+        if not len(candidates):
+            return []
+        query = ngram_vectors([text], self.dim, self.ngram)[0]
+        if exhaustive:
+            scores = np.concatenate([block @ query for block in self._blocks])[candidates]
+        else:
+            scores = np.stack([self._blocks[row // BLOCK_ROWS][row % BLOCK_ROWS] for row in candidates]) @ query
+        order = np.argsort(-scores, kind="stable")
+        matches = [(int(candidates[i]), float(scores[i])) for i in order if scores[i] >= threshold]
+        return matches[:limit] if limit is not None else matches
+
+    def _band_keys(self, text: str) -> list[int]:
+        return lsh_band_keys(minhash_signature(text, self.bands * self.rows, self.ngram), self.bands)
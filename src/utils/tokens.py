@@ -0,0 +1,134 @@
+import re
+from typing import Optional
+
+# Rough number of characters per token for English and code under BPE tokenizers
+CHARS_PER_TOKEN = 4
+
+# Chinese, Japanese and Korean characters, which BPE tokenizers encode in about one token each
+_CJK = re.compile(
+    r"[\u1100-\u11ff\u2e80-\u9fff\ua960-\ua97f\uac00-\ud7ff\uf900-\ufaff\ufe30-\ufe4f\uff00-\uffef"
+    r"\U00020000-\U0003134f]"
+)
+
+# Fraction of a truncated transcript's token budget spent on its start, the rest goes to its end
+DEFAULT_HEAD_FRACTION = 0.75
+
+# Marks where a truncated transcript was cut
+TRUNCATION_MARK = " ... "
+
+# Runs of anything but letters and digits, collapsed to one space before comparing transcripts
+_SEPARATORS = re.compile(r"[\W_]+")
+
+# Hesitation sounds transcribers write out, with the commas around them
+_FILLERS = re.compile(r"(?:,\s*)?\b(?:u+h+m*|u+m+|e+r+m*|h+m+|m{2,}|a+h+)\b,?", re.IGNORECASE)
+
+# A word repeated right after itself, as in stammering
+_REPEATED_WORDS = re.compile(r"\b(\w+)(?:[,\s]+\1\b)+", re.IGNORECASE)
+
+# Sentence ends, where transcripts are split to drop repeated sentences
+_SENTENCE_ENDS = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheaply estimate the number of tokens a text costs, without loading a tokenizer.
+
+    CJK characters count as a token each, anything else as `CHARS_PER_TOKEN` characters per token.
+    """
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _fitting_chars(text: str, token_budget: float) -> int:
+    """Number of leading characters of a text whose estimated tokens fit a budget, see `estimate_tokens`."""
+    # In units of a character of `CHARS_PER_TOKEN`, so CJK characters cost a whole token
+    units = token_budget * CHARS_PER_TOKEN
+    for index, char in enumerate(text):
+        units -= CHARS_PER_TOKEN if _CJK.match(char) else 1
+        if units < 0:
+            return index
+    return len(text)
+
+
+def _splits_word(before: str, after: str) -> bool:
+    """Whether a cut between two characters splits a word; CJK text may be cut anywhere."""
+    return not (before.isspace() or after.isspace() or _CJK.match(before) or _CJK.match(after))
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case a transcript and collapse punctuation and whitespace, so only the wording is compared."""
+    return _SEPARATORS.sub(" ", text.lower()).strip()
+
+
+def strip_fillers(text: str) -> str:
+    """
+    Remove hesitation sounds, stammered repeats and repeated sentences from a transcript.
+
+    Repeated sentences, e.g. of several takes of the same line, are kept the first time they
+    are said. Sentences are compared with `normalize_text`.
+
+    Args:
+        text (str): The transcript.
+
+    Returns:
+        str: The transcript without fillers and repetition, with whitespace collapsed.
+    """
+    text = _REPEATED_WORDS.sub(r"\1", _FILLERS.sub("", text))
+    sentences = []
+    seen = set()
+    for sentence in _SENTENCE_ENDS.split(text):
+        key = normalize_text(sentence)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        sentences.append(sentence.strip())
+    return " ".join(" ".join(sentences).split())
+
+
+def truncate_tokens(text: str, token_budget: int, head_fraction: float = DEFAULT_HEAD_FRACTION) -> str:
+    """
+    Cut a text to about `token_budget` tokens, keeping its start and its end.
+
+    Args:
+        text (str): The text.
+        token_budget (int): Estimated tokens the result may cost, see `estimate_tokens`.
+        head_fraction (float): Fraction of the budget spent on the start of the text.
+
+    Returns:
+        str: The text if it fits the budget, otherwise its start and end joined by `TRUNCATION_MARK`,
+            both cut at word boundaries.
+    """
+    if token_budget <= 0:
+        raise ValueError("token_budget must be positive")  # noqa: TRY003
+    if not 0.0 <= head_fraction <= 1.0:
+        raise ValueError("head_fraction must be between 0 and 1")  # noqa: TRY003
+    if estimate_tokens(text) <= token_budget:
+        return text
+    tokens = max(0.0, token_budget - len(TRUNCATION_MARK) / CHARS_PER_TOKEN)
+    head_end = _fitting_chars(text, tokens * head_fraction)
+    tail_start = len(text) - _fitting_chars(text[::-1], tokens * (1.0 - head_fraction))
+    head, tail = text[:head_end], text[tail_start:]
+    if head and _splits_word(text[head_end - 1], text[head_end]):
+        head = head.rsplit(None, 1)[0] if len(head.split(None, 1)) > 1 else ""
+    if tail and _splits_word(text[tail_start - 1], text[tail_start]):
+        tail = tail.split(None, 1)[1] if len(tail.split(None, 1)) > 1 else ""
+    return f"{head.strip()}{TRUNCATION_MARK}{tail.strip()}".strip()
+
+
+def compact_transcript(
+    text: str, token_budget: Optional[int] = None, head_fraction: float = DEFAULT_HEAD_FRACTION
+) -> str:
+    """
+    Shrink a transcript before it is sent for labeling: strip fillers and repetition, then truncate it.
+
+    Args:
+        text (str): The transcript.
+        token_budget (Optional[int]): Estimated tokens the result may cost. Not truncated when None.
+        head_fraction (float): Fraction of the budget spent on the start of the transcript.
+
+    Returns:
+        str: The compacted transcript, or the transcript itself if nothing but fillers is left.
+    """
+    compacted = strip_fillers(text) or text.strip()
+    if token_budget is None:
+        return compacted
+    return truncate_tokens(compacted, token_budget, head_fraction)
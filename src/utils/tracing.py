@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+import time
+from collections.abc import Awaitable, Generator, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Optional, Union
+
+# Tracer and track of the span the current task is running in, for nested spans like subprocesses
+_current: ContextVar[Optional[tuple["Tracer", int]]] = ContextVar("cliptale_trace", default=None)
+
+
+class Tracer:
+    """Records spans of a pipeline run as Chrome trace events, viewable in Perfetto or chrome://tracing.
+
+    Spans on a track must nest, so every worker gets a track of its own. Clips get an async
+    track each, which shows how long a clip queued for and spent in every stage.
+    """
+
+    def __init__(self) -> None:
+        self.events: list[dict[str, Any]] = []
+        self.pid = os.getpid()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._tracks: dict[str, int] = {}
+
+    def timestamp(self, perf_time: Optional[float] = None) -> float:
+        """Convert a `time.perf_counter()` value to trace time in microseconds."""
+        return ((time.perf_counter() if perf_time is None else perf_time) - self._origin) * 1e6
+
+    def _emit(self, event: dict[str, Any]) -> None:
+        with self._lock:
+            self.events.append({"pid": self.pid, **event})
+
+    def track(self, name: str) -> int:
+        """Create a named track (a trace thread), numbering tracks that share a name."""
+        with self._lock:
+            count = sum(1 for track_name in self._tracks if track_name.rsplit(" #", 1)[0] == name)
+            track_name = f"{name} #{count + 1}"
+            tid = self._tracks[track_name] = len(self._tracks) + 1
+        self._emit({"ph": "M", "name": "thread_name", "tid": tid, "args": {"name": track_name}})
+        return tid
+
+    def complete(
+        self, name: str, category: str, start: float, end: float, tid: int, args: Optional[dict[str, Any]] = None
+    ) -> None:
+        """Record a span between two `time.perf_counter()` values on a track."""
+        event = {"ph": "X", "name": name, "cat": category, "ts": self.timestamp(start), "tid": tid}
+        event["dur"] = (end - start) * 1e6
+        if args:
+            event["args"] = args
+        self._emit(event)
+
+    def async_span(
+        self, name: str, category: str, start: float, end: float, span_id: int, args: Optional[dict[str, Any]] = None
+    ) -> None:
+        """Record a span on the async track `span_id`, where spans may overlap those of other tracks."""
+        begin = {"ph": "b", "name": name, "cat": category, "id": span_id, "ts": self.timestamp(start), "tid": 0}
+        if args:
+            begin["args"] = args
+        self._emit(begin)
+        self._emit({"ph": "e", "name": name, "cat": category, "id": span_id, "ts": self.timestamp(end), "tid": 0})
+
+    def counter(self, name: str, values: dict[str, float]) -> None:
+        """Record the current values of a counter track, e.g. queue depths."""
+        self._emit({"ph": "C", "name": name, "ts": self.timestamp(), "tid": 0, "args": values})
+
+    @contextmanager
+    def activate(self, tid: int) -> Iterator[None]:
+        """Make `tid` the track that nested spans of the current task, such as subprocesses, are recorded on."""
+        token = _current.set((self, tid))
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+    def write(self, path: Union[str, Path]) -> None:
+        """Write the trace as Chrome trace-event JSON."""
+        with self._lock:
+            trace = {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+        Path(path).write_text(json.dumps(trace))
+
+
+def current_span() -> Optional[tuple[Tracer, int]]:
+    """The tracer and track of the span the current task runs in, if tracing is active."""
+    return _current.get()
+
+
+class ActiveTimer:
+    """Awaits a coroutine while measuring how long it ran on the event loop.
+
+    Every step of the coroutine, from one suspension to the next, is timed. Time the coroutine
+    spends suspended, e.g. waiting on the network, a subprocess or a worker thread, is not counted.
+    """
+
+    def __init__(self, awaitable: Awaitable[Any]) -> None:
+        self.awaitable = awaitable
+        self.active = 0.0
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        steps = self.awaitable.__await__()
+        send_value: Any = None
+        error: Optional[BaseException] = None
+        while True:
+            step_started = time.perf_counter()
+            try:
+                yielded = steps.throw(error) if error is not None else steps.send(send_value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.active += time.perf_counter() - step_started
+            error = None
+            try:
+                send_value = yield yielded
+            except BaseException as e:
+                error = e
@@ -0,0 +1,130 @@
+import wave
+from dataclasses import dataclass
+from typing import BinaryIO
+
+import numpy as np
+
+from src.utils.audio import SPEECH_SAMPLE_RATE
+
+# Length of one analysis frame (in milliseconds)
+DEFAULT_FRAME_MS = 30
+
+# Frames this far above the estimated noise floor count as loud enough for speech (in dB)
+DEFAULT_ENERGY_MARGIN_DB = 12.0
+
+# Frames quieter than this never count as speech (in dBFS)
+DEFAULT_ENERGY_FLOOR_DB = -50.0
+
+# Frames louder than this are always loud enough for speech, however high the noise floor (in dBFS)
+DEFAULT_SPEECH_LEVEL_DB = -35.0
+
+# Minimum spread of frame energies around a frame that syllabic speech produces (in dB)
+DEFAULT_MODULATION_DB = 6.0
+
+# Length of the window the energy modulation is measured over (in milliseconds)
+MODULATION_WINDOW_MS = 500
+
+# Zero-crossing rate band of voiced and unvoiced speech at 16 kHz (crossings per sample)
+DEFAULT_ZCR_RANGE = (0.01, 0.35)
+
+
+@dataclass
+class VadResult:
+    """Outcome of voice-activity detection on an audio window.
+
+    Attributes:
+        speech_ratio: Fraction of frames classified as speech, between 0 and 1
+        duration: Duration of the analysed audio in seconds
+    """
+
+    speech_ratio: float
+    duration: float
+
+
+def detect_speech(
+    samples: np.ndarray,
+    sample_rate: int = SPEECH_SAMPLE_RATE,
+    frame_ms: int = DEFAULT_FRAME_MS,
+    energy_margin_db: float = DEFAULT_ENERGY_MARGIN_DB,
+    energy_floor_db: float = DEFAULT_ENERGY_FLOOR_DB,
+    speech_level_db: float = DEFAULT_SPEECH_LEVEL_DB,
+    modulation_db: float = DEFAULT_MODULATION_DB,
+    zcr_range: tuple[float, float] = DEFAULT_ZCR_RANGE,
+) -> VadResult:
+    """
+    Estimate how much of a mono PCM signal is speech using frame energy and zero-crossing rate.
+
+    A frame counts as speech when it is clearly louder than the noise floor (estimated as the
+    10th percentile of frame energies, so pauses between words set it) or plainly at speech level,
+    its zero-crossing rate lies in the speech band, and the energy around it fluctuates the way
+    syllables do. Hum falls below the band and hiss above it, while sustained music lacks the
+    syllabic energy modulation. Single isolated speech frames are dropped by a 3-frame majority filter.
+
+    Args:
+        samples (np.ndarray): Mono samples, either int16 PCM or floats in [-1, 1].
+        sample_rate (int): Sample rate of the signal in Hz.
+        frame_ms (int): Frame length in milliseconds.
+        energy_margin_db (float): Required energy above the noise floor in dB.
+        energy_floor_db (float): Absolute minimum frame energy in dBFS.
+        speech_level_db (float): Frame energy in dBFS that is always loud enough.
+        modulation_db (float): Minimum standard deviation of frame energies in a half-second window.
+        zcr_range (tuple[float, float]): Accepted zero-crossing rate band.
+
+    Returns:
+        VadResult: The speech ratio and the analysed duration.
+    """
+    if samples.dtype == np.int16:
+        signal = samples.astype(np.float32) / 32768.0
+    else:
+        signal = samples.astype(np.float32, copy=False)
+    duration = len(signal) / sample_rate
+    frame_length = max(1, sample_rate * frame_ms // 1000)
+    frame_count = len(signal) // frame_length
+    if frame_count == 0:
+        return VadResult(speech_ratio=0.0, duration=duration)
+
+    frames = signal[: frame_count * frame_length].reshape(frame_count, frame_length)
+    energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_length
+
+    noise_floor_db = np.percentile(energy_db, 10)
+    threshold_db = min(max(noise_floor_db + energy_margin_db, energy_floor_db), speech_level_db)
+    window = min(frame_count, max(1, MODULATION_WINDOW_MS // frame_ms))
+    padded_energy = np.pad(energy_db, (window // 2, window - 1 - window // 2), mode="edge")
+    modulation = np.lib.stride_tricks.sliding_window_view(padded_energy, window).std(axis=1)
+
+    speech = (energy_db > threshold_db) & (zcr >= zcr_range[0]) & (zcr <= zcr_range[1]) & (modulation >= modulation_db)
+
+    # Majority vote over each frame and its neighbours removes isolated clicks and dropouts
+    padded = np.pad(speech.astype(np.int8), 1, mode="edge")
+    speech = (padded[:-2] + padded[1:-1] + padded[2:]) >= 2
+    return VadResult(speech_ratio=float(np.mean(speech)), duration=duration)
+
+
+def read_wav_samples(audio_file: BinaryIO) -> tuple[np.ndarray, int]:
+    """
+    Read 16-bit PCM WAV audio into a mono int16 array, leaving the file position at the start.
+
+    Args:
+        audio_file (BinaryIO): A seekable file containing a 16-bit PCM WAV stream.
+
+    Returns:
+        tuple[np.ndarray, int]: The samples, downmixed to mono, and the sample rate.
+    """
+    audio_file.seek(0)
+    with wave.open(audio_file, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"Expected 16-bit PCM, got {8 * wav.getsampwidth()}-bit")  # noqa: TRY003
+        channels = wav.getnchannels()
+        sample_rate = wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+    audio_file.seek(0)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, sample_rate
+
+
+def samples_from_pcm(pcm: bytes) -> np.ndarray:
+    """Interpret raw little-endian 16-bit mono PCM, as produced by `ffmpeg -f s16le`."""
+    return np.frombuffer(pcm[: len(pcm) - len(pcm) % 2], dtype="<i2")
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.cliptale.batch import BatchLabeler
+from src.cliptale.labeler import ClipLabeler
+from src.models.errors import AudioFileNotFoundError
+from src.models.labels import BatchLabels, ClipLabel
+
+
+@pytest.fixture
+def make_clip(tmp_path):
+    def make(name: str, text: str) -> ClipLabeler:
+        file_path = tmp_path / f"{name}.mp4"
+        file_path.write_bytes(b"\x00" * 64)
+        clip_labeler = ClipLabeler(file_path)
+        clip_labeler.audio_text = text
+        return clip_labeler
+
+    return make
+
+
+def test_plan_batches_respects_budget_and_size(make_clip):
+    batch_labeler = BatchLabeler(token_budget=100, max_batch_size=3, agent=object())
+    clips = [make_clip(f"clip{i}", "x" * 200) for i in range(5)]  # 66 tokens each with overhead
+    assert [len(batch) for batch in batch_labeler.plan_batches(clips)] == [1, 1, 1, 1, 1]
+
+    batch_labeler.token_budget = 1000
+    assert [len(batch) for batch in batch_labeler.plan_batches(clips)] == [3, 2]
+
+
+@pytest.mark.asyncio
+async def test_generate_labels_matches_ids_and_falls_back(make_clip, monkeypatch):
+    output = BatchLabels(labels=[ClipLabel(clip_id="c0", label=" first "), ClipLabel(clip_id="c9", label="stray")])
+    run = AsyncMock(return_value=SimpleNamespace(final_output=output))
+    monkeypatch.setattr("agents.Runner.run", run)
+
+    async def fake_label(self):
+        return f"single {self.file_path.stem}"
+
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    clips = [make_clip("a", "hello"), make_clip("b", "world")]
+    labels = await BatchLabeler(agent=object()).generate_labels(clips)
+
+    assert labels == ["first", "single b"]
+    run.assert_awaited_once()
+    assert "[clip c0]\nhello" in run.call_args.kwargs["input"]
+
+
+@pytest.mark.asyncio
+async def test_generate_labels_reports_missing_transcripts(make_clip, monkeypatch):
+    monkeypatch.setattr("agents.Runner.run", AsyncMock(side_effect=RuntimeError("down")))
+
+    async def fake_label(self):
+        return self.file_path.stem
+
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    clips = [make_clip("a", "hello"), make_clip("b", ""), make_clip("c", "again")]
+    labels = await BatchLabeler(agent=object()).generate_labels(clips, return_exceptions=True)
+
+    assert labels[0] == "a" and labels[2] == "c"
+    assert isinstance(labels[1], AudioFileNotFoundError)
+    with pytest.raises(AudioFileNotFoundError):
+        await BatchLabeler(agent=object()).generate_labels(clips)
@@ -0,0 +1,79 @@
+import io
+from pathlib import Path
+
+import pytest
+from openai import AsyncOpenAI, RateLimitError
+
+from agents import OpenAIChatCompletionsModel, RunConfig, Runner, set_tracing_disabled
+from benchmarks.clips import clip_command
+from benchmarks.mock_server import MockOpenAIServer, MockSettings
+from benchmarks.run import percentile_summary
+from src.agents import BatchLabelerAgent
+from src.agents.transcriber import AsyncTranscriber
+from src.models.labels import BatchLabels
+from src.utils.providers import Endpoint, RoutingModelProvider, get_agent_limiter, run_agent, set_routing_provider
+
+
+@pytest.mark.asyncio
+async def test_mock_server_transcribes_and_labels_in_batches():
+    async with MockOpenAIServer(MockSettings(latency=0.0, jitter=0.0)) as server:
+        client = AsyncOpenAI(base_url=server.base_url, api_key="mock")
+        text = await AsyncTranscriber(client=client).transcribe_file(io.BytesIO(b"RIFF" * 1024), "clip.wav")
+        assert text.startswith("Synthetic transcript")
+
+        agent = BatchLabelerAgent()
+        agent.model = OpenAIChatCompletionsModel(model="mock", openai_client=client)
+        result = await Runner.run(
+            agent, "[clip c0]\nhello\n\n[clip c1]\nworld", run_config=RunConfig(tracing_disabled=True)
+        )
+        assert isinstance(result.final_output, BatchLabels)
+        assert [entry.clip_id for entry in result.final_output.labels] == ["c0", "c1"]
+
+        assert server.stats()["requests"] == {"audio/transcriptions": 1, "chat/completions": 1}
+
+
+@pytest.mark.asyncio
+async def test_mock_server_injects_rate_limits():
+    async with MockOpenAIServer(MockSettings(latency=0.0, jitter=0.0, rate_limit=1.0)) as server:
+        client = AsyncOpenAI(base_url=server.base_url, api_key="mock", max_retries=0)
+        with pytest.raises(RateLimitError):
+            await AsyncTranscriber(client=client, max_retries=1).transcribe_file(io.BytesIO(b"RIFF"), "clip.wav")
+        assert server.rate_limited == 2
+
+
+@pytest.mark.asyncio
+async def test_agent_rate_limits_reach_the_limiter(monkeypatch):
+    monkeypatch.setattr("src.agents.transcriber.RETRY_BASE_DELAY", 0.0)
+    async with MockOpenAIServer(MockSettings(latency=0.0, jitter=0.0, rate_limit=1.0)) as server:
+        provider = RoutingModelProvider([Endpoint(server.base_url, "mock")], "mock", hedge=False)
+        set_routing_provider(provider)
+        set_tracing_disabled(True)
+        try:
+            with pytest.raises(RateLimitError):
+                await run_agent(BatchLabelerAgent(), "[clip c0]\nhello", max_retries=1)
+            limiter = get_agent_limiter(BatchLabelerAgent())
+        finally:
+            set_routing_provider(None)
+            set_tracing_disabled(False)
+        # One request per attempt: the client leaves every retry to `run_agent`
+        assert server.rate_limited == 2
+        assert limiter.decreases == 2
+        assert limiter.in_flight == 0
+
+
+def test_clip_command_uses_lavfi_sources():
+    args = clip_command(Path("out/silent_00000.mkv"), 3.0, "libvpx-vp9", speech=False).compile()
+    assert args[args.index("-vcodec") + 1] == "libvpx-vp9"
+    assert any(arg.startswith("anullsrc=") for arg in args)
+    assert "libopus" in args
+
+    speech_args = clip_command(Path("out/speech_00001.mp4"), 3.0).compile()
+    assert any(arg.startswith("aevalsrc=exprs='0.2*(sin(2*PI*150*t)") for arg in speech_args)
+
+
+def test_percentile_summary():
+    summary = percentile_summary([float(value) for value in range(1, 101)])
+    assert summary["count"] == 100
+    assert summary["p50"] == pytest.approx(50.5)
+    assert summary["p95"] == pytest.approx(95.05)
+    assert percentile_summary([]) == {"count": 0}
@@ -0,0 +1,73 @@
+import os
+
+from src.utils.cache import DEFAULT_CACHE_PATH, ResultCache
+from src.utils.config import tmp_dir
+from src.utils.fingerprint import fingerprint_file
+
+
+def test_fingerprint_survives_rename(tmp_path):
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(os.urandom(3 * 1024 * 1024))
+    fingerprint = fingerprint_file(clip)
+
+    renamed = clip.rename(tmp_path / "rooftop_interview.mp4")
+    assert fingerprint_file(renamed) == fingerprint
+
+    with open(renamed, "r+b") as file:
+        file.seek(-1, os.SEEK_END)
+        file.write(b"\x01")
+    os.utime(renamed, ns=(0, 0))
+    assert fingerprint_file(renamed) != fingerprint
+
+
+def test_fingerprint_empty_file(tmp_path):
+    empty = tmp_path / "empty.mp4"
+    empty.touch()
+    assert fingerprint_file(empty)
+
+
+def test_cache_versions_and_counters(tmp_path):
+    cache = ResultCache(tmp_path / "cache.sqlite3")
+    cache.put("abc", "transcript", "rolling, speed", version="v1")
+
+    assert cache.get("abc", "transcript", version="v1") == "rolling, speed"
+    assert cache.get("abc", "transcript", version="v2") is None
+    assert cache.get("abc", "label", version="v1") is None
+    assert cache.stats()["transcript"] == {"hits": 1, "misses": 1}
+    assert cache.stats()["label"] == {"hits": 0, "misses": 1}
+
+    cache.close()
+    reopened = ResultCache(tmp_path / "cache.sqlite3")
+    assert reopened.get("abc", "transcript", version="v1") == "rolling, speed"
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path / "cache.sqlite3", max_bytes=250)
+    for index in range(3):
+        cache.put(f"clip{index}", "transcript", "x" * 100)
+    assert cache.size <= 250
+    assert cache.get("clip0", "transcript") is None
+    assert cache.get("clip2", "transcript") == "x" * 100
+
+
+def test_cache_evicts_by_buffered_access_times(tmp_path):
+    cache = ResultCache(tmp_path / "cache.sqlite3", max_bytes=250)
+    cache.put("clip0", "transcript", "x" * 100)
+    cache.put("clip1", "transcript", "x" * 100)
+    # The hit is only written with the next put, which still evicts the other clip first
+    assert cache.get("clip0", "transcript") == "x" * 100
+    cache.put("clip2", "transcript", "x" * 100)
+    assert cache.get("clip1", "transcript") is None
+    assert cache.get("clip0", "transcript") == "x" * 100
+    cache.close()
+
+
+def test_default_path_follows_cache_dir_set_after_import(tmp_path, monkeypatch):
+    monkeypatch.setenv("CLIPTALE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("CLIPTALE_TMP_DIR", str(tmp_path / "tmp"))
+    assert tmp_dir() == str(tmp_path / "tmp")
+
+    cache = ResultCache()
+    assert cache.db_path == tmp_path / "cache" / DEFAULT_CACHE_PATH.name
+    assert cache.db_path.exists()
+    cache.close()
@@ -0,0 +1,83 @@
+from pathlib import Path
+
+from src.cliptale.catalog import ClipCatalog, match_expression
+from src.models.catalog import ClipRecord
+
+
+def test_match_expression_quotes_words():
+    assert match_expression("interview rooftop") == '"interview" "rooftop"*'
+    assert match_expression('drone OR "b-roll"', prefix=False) == '"drone" "OR" "b" "roll"'
+    assert match_expression("  --  ") == ""
+
+
+def test_catalog_search_ranks_label_matches_first(tmp_path):
+    catalog = ClipCatalog(tmp_path / "catalog.sqlite3")
+    catalog.upsert([
+        ClipRecord("a", Path("/clips/a.mp4"), "rooftop_interview_ceo", "We talk about the quarterly numbers."),
+        ClipRecord("b", Path("/clips/b.mp4"), "city_broll", "An interview later moves up to the rooftop bar."),
+        ClipRecord("c", Path("/clips/c.mp4"), "kitchen_cooking", "Chopping onions for the soup."),
+    ])
+
+    hits = catalog.search("interview rooftop")
+    assert [hit.fingerprint for hit in hits] == ["a", "b"]
+    assert hits[0].score <= hits[1].score
+    assert "[interview]" in hits[1].snippet
+    # Stemming and prefix matching of the last word
+    assert [hit.fingerprint for hit in catalog.search("onion")] == ["c"]
+    assert [hit.fingerprint for hit in catalog.search("kitch")] == ["c"]
+    assert sorted(hit.fingerprint for hit in catalog.search("label:broll OR soup", raw=True)) == ["b", "c"]
+    assert catalog.search("") == []
+
+
+def test_catalog_keeps_path_history_and_known_fields(tmp_path):
+    catalog = ClipCatalog(tmp_path / "catalog.sqlite3")
+    catalog.upsert([ClipRecord("a", Path("/clips/a.mp4"), "rooftop_interview", "Rolling on the roof.", 12.5)])
+    catalog.upsert([ClipRecord("a", Path("/clips/rooftop_interview.mp4"), previous_paths=(Path("/clips/a.mp4"),))])
+
+    entry = catalog.get("a")
+    assert entry is not None
+    assert entry.path == Path("/clips/rooftop_interview.mp4")
+    assert entry.paths == [Path("/clips/a.mp4"), Path("/clips/rooftop_interview.mp4")]
+    assert (entry.label, entry.transcript, entry.duration) == ("rooftop_interview", "Rolling on the roof.", 12.5)
+    assert catalog.find(Path("/clips/a.mp4")).fingerprint == "a"
+    assert [hit.fingerprint for hit in catalog.search("roof")] == ["a"]
+
+    catalog.upsert([ClipRecord("a", Path("/clips/rooftop_interview.mp4"), "ceo_interview")])
+    assert catalog.search("rooftop")[0].label == "ceo_interview"
+    assert catalog.search("ceo")[0].fingerprint == "a"
+    assert len(catalog) == 1
+    assert catalog.remove("a")
+    assert catalog.search("interview") == []
+    assert catalog.find(Path("/clips/a.mp4")) is None
+
+
+def test_catalog_bulk_upsert(tmp_path):
+    catalog = ClipCatalog(tmp_path / "catalog.sqlite3")
+    records = [
+        ClipRecord(f"clip{index}", Path(f"/clips/{index}.mp4"), f"take_{index}", f"scene {index % 50} take {index}")
+        for index in range(2000)
+    ]
+    assert catalog.upsert(records) == 2000
+    assert len(catalog) == 2000
+    assert len(catalog.search("scene take", limit=10)) == 10
+    assert len(catalog.recent(limit=3)) == 3
+
+
+def test_catalog_finds_similar_clips(tmp_path):
+    catalog = ClipCatalog(tmp_path / "catalog.sqlite3")
+    take = "Okay, we're rolling. Tell me about the rooftop garden and how you started it three years ago."
+    catalog.upsert([
+        ClipRecord("cam_a", Path("/clips/cam_a.mp4"), "rooftop_garden", take),
+        ClipRecord("cam_b", Path("/clips/cam_b.mp4"), "rooftop_garden_2", take.lower().replace(",", "")),
+        ClipRecord("kitchen", Path("/clips/kitchen.mp4"), "soup", "Chopping onions for the soup on the stove."),
+    ])
+
+    hits = catalog.similar("cam_a")
+    assert [hit.fingerprint for hit in hits] == ["cam_b"]
+    assert hits[0].similarity > 0.9
+    assert [hit.fingerprint for hit in catalog.similar(text=take, threshold=0.9)] == ["cam_a", "cam_b"]
+    assert catalog.similar("missing") == []
+
+    # A new transcript replaces the clip's band keys
+    catalog.upsert([ClipRecord("cam_b", Path("/clips/cam_b.mp4"), transcript="Completely different words here.")])
+    assert catalog.similar("cam_a") == []
@@ -0,0 +1,134 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.cliptale.cli import main
+from src.models.results import ClipResult
+from src.utils.journal import JOURNAL_FILE_NAME, ProcessedJournal
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Packages that must not be imported before a subcommand needs them
+HEAVY_MODULES = ("agents", "openai", "ffmpeg", "numpy", "dotenv", "asyncio")
+
+
+@pytest.fixture
+def clips(tmp_path):
+    for name in ("a.mp4", "b.mov", "c.mkv", "notes.txt"):
+        (tmp_path / name).write_bytes(b"\x00" * 64)
+    return tmp_path
+
+
+@pytest.mark.parametrize("argv", [["--help"], ["scan", "{dir}"], ["status", "{dir}"]])
+def test_cli_starts_without_heavy_imports(clips, argv):
+    code = (
+        "import sys\n"
+        "from src.cliptale.cli import main\n"
+        "try:\n"
+        f"    main({[arg.format(dir=clips) for arg in argv]!r})\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    output = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.splitlines()[-1] == "[]"
+
+
+def test_api_modules_load_env_when_first_used():
+    code = (
+        "import sys\n"
+        "import src.agents.transcriber, src.pipelines.labeler, src.utils.providers\n"
+        "print('dotenv' in sys.modules)\n"
+        "src.utils.providers.get_run_config()\n"
+        "print('dotenv' in sys.modules)\n"
+    )
+    env = {key: value for key, value in os.environ.items() if key not in ("OPENAI_API_KEY", "LLM_BASE_URLS")}
+    output = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code], cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.split() == ["False", "True"]
+
+
+def test_cli_scan_lists_videos(clips, capsys):
+    assert main(["scan", str(clips)]) == 0
+    assert sorted(capsys.readouterr().out.split()) == sorted(str(clips / name) for name in ("a.mp4", "b.mov", "c.mkv"))
+
+
+def test_cli_status_counts_journaled_clips(clips, capsys):
+    journal = ProcessedJournal(clips / JOURNAL_FILE_NAME)
+    journal.record(clips / "a.mp4", "ok")
+    journal.record(clips / "b.mov", "failed")
+    journal.close()
+
+    assert main(["status", str(clips)]) == 0
+    assert capsys.readouterr().out.strip() == "3 clips: 1 labeled, 1 failed, 1 pending"
+
+
+def test_cli_label_runs_pipeline(clips, capsys, monkeypatch):
+    calls = {}
+
+    async def fake_run(work_dir, rename_template, **kwargs):
+        calls.update(kwargs, work_dir=work_dir, rename_template=rename_template)
+        failed = ClipResult(source_path=work_dir / "b.mov", status="failed", error="label: agent unavailable")
+        return {"a": ClipResult(source_path=work_dir / "a.mp4", status="ok"), "b": failed}
+
+    monkeypatch.setattr("src.pipelines.labeler.run_labeler_pipeline", fake_run)
+    assert (
+        main([
+            "label",
+            str(clips),
+            "--sampling",
+            "start-end",
+            "--copy-distance",
+            "32",
+            "--stream-words",
+            "8",
+            "--min-speech-ratio",
+            "0.1",
+        ])
+        == 1
+    )
+    assert calls["work_dir"] == clips
+    assert calls["rename_template"] == "{label}{ext}"
+    assert calls["sampling"] == (0.0, 1.0)
+    assert calls["copy_distance"] == 32
+    assert calls["stream_min_words"] == 8
+    assert calls["min_speech_ratio"] == 0.1
+    captured = capsys.readouterr()
+    assert captured.out.strip() == "Labeled 1 clips, 1 failed"
+    assert "agent unavailable" in captured.err
+
+
+def test_cli_rejects_one_off_options_in_watch_mode(clips):
+    with pytest.raises(SystemExit):
+        main(["label", str(clips), "--watch", "--trace", "trace.json"])
+    with pytest.raises(SystemExit):
+        main(["scan", str(clips / "missing")])
+
+
+@pytest.mark.parametrize("spec", ["0", "abc", "0,2"])
+def test_cli_reports_invalid_sampling_as_usage_error(clips, capsys, spec):
+    with pytest.raises(SystemExit) as exit_info:
+        main(["label", str(clips), "--sampling", spec])
+    assert exit_info.value.code == 2
+    assert f"Invalid sampling spec: {spec!r}" in capsys.readouterr().err
+
+
+def test_console_script_is_packaged():
+    tomllib = pytest.importorskip("tomllib")
+    setuptools = pytest.importorskip("setuptools")
+    pyproject = tomllib.loads((REPO_ROOT / "pyproject.toml").read_text())
+    find = pyproject["tool"]["setuptools"]["packages"]["find"]
+    packages = setuptools.find_packages(str(REPO_ROOT / find["where"][0]), include=find["include"])
+
+    module, function = pyproject["project"]["scripts"]["cliptale"].split(":")
+    assert module.rpartition(".")[0] in packages
+    assert function == "main"
+    # Every package the console script imports from is installed under `src`, and none shadows `agents`
+    assert {"src.agents", "src.gui", "src.models", "src.pipelines", "src.utils"} <= set(packages)
+    assert all(package.split(".")[0] == "src" for package in packages)
@@ -1,5 +1,5 @@
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import ffmpeg
 import pytest
@@ -7,12 +7,16 @@ import pytest
 from src.cliptale.labeler import ClipLabeler, Duration_s
 from src.models.errors import (
     AudioFileNotFoundError,
+    FFmpegProcessError,
     InvalidDurationError,
     InvalidTemplateError,
     NoTemplateError,
     VideoExtensionNotSupportedError,
     VideoFileNotFoundError,
 )
+from src.utils.config import DEFAULT_RENAME_TEMPLATE
+from src.utils.ffmpeg_pool import FFmpegResult
+from src.utils.probe import MediaInfo
 
 
 def test_cliplabeler_initialization():
@@ -65,6 +69,47 @@ def test_extract_audio():
             labeler.extract_audio()
 
 
+@pytest.mark.asyncio
+async def test_extract_audio_async():
+    labeler = ClipLabeler(file_path=Path("tests/test_video.mp4"))
+    pool = MagicMock()
+    pool.run = AsyncMock()
+
+    audio_path = await labeler.extract_audio_async(pool=pool)
+    assert audio_path is not None
+    assert audio_path.name == "test_video_start.mp3"
+    args = pool.run.call_args.args[0]
+    assert args[0] == "ffmpeg"
+    assert "-t" in args
+
+    # Test ffmpeg error handling
+    pool.run.side_effect = FFmpegProcessError(1, b"Invalid data found")
+    with pytest.raises(ffmpeg.Error):
+        await labeler.extract_audio_async(pool=pool)
+
+
+@pytest.mark.asyncio
+async def test_extract_audio_async_sampling_windows():
+    labeler = ClipLabeler(file_path=Path("tests/test_video.mp4"), sampling=(0.0, 0.5, 1.0))
+    assert labeler.audio_version == "windows-0,0.5,1-15s"
+    pool = MagicMock()
+    pool.run = AsyncMock(side_effect=[FFmpegResult(0, b'{"format": {"duration": "120.0"}}', b"", 0.0, 0.1), None])
+
+    await labeler.extract_audio_async(pool=pool)
+    assert pool.run.call_args_list[0].args[0][0] == "ffprobe"
+    assert labeler.clip_duration == 120.0
+    args = pool.run.call_args_list[1].args[0]
+    # Every window seeks on the input side, and one ffmpeg process joins them
+    assert args.count("-i") == 3
+    assert args.count("-ss") == 3
+    assert args.index("-ss") < args.index("-i")
+    assert "115" in args
+    assert any("concat=a=1:n=3:v=0" in arg for arg in args)
+
+    with pytest.raises(ValueError):
+        ClipLabeler(file_path=Path("tests/test_video.mp4"), sampling=(0.0, 1.5))
+
+
 @pytest.mark.asyncio
 async def test_generate_label():
     labeler = ClipLabeler(file_path=Path("tests/test_video.mp4"))
@@ -80,6 +125,91 @@ async def test_generate_label():
         await labeler.generate_label()
 
 
+@pytest.mark.asyncio
+async def test_extract_audio_buffer():
+    labeler = ClipLabeler(file_path=Path("tests/test_video.mp4"))
+    wav = Path("tests/sample_audio.wav").read_bytes()
+
+    async def fake_run(args, timeout=None, stdout=None):
+        # ffmpeg leaves placeholder sizes in the header when writing to a pipe
+        stdout.write(wav[:4] + b"\xff\xff\xff\xff" + wav[8:40] + b"\xff\xff\xff\xff" + wav[44:])
+
+    pool = MagicMock()
+    pool.run = fake_run
+
+    buffer = await labeler.extract_audio_buffer(pool=pool)
+    assert buffer.read() == wav
+    assert labeler.audio_buffer is buffer
+    assert labeler.audio_buffer_name == "test_video.wav"
+
+    labeler.release_audio()
+    assert labeler.audio_buffer is None
+
+
+@pytest.mark.asyncio
+async def test_extract_audio_copies_compatible_codecs():
+    labeler = ClipLabeler(file_path=Path("tests/test_video.mp4"))
+    labeler.media_info = MediaInfo(duration=30.0, video_streams=1, audio_streams=1, audio_codec="aac")
+    pool = MagicMock()
+    pool.run = AsyncMock()
+
+    audio_path = await labeler.extract_audio_async(pool=pool)
+    assert audio_path.name == "test_video_start.m4a"
+    args = pool.run.call_args.args[0]
+    assert args[args.index("-acodec") + 1] == "copy"
+    assert "-vn" in args
+    assert (labeler.audio_codec, labeler.audio_copied) == ("aac", True)
+
+    # In memory, AAC is copied into fragmented MP4, which needs no seeking back to write its index
+    pool.run = AsyncMock()
+    await labeler.extract_audio_buffer(pool=pool)
+    args = pool.run.call_args.args[0]
+    assert args[args.index("-f") + 1] == "ipod"
+    assert args[args.index("-acodec") + 1] == "copy"
+    assert "empty_moov" in args[args.index("-movflags") + 1]
+    assert labeler.audio_buffer_name == "test_video.m4a"
+    assert (labeler.audio_codec, labeler.audio_copied) == ("aac", True)
+    labeler.release_audio()
+
+    labeler.media_info.audio_codec = "pcm_s16le"
+    await labeler.extract_audio_buffer(pool=pool)
+    assert labeler.audio_buffer_name == "test_video.wav"
+    assert (labeler.audio_codec, labeler.audio_copied) == ("pcm_s16le", False)
+    labeler.release_audio()
+
+    labeler.media_info.audio_codec = "opus"
+    await labeler.extract_audio_buffer(pool=pool)
+    args = pool.run.call_args.args[0]
+    assert args[args.index("-f") + 1] == "ogg"
+    assert labeler.audio_buffer_name == "test_video.ogg"
+    labeler.release_audio()
+
+
+@pytest.mark.asyncio
+async def test_extract_audio_reencodes_other_codecs():
+    labeler = ClipLabeler(file_path=Path("tests/test_video.mp4"))
+    labeler.media_info = MediaInfo(duration=30.0, video_streams=1, audio_streams=1, audio_codec="pcm_s24le")
+    pool = MagicMock()
+    pool.run = AsyncMock()
+
+    audio_path = await labeler.extract_audio_async(pool=pool)
+    assert audio_path.name == "test_video_start.mp3"
+    args = pool.run.call_args.args[0]
+    assert args[args.index("-acodec") + 1] == "mp3"
+    assert args[args.index("-ac") + 1] == "1"
+    assert (labeler.audio_codec, labeler.audio_copied) == ("mp3", False)
+
+    # Joining several windows needs decoding, as does a disabled passthrough
+    for labeler in (
+        ClipLabeler(file_path=Path("tests/test_video.mp4"), sampling=(0.0, 1.0)),
+        ClipLabeler(file_path=Path("tests/test_video.mp4"), audio_passthrough=False),
+    ):
+        labeler.media_info = MediaInfo(duration=30.0, video_streams=1, audio_streams=1, audio_codec="aac")
+        labeler.clip_duration = 30.0
+        assert (await labeler.extract_audio_async(pool=pool)).suffix == ".mp3"
+        assert not labeler.audio_copied
+
+
 def test_save_label():
     labeler = ClipLabeler(file_path=Path("tests/test_video.mp4"))
     labeler.add_template("test_video_{label}.mp4")
@@ -90,3 +220,11 @@ def test_save_label():
     labeler = ClipLabeler(file_path=Path("tests/test_video_test_label.mp4"))
     with pytest.raises(NoTemplateError):
         labeler.save_label("test_label.mp4")
+
+
+def test_save_label_keeps_the_extension(tmp_path):
+    for name in ("interview.mov", "broll.mkv"):
+        (tmp_path / name).write_bytes(b"\x00" * 64)
+        labeler = ClipLabeler(file_path=tmp_path / name)
+        labeler.add_template(DEFAULT_RENAME_TEMPLATE)
+        assert labeler.save_label("rooftop") == tmp_path / f"rooftop{Path(name).suffix}"
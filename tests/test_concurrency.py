@@ -0,0 +1,129 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils.concurrency import (
+    AdaptiveLimiter,
+    LimiterSettings,
+    configure_limiter,
+    get_limiter,
+    is_overload,
+    retry_after,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+def test_overload_errors_and_retry_after():
+    assert is_overload(StatusError(429))
+    assert is_overload(StatusError(503))
+    assert not is_overload(StatusError(400))
+    assert is_overload(asyncio.TimeoutError())
+    assert retry_after(StatusError(429, {"retry-after": "2"})) == 2.0
+    assert retry_after(StatusError(429, {"retry-after-ms": "250", "retry-after": "2"})) == 0.25
+    assert retry_after(StatusError(429, {"retry-after": "Thu, 01 Jan 1970 00:00:00 GMT"})) == 0.0
+    assert retry_after(StatusError(429)) is None
+
+
+async def run_calls(limiter, count):
+    for _ in range(count):
+        await limiter.acquire()
+        limiter.release(latency=1.0)
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_additively_and_is_cut_on_overload():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter("test", LimiterSettings(initial=4, max_limit=8), clock=clock)
+    # Calls that leave slots unused do not raise the limit
+    await run_calls(limiter, 3)
+    assert limiter.limit == 4.0
+    for _ in range(4):
+        await limiter.acquire()
+    for _ in range(4):
+        limiter.release(latency=1.0)
+    assert limiter.limit == pytest.approx(4.25)
+
+    clock.now += 10
+    await limiter.acquire()
+    limiter.release(error=StatusError(429))
+    assert limiter.capacity == 2
+    # A second error within one latency of the first is the same overload
+    await limiter.acquire()
+    limiter.release(error=StatusError(500))
+    assert limiter.capacity == 2
+    # Errors that are not overload leave the limit alone
+    clock.now += 10
+    await limiter.acquire()
+    limiter.release(error=StatusError(400))
+    assert limiter.capacity == 2
+
+
+@pytest.mark.asyncio
+async def test_latency_spike_cuts_limit():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter("test", LimiterSettings(initial=8), clock=clock)
+    await run_calls(limiter, 5)
+    clock.now += 10
+    await limiter.acquire()
+    limiter.release(latency=5.0)
+    assert limiter.capacity == 4
+    assert limiter.decreases == 1
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_in_order_and_held_back_by_retry_after():
+    limiter = AdaptiveLimiter("test", LimiterSettings(initial=1))
+    order = []
+
+    async def call(index):
+        async with limiter.slot():
+            order.append(index)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(call(index) for index in range(4)))
+    assert order == [0, 1, 2, 3]
+    assert limiter.stats()["in_flight"] == 0
+
+    await limiter.acquire()
+    limiter.release(error=StatusError(429, {"retry-after-ms": "100"}))
+    assert limiter.stats()["blocked_for"] > 0
+    started = asyncio.get_running_loop().time()
+    await call(4)
+    assert asyncio.get_running_loop().time() - started >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_up_its_place():
+    limiter = AdaptiveLimiter("test", LimiterSettings(initial=1))
+    await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    limiter.release(latency=0.1)
+    assert limiter.stats()["waiting"] == 0
+    assert limiter.in_flight == 0
+
+
+def test_limiters_are_configured_per_endpoint_and_model():
+    settings = LimiterSettings(initial=2, max_limit=2)
+    configure_limiter(settings, endpoint="http://quota-a/v1")
+    assert get_limiter("http://quota-a/v1", "whisper").settings is settings
+    assert get_limiter("http://quota-a/v1", "whisper") is get_limiter("http://quota-a/v1", "whisper")
+    assert get_limiter("http://quota-b/v1", "whisper").settings is not settings
@@ -0,0 +1,51 @@
+import asyncio
+import sys
+
+import pytest
+
+from src.models.errors import FFmpegProcessError, FFmpegTimeoutError
+from src.utils.ffmpeg_pool import FFmpegPool
+
+
+def _python(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+@pytest.mark.asyncio
+async def test_run_captures_output():
+    pool = FFmpegPool(max_workers=2)
+    result = await pool.run(_python("import sys; sys.stdout.write('out'); sys.stderr.write('err')"))
+    assert result.returncode == 0
+    assert result.stdout == b"out"
+    assert result.stderr == b"err"
+
+
+@pytest.mark.asyncio
+async def test_run_raises_with_stderr_on_failure():
+    pool = FFmpegPool(max_workers=1)
+    with pytest.raises(FFmpegProcessError) as exc_info:
+        await pool.run(_python("import sys; sys.stderr.write('Invalid data found'); sys.exit(1)"))
+    assert exc_info.value.returncode == 1
+    assert exc_info.value.stderr == b"Invalid data found"
+
+
+@pytest.mark.asyncio
+async def test_run_times_out():
+    pool = FFmpegPool(max_workers=1, timeout=0.2)
+    with pytest.raises(FFmpegTimeoutError):
+        await pool.run(_python("import time; time.sleep(10)"))
+
+
+@pytest.mark.asyncio
+async def test_run_is_cancellable_and_bounded():
+    pool = FFmpegPool(max_workers=1)
+    slow = asyncio.create_task(pool.run(_python("import time; time.sleep(10)")))
+    queued = asyncio.create_task(pool.run(_python("pass")))
+    await asyncio.sleep(0.2)
+    assert not queued.done()
+
+    slow.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await slow
+    result = await asyncio.wait_for(queued, 5)
+    assert result.wait_time > 0
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from src.gui.runner import PipelineRunner
+from src.models.results import ClipResult
+from src.pipelines.metrics import PipelineMetrics
+
+
+class FakePipeline:
+    def __init__(self, files: int = 2) -> None:
+        self.files = files
+        self.metrics = PipelineMetrics()
+        self.on_result = None
+        self.resumed = asyncio.Event()
+        self.resumed.set()
+        self.hold = False
+
+    def pause(self) -> None:
+        self.resumed.clear()
+
+    def resume(self) -> None:
+        self.resumed.set()
+
+    async def run(self) -> dict[str, ClipResult]:
+        results = {}
+        for index in range(self.files):
+            self.metrics.files_scanned.inc()
+            await self.resumed.wait()
+            result = ClipResult(source_path=Path(f"clip_{index}.mp4"))
+            result.status = "failed" if index == 1 else "ok"
+            results[str(result.source_path)] = result
+            self.on_result(result)
+        while self.hold:
+            await asyncio.sleep(0.01)
+        return results
+
+
+def _wait_for(runner: PipelineRunner, kind: str, events: list, timeout: float = 5.0) -> list:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        events.extend(runner.poll())
+        if any(event.kind == kind for event in events):
+            return events
+        time.sleep(0.01)
+    pytest.fail(f"No {kind} event in {[event.kind for event in events]}")
+
+
+@pytest.fixture
+def runner():
+    runner = PipelineRunner()
+    yield runner
+    runner.close()
+
+
+def test_runner_streams_clip_progress(runner):
+    future = runner.start(FakePipeline())
+    events = _wait_for(runner, "finished", [])
+
+    assert [event.kind for event in events] == ["started", "clip", "clip", "finished"]
+    assert [event.result.status for event in events[1:3]] == ["ok", "failed"]
+    assert (events[-1].found, events[-1].done, events[-1].failed) == (2, 2, 1)
+    assert len(future.result(timeout=1)) == 2
+    assert not runner.running
+
+
+def test_runner_pauses_and_cancels(runner):
+    pipeline = FakePipeline(files=3)
+    pipeline.hold = True
+    pipeline.pause()
+    runner.start(pipeline)
+    runner.pause()
+    events = _wait_for(runner, "paused", [])
+    assert not pipeline.resumed.is_set()
+    assert events[-1].done == 0
+
+    runner.resume()
+    _wait_for(runner, "clip", events)
+    with pytest.raises(RuntimeError):
+        runner.start(FakePipeline())
+
+    runner.cancel()
+    _wait_for(runner, "cancelled", events)
+    assert [event.kind for event in events][-2:] == ["clip", "cancelled"]
+    assert events[-1].done == 3
+    assert not runner.running
@@ -0,0 +1,103 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from src.cliptale.labeler import ClipLabeler
+from src.utils.memo import ResponseMemo, response_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_response_key_ignores_case_and_punctuation():
+    assert response_key("m", "label it", "Rolling... SPEED!") == response_key("m", "label it", "rolling speed")
+    assert response_key("m", "label it", "rolling speed") != response_key("m", "name it", "rolling speed")
+    assert response_key("m", "label it", "rolling speed") != response_key("n", "label it", "rolling speed")
+
+
+def test_memo_evicts_least_recently_used_and_expires_on_disk(tmp_path):
+    clock = FakeClock()
+    memo = ResponseMemo(tmp_path / "memo.sqlite3", max_entries=2, ttl=60, clock=clock)
+    memo.store("a", "slate", 1.5)
+    memo.store("b", "countdown", 0.5)
+    assert memo.lookup("a") == "slate"
+    memo.store("c", "speed", 0.5)
+    assert len(memo) == 2
+    # "b" was evicted from memory but is still on disk
+    assert memo.lookup("b") == "countdown"
+    assert memo.stats() == {
+        "memory": 1,
+        "disk": 1,
+        "coalesced": 0,
+        "miss": 0,
+        "hit_rate": 1.0,
+        "saved_seconds": 2.0,
+    }
+    memo.close()
+
+    clock.now += 61
+    reopened = ResponseMemo(tmp_path / "memo.sqlite3", ttl=60, clock=clock)
+    assert reopened.lookup("a") is None
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_memo_coalesces_concurrent_calls():
+    memo = ResponseMemo(None)
+    calls = []
+
+    async def label():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "slate"
+
+    labels = await asyncio.gather(*(memo.call("k", label) for _ in range(5)))
+    assert labels == ["slate"] * 5
+    assert await memo.call("k", label) == "slate"
+    assert len(calls) == 1
+    assert memo.counts == {"miss": 1, "coalesced": 4, "memory": 1}
+    assert memo.hit_rate == pytest.approx(5 / 6)
+
+
+@pytest.mark.asyncio
+async def test_memo_does_not_keep_errors():
+    memo = ResponseMemo(None)
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("rate limited")  # noqa: TRY003
+
+    results = await asyncio.gather(memo.call("k", fail), memo.call("k", fail), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def label():
+        return "slate"
+
+    assert await memo.call("k", label) == "slate"
+    assert memo.counts["miss"] == 2
+
+
+@pytest.mark.asyncio
+async def test_clip_labelers_share_memoized_labels(tmp_path):
+    memo = ResponseMemo(None)
+    for name in ("a.mp4", "b.mp4"):
+        (tmp_path / name).write_bytes(b"\x00" * 64)
+    first = ClipLabeler(tmp_path / "a.mp4", memo=memo)
+    second = ClipLabeler(tmp_path / "b.mp4", memo=memo)
+    first.audio_text = "Three, two, one. Rolling!"
+    second.audio_text = "three two one rolling"
+
+    async def run(**kwargs):
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(final_output_as=lambda _: "countdown")
+
+    with patch("src.cliptale.labeler.Runner.run", side_effect=run) as mocked:
+        assert await asyncio.gather(first.generate_label(), second.generate_label()) == ["countdown", "countdown"]
+    mocked.assert_called_once()
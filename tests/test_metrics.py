@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+import pytest
+
+from src.pipelines.metrics import PipelineMetrics, exporting_metrics
+from src.utils.metrics import MetricsRegistry
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry()
+    clips = registry.counter("clips_total", "Processed clips.", ("status",))
+    depth = registry.gauge("queue_depth", "Queued clips.")
+    latency = registry.histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    clips.inc(status="ok")
+    clips.inc(2, status="ok")
+    depth.set(3)
+    for value in (0.05, 0.1, 0.5, 7.0):
+        latency.observe(value, stage="extract")
+
+    text = registry.to_prometheus()
+    assert "# TYPE clips_total counter" in text
+    assert 'clips_total{status="ok"} 3' in text
+    assert "queue_depth 3" in text
+    assert 'latency_seconds_bucket{stage="extract",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{stage="extract",le="1"} 3' in text
+    assert 'latency_seconds_bucket{stage="extract",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{stage="extract"} 4' in text
+    assert 'latency_seconds_sum{stage="extract"} 7.65' in text
+
+
+def test_metrics_reject_bad_usage():
+    registry = MetricsRegistry()
+    clips = registry.counter("clips_total", "Processed clips.", ("status",))
+    with pytest.raises(ValueError):
+        clips.inc(-1, status="ok")
+    with pytest.raises(ValueError):
+        clips.inc(stage="extract")
+    with pytest.raises(ValueError):
+        registry.gauge("clips_total", "Duplicate.")
+
+
+def test_api_call_tracks_in_flight_and_outcome():
+    metrics = PipelineMetrics()
+    with metrics.api_call("label"):
+        assert metrics.api_in_flight.value(api="label") == 1
+    with pytest.raises(RuntimeError), metrics.api_call("label"):
+        raise RuntimeError
+    assert metrics.api_in_flight.value(api="label") == 0
+    assert metrics.api_calls.value(api="label", status="ok") == 1
+    assert metrics.api_calls.value(api="label", status="error") == 1
+
+
+@pytest.mark.asyncio
+async def test_exporting_metrics_writes_periodically_and_at_the_end(tmp_path):
+    metrics = PipelineMetrics()
+    path = tmp_path / "metrics.json"
+    async with exporting_metrics(metrics, path, interval=0.01):
+        metrics.files_scanned.inc()
+        await asyncio.sleep(0.05)
+        assert path.exists()
+        metrics.files_scanned.inc()
+
+    snapshot = json.loads(path.read_text())
+    assert snapshot["metrics"]["cliptale_files_scanned_total"]["series"] == [{"labels": {}, "value": 2.0}]
+    assert [p.name for p in tmp_path.iterdir()] == ["metrics.json"]
@@ -0,0 +1,106 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from src.cliptale.duplicates import CopyDetector
+from src.models.errors import FFmpegProcessError
+from src.utils.ffmpeg_pool import FFmpegResult
+from src.utils.perceptual import (
+    FRAME_SIDE,
+    BKTree,
+    compute_video_hash,
+    dhash,
+    frames_command,
+    hamming_distance,
+    phash,
+    video_hash,
+)
+
+
+def _frames(seed: int, count: int = 5) -> np.ndarray:
+    """Smooth random thumbnails, like downscaled footage."""
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(0, 8, (count, FRAME_SIDE, FRAME_SIDE))
+    return np.clip(np.cumsum(np.cumsum(noise, axis=1), axis=2) / 4 + 128, 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize("frame_hash", [phash, dhash])
+def test_frame_hashes_survive_reencoding(frame_hash):
+    frame = _frames(1)[0]
+    rng = np.random.default_rng(2)
+    reencoded = np.clip(frame * 0.95 + 6 + rng.normal(0, 2, frame.shape), 0, 255).astype(np.uint8)
+    other = _frames(3)[0]
+
+    assert frame_hash(frame) < 1 << 64
+    assert hamming_distance(frame_hash(frame), frame_hash(reencoded)) <= 8
+    assert hamming_distance(frame_hash(frame), frame_hash(other)) > 16
+
+
+def test_video_hash_zeroes_blank_frames():
+    frames = _frames(4)
+    frames[0] = 0
+    combined = video_hash(frames)
+
+    assert combined is not None
+    assert combined >> 256 == 0
+    assert combined & ((1 << 64) - 1) == phash(frames[-1])
+    assert video_hash(np.zeros((5, FRAME_SIDE, FRAME_SIDE), dtype=np.uint8)) is None
+
+
+def test_bk_tree_matches_brute_force():
+    rng = np.random.default_rng(0)
+    keys = [int.from_bytes(rng.bytes(16), "big") for _ in range(500)]
+    tree = BKTree()
+    for row, key in enumerate(keys):
+        tree.add(key, row)
+    tree.add(keys[7], "again")
+
+    query = keys[7] ^ 0b1011
+    expected = sorted(row for row, key in enumerate(keys) if hamming_distance(query, key) <= 40)
+    matches = tree.search(query, 40)
+    assert len(tree) == 501
+    assert matches[:2] == [(3, 7), (3, "again")]
+    assert sorted(value for _, value in matches if value != "again") == expected
+
+
+def test_frames_command_seeks_every_frame():
+    command = frames_command("clip.mp4", [1.0, 5.5])
+    assert command[:7] == ["ffmpeg", "-ss", "1.000", "-i", "clip.mp4", "-ss", "5.500"]
+    assert "concat=a=0:n=2:v=1" in command[command.index("-filter_complex") + 1]
+    assert command[-5:] == ["-f", "rawvideo", "-pix_fmt", "gray", "pipe:1"]
+
+
+@pytest.mark.asyncio
+async def test_compute_video_hash_reads_raw_frames():
+    frames = _frames(5)
+    pool = MagicMock()
+    pool.run = AsyncMock(return_value=FFmpegResult(0, frames.tobytes(), b"", 0.0, 0.1))
+
+    assert await compute_video_hash("clip.mp4", 20.0, pool=pool) == video_hash(frames)
+    assert "18.000" in pool.run.call_args.args[0]
+    assert await compute_video_hash("clip.mp4", None, pool=pool) is None
+
+    pool.run = AsyncMock(return_value=FFmpegResult(0, frames[:3].tobytes(), b"", 0.0, 0.1))
+    assert await compute_video_hash("clip.mp4", 20.0, pool=pool) is None
+    pool.run = AsyncMock(side_effect=FFmpegProcessError(1, b"moov atom not found"))
+    assert await compute_video_hash("clip.mp4", 20.0, pool=pool) is None
+
+
+@pytest.mark.asyncio
+async def test_copy_detector_groups_copies(tmp_path):
+    detector = CopyDetector(max_distance=8)
+    original = video_hash(_frames(6))
+
+    group, position = detector.join(original, tmp_path / "a.mp4", 30.0, label="rooftop")
+    assert position == 0
+    assert await group.label() == "rooftop"
+    assert detector.join(original ^ 0b111, tmp_path / "a.mov", 30.2) == (group, 1)
+    # Same frames but a different cut is not a copy
+    assert detector.join(original, tmp_path / "a_trimmed.mp4", 24.0)[1] == 0
+    assert detector.join(video_hash(_frames(7)), tmp_path / "b.mp4", 30.0)[1] == 0
+
+    pending, _ = detector.join(video_hash(_frames(8)), tmp_path / "c.mp4", 10.0)
+    detector.release()
+    assert await pending.label() is None
+    assert len(detector) == 1
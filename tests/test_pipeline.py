@@ -0,0 +1,571 @@
+import asyncio
+import hashlib
+import io
+import wave
+from pathlib import Path
+from unittest.mock import ANY, AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from src.cliptale.batch import BatchLabeler
+from src.cliptale.catalog import ClipCatalog
+from src.cliptale.duplicates import CopyDetector, DuplicateLabeler
+from src.cliptale.labeler import DEFAULT_DURATION_LIMIT, ClipLabeler
+from src.cliptale.streaming import StreamingTranscriber
+from src.pipelines.labeler import JOURNAL_FILE_NAME, LabelerPipeline
+from src.pipelines.watcher import DirectoryWatcher
+from src.utils.audio import SPEECH_SAMPLE_RATE
+from src.utils.cache import ResultCache
+from src.utils.fingerprint import fingerprint_file
+from src.utils.journal import ProcessedJournal
+from src.utils.probe import MediaInfo, ProbeIndex
+from src.utils.tracing import Tracer
+from src.utils.vad import read_wav_samples
+
+
+@pytest.fixture
+def work_dir(tmp_path):
+    for name in ("clip_a.mp4", "clip_b.mp4", "clip_c.mp4"):
+        (tmp_path / name).write_bytes(b"\x00" * 64)
+    return tmp_path
+
+
+def _speech_like(seconds: float = 2.0) -> np.ndarray:
+    """Harmonic bursts gated at syllable rate, which the VAD accepts as speech."""
+    t = np.arange(int(SPEECH_SAMPLE_RATE * seconds)) / SPEECH_SAMPLE_RATE
+    voice = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 15)) * 0.2
+    return (voice * (np.sin(2 * np.pi * 2 * t) > 0) * 32767).astype(np.int16)
+
+
+def _wav(samples: np.ndarray) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SPEECH_SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+    buffer.seek(0)
+    return buffer
+
+
+async def fake_probe(file_path, pool=None, timeout=None):
+    if "corrupt" in file_path.name:
+        return MediaInfo(error="Invalid data found when processing input")
+    return MediaInfo(duration=30.0, video_streams=1, audio_streams=0 if "noaudio" in file_path.name else 1)
+
+
+@pytest.fixture
+def fake_stages(monkeypatch):
+    transcriber = MagicMock()
+    transcriber.return_value.transcribe = AsyncMock(side_effect=lambda audio_path: f"speech in {audio_path}")
+    transcriber.return_value.transcribe_file = AsyncMock(
+        side_effect=lambda audio_file, file_name: f"speech in {file_name}"
+    )
+    monkeypatch.setattr("src.pipelines.labeler.AsyncTranscriber", transcriber)
+
+    async def fake_extract(self):
+        self.audio_path = self.file_path.with_suffix(".mp3")
+        self.audio_path.write_bytes(b"\x00" * 32)
+        return self.audio_path
+
+    async def fake_extract_buffer(self):
+        silent = "silent" in self.file_path.name
+        self.audio_buffer = _wav(np.zeros(SPEECH_SAMPLE_RATE, dtype=np.int16) if silent else _speech_like())
+        return self.audio_buffer
+
+    async def fake_extract_pcm(self):
+        return _speech_like().tobytes()
+
+    monkeypatch.setattr("src.cliptale.labeler.probe_media", fake_probe)
+    monkeypatch.setattr("src.utils.probe.probe_media", fake_probe)
+    monkeypatch.setattr(ClipLabeler, "extract_audio_async", fake_extract)
+    monkeypatch.setattr(ClipLabeler, "extract_audio_buffer", fake_extract_buffer)
+    monkeypatch.setattr(ClipLabeler, "extract_pcm", fake_extract_pcm)
+    return transcriber
+
+
+@pytest.mark.asyncio
+async def test_pipeline_labels_every_clip(work_dir, fake_stages, monkeypatch):
+    async def fake_label(self):
+        return self.file_path.stem.upper()
+
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    pipeline = LabelerPipeline(work_dir, "{label}.mp4", jobs=2)
+    results = await pipeline.run()
+
+    assert {result.status for result in results.values()} == {"ok"}
+    assert sorted(path.name for path in work_dir.iterdir()) == ["CLIP_A.mp4", "CLIP_B.mp4", "CLIP_C.mp4"]
+    for result in results.values():
+        assert set(result.timings) == {
+            "fingerprint",
+            "probe",
+            "dedupe",
+            "extract",
+            "vad",
+            "transcribe",
+            "label",
+            "rename",
+        }
+
+
+@pytest.mark.asyncio
+async def test_pipeline_collects_failures(work_dir, fake_stages, monkeypatch):
+
+    async def fake_label(self):
+        if self.file_path.name == "clip_b.mp4":
+            raise RuntimeError("agent unavailable")  # noqa: TRY003
+        return "labelled_" + self.file_path.stem
+
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    pipeline = LabelerPipeline(work_dir, "{label}.mp4", stage_jobs={"label": 1})
+    results = await pipeline.run()
+
+    statuses = {Path(path).name: result.status for path, result in results.items()}
+    assert statuses == {"clip_a.mp4": "ok", "clip_b.mp4": "failed", "clip_c.mp4": "ok"}
+    assert results[str(work_dir / "clip_b.mp4")].error == "label: agent unavailable"
+
+
+def test_pipeline_rejects_unknown_stage(work_dir):
+    with pytest.raises(ValueError):
+        LabelerPipeline(work_dir, stage_jobs={"upload": 2})
+
+
+@pytest.mark.asyncio
+async def test_pipeline_reuses_cached_labels_after_rename(work_dir, fake_stages, monkeypatch, tmp_path_factory):
+    calls = []
+
+    async def fake_label(self):
+        calls.append(self.file_path.name)
+        return "labelled_" + self.file_path.stem
+
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    cache = ResultCache(tmp_path_factory.mktemp("cache") / "results.sqlite3")
+    await LabelerPipeline(work_dir, "{label}.mp4", cache=cache).run()
+    assert len(calls) == 3
+
+    results = await LabelerPipeline(work_dir, "{label}.mp4", cache=cache).run()
+    assert len(calls) == 3
+    assert {result.status for result in results.values()} == {"ok"}
+    assert cache.stats()["label"] == {"hits": 3, "misses": 3}
+    assert sorted(path.name for path in work_dir.iterdir()) == [
+        "labelled_clip_a.mp4",
+        "labelled_clip_b.mp4",
+        "labelled_clip_c.mp4",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_reuses_cached_extraction_metadata(work_dir, fake_stages, monkeypatch, tmp_path_factory):
+    probed = []
+
+    async def counting_probe(file_path, pool=None, timeout=None):
+        probed.append(file_path.name)
+        return await fake_probe(file_path, pool, timeout)
+
+    async def fake_label(self):
+        return "labelled_" + self.file_path.stem
+
+    monkeypatch.setattr("src.cliptale.labeler.probe_media", counting_probe)
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    fake_stages.return_value.transcribe_file.side_effect = RuntimeError("transcription unavailable")
+    cache = ResultCache(tmp_path_factory.mktemp("cache") / "results.sqlite3")
+    results = await LabelerPipeline(work_dir, "{label}.mp4", cache=cache).run()
+    assert {result.status for result in results.values()} == {"failed"}
+    assert len(probed) == 3
+
+    fingerprint = fingerprint_file(work_dir / "clip_a.mp4")
+    audio = cache.get(fingerprint, "audio", ClipLabeler(work_dir / "clip_a.mp4").audio_version)
+    assert audio["duration"] == 30.0
+    assert audio["windows"] == [[0.0, DEFAULT_DURATION_LIMIT]]
+    assert audio["media_info"]["audio_streams"] == 1
+
+    # The transcript is still missing, but the clips are extracted again without probing them
+    fake_stages.return_value.transcribe_file.side_effect = lambda audio_file, file_name: f"speech in {file_name}"
+    results = await LabelerPipeline(work_dir, "{label}.mp4", cache=cache).run()
+    assert {result.status for result in results.values()} == {"ok"}
+    assert len(probed) == 3
+    assert cache.stats()["audio"] == {"hits": 4, "misses": 3}
+
+
+@pytest.mark.asyncio
+async def test_pipeline_watch_mode_journals_renamed_clips(work_dir, fake_stages, monkeypatch):
+    async def fake_label(self):
+        return "labelled_" + self.file_path.stem
+
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    journal = ProcessedJournal(work_dir / JOURNAL_FILE_NAME)
+    watcher = DirectoryWatcher(work_dir, journal, settle_interval=0.05)
+    pipeline = LabelerPipeline(work_dir, "{label}.mp4", journal=journal)
+    task = asyncio.create_task(pipeline.watch(watcher))
+
+    await asyncio.sleep(0.5)
+    (work_dir / "clip_d.mp4").write_bytes(b"\x00" * 64)
+    await asyncio.sleep(0.5)
+    watcher.stop()
+    results = await asyncio.wait_for(task, 2)
+
+    # Renamed clips are journaled under their new names and not picked up again
+    assert sorted(Path(path).name for path in results) == ["clip_a.mp4", "clip_b.mp4", "clip_c.mp4", "clip_d.mp4"]
+    assert {result.status for result in results.values()} == {"ok"}
+    assert journal.is_processed(work_dir / "labelled_clip_d.mp4")
+
+
+@pytest.mark.asyncio
+async def test_pipeline_transcribes_in_memory_audio(work_dir, fake_stages, monkeypatch):
+    labels = {}
+
+    async def fake_label(self):
+        assert self.audio_buffer is None
+        labels[self.file_path.name] = self.audio_text
+        return None
+
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    await LabelerPipeline(work_dir, "{label}.mp4").run()
+    assert labels["clip_a.mp4"] == "speech in clip_a.wav"
+    fake_stages.return_value.transcribe.assert_not_called()
+
+    await LabelerPipeline(work_dir, "{label}.mp4", in_memory_audio=False).run()
+    assert labels["clip_a.mp4"] == f"speech in {work_dir / 'clip_a.mp3'}"
+
+
+@pytest.mark.asyncio
+async def test_pipeline_detects_speech_in_copied_audio(work_dir, fake_stages, monkeypatch):
+    async def copy_extract_buffer(self):
+        self.audio_buffer, self._audio_buffer_suffix = io.BytesIO(b"ID3" + b"\x00" * 64), ".mp3"
+        self._set_audio_codec(copied=True)
+        return self.audio_buffer
+
+    monkeypatch.setattr(ClipLabeler, "extract_audio_buffer", copy_extract_buffer)
+    monkeypatch.setattr(ClipLabeler, "generate_label", AsyncMock(return_value=None))
+    results = await LabelerPipeline(work_dir, "{label}.mp4", min_speech_ratio=0.05).run()
+
+    result = results[str(work_dir / "clip_a.mp4")]
+    assert result.audio_copied
+    assert result.speech_ratio > 0.3
+    fake_stages.return_value.transcribe_file.assert_any_call(ANY, "clip_a.mp3")
+
+
+@pytest.mark.asyncio
+async def test_pipeline_skips_api_calls_for_silent_clips(work_dir, fake_stages, monkeypatch):
+    (work_dir / "silent_broll.mp4").write_bytes(b"\x00" * 64)
+    labelled = []
+
+    async def fake_label(self):
+        labelled.append(self.file_path.name)
+        return "labelled_" + self.file_path.stem
+
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    results = await LabelerPipeline(work_dir, "{label}.mp4", min_speech_ratio=0.05).run()
+
+    silent = results[str(work_dir / "silent_broll.mp4")]
+    assert silent.status == "ok"
+    assert silent.speech_ratio == 0.0
+    assert silent.new_path == work_dir / "silent_broll.mp4"
+    assert "silent_broll.mp4" not in labelled
+    assert fake_stages.return_value.transcribe_file.call_count == 3
+    assert results[str(work_dir / "clip_a.mp4")].speech_ratio > 0.3
+
+
+@pytest.mark.asyncio
+async def test_pipeline_transcribes_every_clip_without_a_speech_ratio(work_dir, fake_stages, monkeypatch):
+    async def quiet_recording(self):
+        with open("tests/sample_audio.wav", "rb") as audio_file:
+            samples, _ = read_wav_samples(audio_file)
+        self.audio_buffer = _wav((samples // 2).astype(np.int16))
+        return self.audio_buffer
+
+    monkeypatch.setattr(ClipLabeler, "extract_audio_buffer", quiet_recording)
+    monkeypatch.setattr(ClipLabeler, "generate_label", AsyncMock(return_value=None))
+    results = await LabelerPipeline(work_dir, "{label}.mp4").run()
+
+    assert {result.speech_ratio for result in results.values()} == {None}
+    assert fake_stages.return_value.transcribe_file.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_pipeline_routes_clips_by_probe(work_dir, fake_stages, monkeypatch, tmp_path_factory):
+    (work_dir / "noaudio_broll.mp4").write_bytes(b"\x00" * 64)
+    (work_dir / "corrupt_proxy.mp4").write_bytes(b"\x00" * 64)
+    probed = []
+
+    async def counting_probe(file_path, pool=None, timeout=None):
+        probed.append(file_path.name)
+        return await fake_probe(file_path, pool, timeout)
+
+    monkeypatch.setattr("src.utils.probe.probe_media", counting_probe)
+
+    async def fake_label(self):
+        return "labelled_" + self.file_path.stem
+
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    probe_index = ProbeIndex(tmp_path_factory.mktemp("index") / "probe.sqlite3")
+    results = await LabelerPipeline(work_dir, "{label}.mp4", probe_index=probe_index).run()
+
+    corrupt = results[str(work_dir / "corrupt_proxy.mp4")]
+    assert corrupt.status == "failed"
+    assert corrupt.error.startswith("probe: Cannot decode")
+    assert "extract" not in corrupt.timings
+    no_audio = results[str(work_dir / "noaudio_broll.mp4")]
+    assert no_audio.status == "ok"
+    assert no_audio.new_path == work_dir / "noaudio_broll.mp4"
+    assert "extract" not in no_audio.timings
+    assert fake_stages.return_value.transcribe_file.call_count == 3
+    assert len(probed) == 5
+
+    # Renamed clips keep their index entries, so a second run probes nothing
+    await LabelerPipeline(work_dir, "{label}.mp4", probe_index=probe_index).run()
+    assert len(probed) == 5
+    assert probe_index.stats()["hits"] == 5
+
+
+@pytest.mark.asyncio
+async def test_pipeline_catalogs_labeled_clips(work_dir, fake_stages, monkeypatch, tmp_path_factory):
+    async def fake_label(self):
+        return "interview_" + self.file_path.stem
+
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    catalog = ClipCatalog(tmp_path_factory.mktemp("catalog") / "catalog.sqlite3")
+    await LabelerPipeline(work_dir, "{label}.mp4", catalog=catalog).run()
+
+    assert len(catalog) == 3
+    hits = catalog.search("interview clip_b")
+    assert [hit.path for hit in hits] == [work_dir / "interview_clip_b.mp4"]
+    assert hits[0].transcript == "speech in clip_b.wav"
+    assert hits[0].duration == 30.0
+    assert hits[0].paths == [work_dir / "clip_b.mp4", work_dir / "interview_clip_b.mp4"]
+
+
+@pytest.mark.parametrize("batched", [False, True])
+@pytest.mark.asyncio
+async def test_pipeline_labels_near_duplicate_clips_once(work_dir, fake_stages, monkeypatch, batched):
+    take = "Okay, we're rolling. Tell me about the rooftop garden and how you started it three years ago."
+    for name in ("take_cam_a.mp4", "take_cam_b.mp4"):
+        (work_dir / name).write_bytes(b"\x00" * 64)
+
+    def transcribe(audio_file, file_name):
+        return take if file_name.startswith("take") else f"speech in {file_name}, a clip of its own"
+
+    fake_stages.return_value.transcribe_file.side_effect = transcribe
+    labelled = []
+
+    async def fake_label(self):
+        labelled.append(self.file_path.name)
+        await asyncio.sleep(0.05)
+        return "labelled_" + self.file_path.stem
+
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    batch_labeler = BatchLabeler(agent=object()) if batched else None
+    if batch_labeler is not None:
+
+        async def fake_generate_labels(clip_labelers, return_exceptions=False):
+            return [await clip_labeler.generate_label() for clip_labeler in clip_labelers]
+
+        monkeypatch.setattr(batch_labeler, "generate_labels", fake_generate_labels)
+    pipeline = LabelerPipeline(
+        work_dir, "{label}.mp4", jobs=3, batch_labeler=batch_labeler, duplicates=DuplicateLabeler()
+    )
+    results = await pipeline.run()
+
+    assert {result.status for result in results.values()} == {"ok"}
+    assert len(labelled) == 4
+    takes = sorted(path.name for path in work_dir.iterdir() if "take_cam" in path.name)
+    leader = takes[0].removesuffix(".mp4")
+    assert takes == [f"{leader}.mp4", f"{leader}_2.mp4"]
+    duplicate = next(result for result in results.values() if result.duplicate_of is not None)
+    assert duplicate.label == f"{leader}_2"
+    assert pipeline.metrics.clips.value(stage="label", status="duplicate") == 1
+
+
+@pytest.mark.asyncio
+async def test_pipeline_renames_copies_after_their_original(work_dir, fake_stages, monkeypatch, tmp_path_factory):
+    take_hash = int.from_bytes(hashlib.sha256(b"take").digest(), "big")
+    for name in ("take.mp4", "take_reimport.mp4"):
+        (work_dir / name).write_bytes(b"take" * 16)
+
+    async def fake_video_hash(file_path, duration):
+        if file_path.read_bytes().startswith(b"take"):
+            # Re-encoded copies differ in a few bits
+            return take_hash ^ len(file_path.stem)
+        return int.from_bytes(hashlib.sha256(file_path.name.encode()).digest(), "big")
+
+    labelled = []
+
+    async def fake_label(self):
+        labelled.append(self.file_path.name)
+        await asyncio.sleep(0.05)
+        if self.file_path.stem.startswith(("take", "rooftop")):
+            return "rooftop"
+        return "labelled_" + self.file_path.stem.removeprefix("labelled_")
+
+    monkeypatch.setattr("src.pipelines.labeler.compute_video_hash", fake_video_hash)
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    catalog = ClipCatalog(tmp_path_factory.mktemp("catalog") / "catalog.sqlite3")
+    pipeline = LabelerPipeline(work_dir, "{label}.mp4", catalog=catalog, copies=CopyDetector())
+    results = await pipeline.run()
+
+    assert {result.status for result in results.values()} == {"ok"}
+    assert len(labelled) == 4
+    assert sorted(path.name for path in work_dir.iterdir() if "rooftop" in path.name) == [
+        "rooftop.mp4",
+        "rooftop_2.mp4",
+    ]
+    copy = next(result for result in results.values() if result.duplicate_of is not None)
+    assert copy.label == "rooftop_2"
+    assert "extract" not in copy.timings
+    assert pipeline.metrics.clips.value(stage="dedupe", status="copy") == 1
+
+    # A later export of the take is recognized from the catalog
+    (work_dir / "take_export.mp4").write_bytes(b"take" * 16)
+    later = LabelerPipeline(work_dir, "{label}.mp4", catalog=catalog, copies=CopyDetector())
+    result = (await later.process([work_dir / "take_export.mp4"]))[str(work_dir / "take_export.mp4")]
+    assert result.status == "ok"
+    assert result.new_path == work_dir / "rooftop_3.mp4"
+    assert result.duplicate_of in {work_dir / "rooftop.mp4", work_dir / "rooftop_2.mp4"}
+    assert len(labelled) == 4
+
+    # Re-running on the whole directory does not mistake the cataloged clips for copies of themselves
+    before = sorted(path.name for path in work_dir.iterdir() if path.suffix == ".mp4")
+    rerun = LabelerPipeline(work_dir, "{label}.mp4", catalog=catalog, copies=CopyDetector())
+    results = await rerun.run()
+    assert {result.status for result in results.values()} == {"ok"}
+    assert sorted(path.name for path in work_dir.iterdir() if path.suffix == ".mp4") == before
+    assert rerun.metrics.clips.value(stage="dedupe", status="copy") == 2
+
+
+@pytest.mark.asyncio
+async def test_pipeline_pauses_and_reports_results(work_dir, fake_stages, monkeypatch):
+    async def fake_label(self):
+        return self.file_path.stem.upper()
+
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    reported = []
+    pipeline = LabelerPipeline(work_dir, "{label}.mp4", on_result=reported.append)
+    pipeline.pause()
+    run = asyncio.create_task(pipeline.run())
+    await asyncio.sleep(0.2)
+    assert pipeline.paused
+    assert reported == []
+    assert not run.done()
+
+    pipeline.resume()
+    results = await run
+    assert sorted(result.label for result in reported) == ["CLIP_A", "CLIP_B", "CLIP_C"]
+    assert {result.status for result in results.values()} == {"ok"}
+
+
+@pytest.mark.asyncio
+async def test_pipeline_labels_clips_in_batches(work_dir, fake_stages, monkeypatch):
+    batch_labeler = BatchLabeler(agent=object())
+    calls = []
+
+    async def fake_generate_labels(clip_labelers, return_exceptions=False):
+        calls.append(len(clip_labelers))
+        return [clip_labeler.file_path.stem.upper() for clip_labeler in clip_labelers]
+
+    monkeypatch.setattr(batch_labeler, "generate_labels", fake_generate_labels)
+    pipeline = LabelerPipeline(work_dir, "{label}.mp4", jobs=3, stage_jobs={"label": 1}, batch_labeler=batch_labeler)
+    results = await pipeline.run()
+
+    assert {result.status for result in results.values()} == {"ok"}
+    assert sorted(path.name for path in work_dir.iterdir()) == ["CLIP_A.mp4", "CLIP_B.mp4", "CLIP_C.mp4"]
+    assert sum(calls) == 3
+    assert len(calls) < 3
+
+
+@pytest.mark.asyncio
+async def test_pipeline_fills_batches_beyond_the_label_queue(work_dir, fake_stages, monkeypatch):
+    for index in range(37):
+        (work_dir / f"take_{index:02d}.mp4").write_bytes(b"\x00" * 64)
+    batch_labeler = BatchLabeler(agent=object(), max_batch_size=16)
+    sizes = []
+
+    async def fake_generate_labels(clip_labelers, return_exceptions=False):
+        sizes.append(len(clip_labelers))
+        await asyncio.sleep(0.05)
+        return [clip_labeler.file_path.stem.upper() for clip_labeler in clip_labelers]
+
+    monkeypatch.setattr(batch_labeler, "generate_labels", fake_generate_labels)
+    # Batches are sent when full, or at the end of the input, never because upstream stages are slow
+    monkeypatch.setattr("src.pipelines.labeler.BATCH_LINGER", 60.0)
+    # The label queue holds 2 * 2 clips, far fewer than a batch
+    pipeline = LabelerPipeline(work_dir, "{label}.mp4", jobs=4, stage_jobs={"label": 2}, batch_labeler=batch_labeler)
+    results = await pipeline.run()
+
+    assert {result.status for result in results.values()} == {"ok"}
+    assert sizes == [16, 16, 8]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_streams_transcription(work_dir, fake_stages, monkeypatch):
+    async def fake_extract_pcm(self, pool=None, timeout=None, stdout=None):
+        for _ in range(10):
+            stdout.write(_speech_like(1.0).tobytes())
+            await asyncio.sleep(0)
+        return b""
+
+    async def fake_transcribe_file(audio_file, file_name):
+        return f"words of {file_name}"
+
+    labels = {}
+
+    async def fake_label(self):
+        labels[self.file_path.name] = self.audio_text
+        return self.file_path.stem.upper()
+
+    monkeypatch.setattr(ClipLabeler, "extract_pcm", fake_extract_pcm)
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    transcriber = MagicMock(transcribe_file=AsyncMock(side_effect=fake_transcribe_file))
+    pipeline = LabelerPipeline(work_dir, "{label}.mp4", streaming=StreamingTranscriber(transcriber, min_words=5))
+    results = await pipeline.run()
+
+    assert labels["clip_a.mp4"] == "words of clip_a_0.wav words of clip_a_1.wav"
+    assert results[str(work_dir / "clip_a.mp4")].new_path == work_dir / "CLIP_A.mp4"
+    assert results[str(work_dir / "clip_a.mp4")].speech_ratio is None
+    fake_stages.return_value.transcribe_file.assert_not_called()
+    assert pipeline.metrics.clips.value(stage="transcribe", status="early_stop") == 3
+    assert pipeline.metrics.transcription_chunks.value(outcome="used") == 6
+
+
+@pytest.mark.asyncio
+async def test_pipeline_records_metrics(work_dir, fake_stages, monkeypatch):
+    async def fake_label(self):
+        return self.file_path.stem.upper()
+
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    (work_dir / "clip_silent.mp4").write_bytes(b"\x00" * 64)
+    pipeline = LabelerPipeline(work_dir, "{label}.mp4", jobs=2, min_speech_ratio=0.05)
+    await pipeline.run()
+
+    metrics = pipeline.metrics
+    assert metrics.files_scanned.value() == 4
+    assert metrics.stage_seconds.count(stage="scan") == 4
+    assert metrics.stage_seconds.count(stage="extract") == 4
+    assert metrics.clips.value(stage="transcribe", status="ok") == 3
+    assert metrics.clips.value(stage="transcribe", status="skipped") == 1
+    assert metrics.api_calls.value(api="transcribe", status="ok") == 3
+    assert metrics.api_in_flight.value(api="transcribe") == 0
+    assert metrics.api_tokens.value(api="label", direction="input") > 0
+    assert metrics.bytes_read.value(stage="extract") > 0
+    assert 'cliptale_stage_clips_total{stage="rename",status="ok"} 4' in metrics.registry.to_prometheus()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_records_trace(work_dir, fake_stages, monkeypatch):
+    async def fake_label(self):
+        await asyncio.sleep(0.01)
+        return self.file_path.stem.upper()
+
+    monkeypatch.setattr(ClipLabeler, "generate_label", fake_label)
+    tracer = Tracer()
+    await LabelerPipeline(work_dir, "{label}.mp4", jobs=2, tracer=tracer).run()
+
+    spans = [event for event in tracer.events if event["ph"] == "X" and event["cat"] == "stage"]
+    assert len(spans) == 3 * 8
+    label_spans = [span for span in spans if span["name"] == "label"]
+    assert all(span["args"]["suspended_ms"] >= 10 for span in label_spans)
+    assert all(span["args"]["queue_wait_ms"] >= 0 for span in spans)
+    clip_tracks = {event["id"] for event in tracer.events if event["ph"] == "b"}
+    assert clip_tracks == {0, 1, 2}
+    worker_tracks = [event["args"]["name"] for event in tracer.events if event["ph"] == "M"]
+    assert "label worker #2" in worker_tracks
@@ -0,0 +1,99 @@
+import json
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.cliptale.labeler import ClipLabeler
+from src.models.errors import FFmpegProcessError, NoAudioStreamError
+from src.utils.ffmpeg_pool import FFmpegResult
+from src.utils.probe import MediaInfo, ProbeIndex, parse_media_info
+
+FFPROBE_OUTPUT = json.dumps({
+    "streams": [
+        {"codec_type": "video", "codec_name": "h264"},
+        {"codec_type": "audio", "codec_name": "aac", "sample_rate": "48000", "channels": 2},
+    ],
+    "format": {
+        "format_name": "mov,mp4,m4a,3gp,3g2,mj2",
+        "duration": "12.500000",
+        "size": "1048576",
+        "tags": {"creation_time": "2024-05-01T10:00:00.000000Z"},
+    },
+}).encode()
+
+
+def _pool(*outcomes):
+    pool = MagicMock()
+    pool.run = AsyncMock(side_effect=[FFmpegResult(0, output, b"", 0.0, 0.1) for output in outcomes])
+    return pool
+
+
+def test_parse_media_info():
+    info = parse_media_info(FFPROBE_OUTPUT)
+    assert info.duration == 12.5
+    assert (info.video_streams, info.audio_streams) == (1, 1)
+    assert (info.audio_codec, info.sample_rate, info.channels) == ("aac", 48000, 2)
+    assert info.creation_time == "2024-05-01T10:00:00.000000Z"
+    assert info.unusable_reason is None
+
+    silent = parse_media_info(b'{"streams": [{"codec_type": "video"}], "format": {"duration": "3.0"}}')
+    assert not silent.has_audio
+    assert parse_media_info(b'{"format": {"duration": "0.000000"}}').unusable_reason == "zero duration"
+    assert parse_media_info(b"garbage").unusable_reason == "unreadable ffprobe output"
+
+
+@pytest.mark.asyncio
+async def test_probe_index_reuses_results_until_file_changes(tmp_path):
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"\x00" * 64)
+    index = ProbeIndex(tmp_path / "probe.sqlite3")
+    pool = _pool(FFPROBE_OUTPUT, FFPROBE_OUTPUT)
+
+    assert (await index.probe(clip, pool)).duration == 12.5
+    assert (await index.probe(clip, pool)).audio_codec == "aac"
+    assert pool.run.call_count == 1
+    assert index.stats() == {"hits": 1, "misses": 1}
+
+    renamed = clip.rename(tmp_path / "renamed.mp4")
+    index.rename(clip, renamed)
+    assert index.get(renamed) is not None
+
+    stat = renamed.stat()
+    os.utime(renamed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert index.get(renamed) is None
+    await index.probe(renamed, pool)
+    assert pool.run.call_count == 2
+    assert len(index) == 1
+
+
+@pytest.mark.asyncio
+async def test_probe_index_remembers_unreadable_files(tmp_path):
+    clip = tmp_path / "broken.mp4"
+    clip.write_bytes(b"")
+    index = ProbeIndex(tmp_path / "probe.sqlite3")
+    pool = MagicMock()
+    pool.run = AsyncMock(side_effect=FFmpegProcessError(1, b"broken.mp4: Invalid data found when processing input"))
+
+    assert "Invalid data" in (await index.probe(clip, pool)).unusable_reason
+    index.close()
+    index = ProbeIndex(tmp_path / "probe.sqlite3")
+    assert "Invalid data" in (await index.probe(clip, pool)).unusable_reason
+    assert pool.run.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_cliplabeler_uses_probed_metadata(tmp_path):
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"\x00" * 64)
+    labeler = ClipLabeler(file_path=clip, sampling=(0.0, 1.0))
+    pool = _pool(FFPROBE_OUTPUT)
+
+    await labeler.probe_media_async(pool=pool)
+    assert labeler.clip_duration == 12.5
+    assert not labeler.needs_duration
+
+    labeler.media_info = MediaInfo(duration=12.5, video_streams=1)
+    with pytest.raises(NoAudioStreamError):
+        await labeler.extract_audio_async(pool=pool)
+    assert pool.run.call_count == 1
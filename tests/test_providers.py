@@ -0,0 +1,194 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from agents.models._openai_shared import get_default_openai_client
+from openai import AsyncOpenAI
+
+from agents import set_default_openai_client
+from src.utils.concurrency import AdaptiveLimiter, LimiterSettings
+from src.utils.providers import (
+    DEFAULT_DRAIN_SECONDS,
+    DRAIN_CONSECUTIVE_FAILURES,
+    MIN_HEDGE_SAMPLES,
+    Endpoint,
+    EndpointRouter,
+    RoutedModel,
+    RoutingModelProvider,
+    get_agent_limiter,
+    get_run_config,
+    set_routing_provider,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeModel:
+    def __init__(self, name, delay=0.0, error=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def get_response(self, *args, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.name
+
+
+def make_router(count, clock=None):
+    return EndpointRouter([Endpoint(f"http://llm-{index}/v1") for index in range(count)], clock=clock or FakeClock())
+
+
+def record(router, index, latencies):
+    for latency in latencies:
+        started = router.start(index)
+        router.clock.now += latency
+        router.finish(index, started)
+
+
+def test_router_prefers_fast_and_unmeasured_endpoints():
+    router = make_router(3)
+    record(router, 0, [2.0, 2.0])
+    record(router, 1, [0.5, 0.5])
+    # Endpoint 2 has never been measured, so it is tried first
+    assert router.ranked() == [2, 1, 0]
+    record(router, 2, [1.0])
+    assert router.ranked() == [1, 2, 0]
+    # Queued requests make an endpoint look slower
+    router.start(1)
+    router.start(1)
+    assert router.ranked() == [2, 1, 0]
+
+
+def test_router_drains_failing_endpoint_until_it_expires():
+    router = make_router(2)
+    record(router, 0, [0.1])
+    record(router, 1, [1.0])
+    for _ in range(DRAIN_CONSECUTIVE_FAILURES):
+        router.finish(0, router.start(0), RuntimeError("502 Bad Gateway"))
+    assert not router.healthy(0)
+    assert router.ranked() == [1]
+    router.clock.now += DEFAULT_DRAIN_SECONDS
+    assert router.healthy(0)
+    assert router.ranked() == [0, 1]
+    assert router.stats[0].error_rate == 0.0
+
+
+def test_router_hedge_delay_is_recent_p95():
+    router = make_router(1)
+    record(router, 0, [0.1] * (MIN_HEDGE_SAMPLES - 1))
+    assert router.hedge_delay(0) is None
+    record(router, 0, [0.1] * 12 + [2.0])
+    assert router.hedge_delay(0) == pytest.approx(2.0)
+
+
+@pytest.mark.asyncio
+async def test_routed_model_hedges_slow_request():
+    router = EndpointRouter([Endpoint("http://slow/v1"), Endpoint("http://fast/v1")])
+    router.stats[0].recent.extend([0.01] * MIN_HEDGE_SAMPLES)
+    router.stats[0].latency = 0.01
+    router.stats[1].latency = 0.02
+    slow, fast = FakeModel("slow", delay=1.0), FakeModel("fast", delay=0.01)
+    model = RoutedModel([slow, fast], router)
+
+    assert await model.get_response() == "fast"
+    # The losing request is cancelled without waiting for it
+    await asyncio.sleep(0)
+    assert model.hedged == 1
+    assert (slow.calls, slow.cancelled, fast.calls) == (1, 1, 1)
+    assert [stats.in_flight for stats in router.stats] == [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_routed_model_hedges_in_a_limiter_slot():
+    router = EndpointRouter([Endpoint("http://slow/v1"), Endpoint("http://fast/v1")])
+    router.stats[0].recent.extend([0.01] * MIN_HEDGE_SAMPLES)
+    router.stats[0].latency = 0.01
+    router.stats[1].latency = 0.02
+    limiter = AdaptiveLimiter(settings=LimiterSettings(initial=1))
+    in_flight = []
+
+    class CountingModel(FakeModel):
+        async def get_response(self, *args, **kwargs):
+            in_flight.append(limiter.in_flight)
+            return await super().get_response(*args, **kwargs)
+
+    model = RoutedModel([CountingModel("slow", delay=1.0), CountingModel("fast", delay=0.01)], router, limiter=limiter)
+    # The caller's own slot, as `run_agent` holds it
+    async with limiter.slot():
+        response = asyncio.ensure_future(model.get_response())
+        await asyncio.sleep(0.05)
+        # The hedge waits for a slot while the limit of 1 is taken
+        assert in_flight == [1]
+    assert await response == "fast"
+    assert in_flight == [1, 1]
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_routed_model_fails_over_on_error():
+    router = EndpointRouter([Endpoint("http://down/v1"), Endpoint("http://up/v1")])
+    router.stats[1].latency = 1.0
+    down, up = FakeModel("down", error=RuntimeError("connection refused")), FakeModel("up")
+    model = RoutedModel([down, up], router, hedge=False)
+
+    assert await model.get_response() == "up"
+    assert model.hedged == 0
+    assert router.stats[0].failures == 1
+
+    up.error = RuntimeError("overloaded")
+    with pytest.raises(RuntimeError):
+        await model.get_response()
+
+
+def test_default_client_leaves_retries_to_the_limiter(monkeypatch):
+    monkeypatch.delenv("LLM_BASE_URLS", raising=False)
+    monkeypatch.setattr("agents.models._openai_shared._default_openai_client", None)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    set_routing_provider(None)
+
+    assert get_run_config() is None
+    client = get_default_openai_client()
+    assert client.max_retries == 0
+
+    set_default_openai_client(AsyncOpenAI(api_key="own", base_url="http://own/v1"), use_for_tracing=False)
+    get_run_config()
+    assert get_default_openai_client().max_retries == 0
+    assert str(get_default_openai_client().base_url) == "http://own/v1/"
+
+
+def test_get_run_config_routes_through_shared_provider(monkeypatch):
+    monkeypatch.delenv("LLM_BASE_URLS", raising=False)
+    set_routing_provider(None)
+    assert get_run_config() is None
+
+    monkeypatch.setenv("LLM_BASE_URLS", "http://gpu-1:8000/v1, http://gpu-2:8000/v1")
+    monkeypatch.setenv("LLM_MODEL_NAME", "qwen")
+    try:
+        run_config = get_run_config()
+        provider = run_config.model_provider
+        assert isinstance(provider, RoutingModelProvider)
+        assert [endpoint.base_url for endpoint in provider.router.endpoints] == [
+            "http://gpu-1:8000/v1",
+            "http://gpu-2:8000/v1",
+        ]
+        assert get_run_config().model_provider is provider
+        assert provider.get_model() is provider.get_model("qwen")
+        assert {client.max_retries for client in provider.clients} == {0}
+        assert provider.get_model().limiter is get_agent_limiter(SimpleNamespace(model=None))
+    finally:
+        set_routing_provider(None)
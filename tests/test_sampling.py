@@ -0,0 +1,40 @@
+import pytest
+
+from src.utils.probe import parse_duration
+from src.utils.sampling import START_ONLY, evenly_spaced, parse_sampling, plan_windows
+
+
+def test_plan_windows_splits_budget():
+    assert plan_windows((0.0, 0.5, 1.0), 15, 120) == [(0.0, 5.0), (57.5, 5.0), (115.0, 5.0)]
+    assert plan_windows((1.0, 0.0), 10, 60) == [(0.0, 5.0), (55.0, 5.0)]
+
+
+def test_plan_windows_falls_back_to_start():
+    assert plan_windows(START_ONLY, 15, 120) == [(0.0, 15.0)]
+    # Unknown duration, or a clip shorter than the budget
+    assert plan_windows((0.0, 1.0), 15, None) == [(0.0, 15.0)]
+    assert plan_windows((0.0, 1.0), 15, 12) == [(0.0, 15.0)]
+
+
+def test_plan_windows_merges_overlaps():
+    assert plan_windows((0.0, 0.1, 1.0), 15, 30) == [(0.0, 7.5), (25.0, 5.0)]
+
+
+def test_parse_sampling():
+    assert parse_sampling("start") == START_ONLY
+    assert parse_sampling("start-middle-end") == (0.0, 0.5, 1.0)
+    assert parse_sampling("5") == evenly_spaced(5) == (0.0, 0.25, 0.5, 0.75, 1.0)
+    assert parse_sampling("0,0.25,1") == (0.0, 0.25, 1.0)
+    with pytest.raises(ValueError):
+        parse_sampling("0,2")
+    with pytest.raises(ValueError):
+        parse_sampling("middle")
+    with pytest.raises(ValueError, match="Invalid sampling spec"):
+        parse_sampling("0")
+
+
+def test_parse_duration():
+    assert parse_duration(b'{"format": {"duration": "12.480000"}}') == 12.48
+    assert parse_duration(b'{"format": {}}') is None
+    assert parse_duration(b"") is None
+    assert parse_duration(b"not json") is None
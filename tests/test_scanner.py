@@ -0,0 +1,62 @@
+from pathlib import Path
+
+import pytest
+
+from src.utils.scanner import iterate_in_thread, scan_videos
+
+
+@pytest.fixture
+def library(tmp_path):
+    for relative_path in (
+        "a.mp4",
+        "notes.txt",
+        ".hidden.mp4",
+        "2024-05-01/A001.MOV",
+        "2024-05-01/A002.mkv",
+        "2024-05-01/proxies/A001_proxy.mp4",
+        "2024-05-02/deep/B001.Mp4",
+        ".Trashes/deleted.mp4",
+    ):
+        path = tmp_path / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"\x00")
+    return tmp_path
+
+
+def _relative(root: Path, paths) -> list[str]:
+    return sorted(path.relative_to(root).as_posix() for path in paths)
+
+
+def test_scan_is_recursive_and_case_insensitive(library):
+    assert _relative(library, scan_videos(library)) == [
+        "2024-05-01/A001.MOV",
+        "2024-05-01/A002.mkv",
+        "2024-05-01/proxies/A001_proxy.mp4",
+        "2024-05-02/deep/B001.Mp4",
+        "a.mp4",
+    ]
+    assert _relative(library, scan_videos(library, recursive=False)) == ["a.mp4"]
+
+
+def test_scan_include_exclude(library):
+    assert _relative(library, scan_videos(library, exclude=["*/proxies"])) == [
+        "2024-05-01/A001.MOV",
+        "2024-05-01/A002.mkv",
+        "2024-05-02/deep/B001.Mp4",
+        "a.mp4",
+    ]
+    assert _relative(library, scan_videos(library, include=["2024-05-01/*"], exclude=["*.mkv"])) == [
+        "2024-05-01/A001.MOV",
+        "2024-05-01/proxies/A001_proxy.mp4",
+    ]
+
+
+def test_scan_is_lazy(library):
+    scanner = scan_videos(library)
+    assert isinstance(next(scanner), Path)
+
+
+@pytest.mark.asyncio
+async def test_iterate_in_thread():
+    items = [item async for item in iterate_in_thread(range(10), batch_size=3)]
+    assert items == list(range(10))
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.cliptale.duplicates import DuplicateLabeler
+from src.utils.similarity import TranscriptIndex, lsh_band_keys, minhash_signature, ngram_vectors, normalize_text
+
+TAKE = "Okay, we're rolling. Tell me about the rooftop garden and how you started it three years ago."
+OTHER_ANGLE = "okay we are rolling - tell me about the rooftop garden and how you started it three years ago"
+UNRELATED = "Chopping onions for the soup while the kettle boils on the stove behind me in the kitchen."
+
+
+def test_ngram_vectors_compare_wording():
+    assert normalize_text("Rolling... SPEED!") == "rolling speed"
+    vectors = ngram_vectors([TAKE, OTHER_ANGLE, UNRELATED, ""])
+    similarities = vectors @ vectors.T
+    assert similarities[0, 1] > 0.85
+    assert similarities[0, 2] < 0.4
+    assert not vectors[3].any()
+
+
+def test_minhash_band_keys_are_stable():
+    signature = minhash_signature(TAKE)
+    assert np.array_equal(signature, minhash_signature(TAKE))
+    assert (signature == minhash_signature(OTHER_ANGLE)).mean() > 0.5
+    assert set(lsh_band_keys(signature)) & set(lsh_band_keys(minhash_signature(OTHER_ANGLE)))
+    assert not set(lsh_band_keys(signature)) & set(lsh_band_keys(minhash_signature(UNRELATED)))
+    with pytest.raises(ValueError):
+        lsh_band_keys(signature, bands=5)
+
+
+def test_transcript_index_finds_near_duplicates():
+    index = TranscriptIndex()
+    rng = np.random.default_rng(0)
+    words = np.array([
+        "city",
+        "light",
+        "night",
+        "morning",
+        "rain",
+        "car",
+        "drive",
+        "talk",
+        "camera",
+        "crowd",
+        "market",
+        "bridge",
+    ])
+    for _ in range(1500):
+        index.add(" ".join(rng.choice(words, 25)))
+    row = index.add(TAKE)
+
+    assert index.search(OTHER_ANGLE, threshold=0.85) == index.search(OTHER_ANGLE, threshold=0.85, exhaustive=True)
+    assert [match for match, _ in index.search(OTHER_ANGLE, threshold=0.85)] == [row]
+    assert index.search(UNRELATED, threshold=0.85) == []
+
+    index.remove(row)
+    assert index.search(OTHER_ANGLE, threshold=0.85, exhaustive=True) == []
+    assert len(index) == 1500
+
+
+@pytest.mark.asyncio
+async def test_duplicate_labeler_groups_takes(tmp_path):
+    def clip(name, text):
+        return SimpleNamespace(file_path=tmp_path / name, audio_text=text)
+
+    duplicates = DuplicateLabeler()
+    leader, position = duplicates.join(clip("cam_a.mp4", TAKE))
+    assert position == 0
+    group, position = duplicates.join(clip("cam_b.mp4", OTHER_ANGLE))
+    assert (group, position) == (leader, 1)
+    assert duplicates.join(clip("kitchen.mp4", UNRELATED))[1] == 0
+    assert duplicates.join(clip("short.mp4", "Okay, rolling.")) == (None, 0)
+
+    duplicates.resolve(leader, "rooftop_garden_interview")
+    assert await group.label() == "rooftop_garden_interview"
+    assert DuplicateLabeler.member_label("rooftop_garden_interview", position) == "rooftop_garden_interview_2"
+
+    kitchen, position = duplicates.join(clip("kitchen_b.mp4", UNRELATED))
+    assert position == 1
+    # A group whose first clip fails to label is disbanded, so its clips are labeled on their own
+    duplicates.resolve(kitchen, None)
+    assert await kitchen.label() is None
+    assert duplicates.join(clip("kitchen_c.mp4", UNRELATED))[1] == 0
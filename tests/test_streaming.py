@@ -0,0 +1,106 @@
+import asyncio
+import io
+import wave
+from array import array
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+
+from src.cliptale.labeler import ClipLabeler
+from src.cliptale.streaming import StreamingTranscriber
+from src.utils.audio import SPEECH_SAMPLE_RATE, pcm_to_wav, quietest_split
+
+ONE_SECOND = SPEECH_SAMPLE_RATE * 2
+
+
+@pytest.fixture
+def clip(tmp_path):
+    file_path = tmp_path / "interview.mp4"
+    file_path.write_bytes(b"\x00" * 64)
+    return ClipLabeler(file_path=file_path)
+
+
+def streaming_extract(seconds: int, decoded: list, error: Optional[Exception] = None):
+    """Fake `extract_pcm` writing a second of audio per event loop iteration."""
+
+    async def extract_pcm(self, pool=None, timeout=None, stdout=None):
+        try:
+            for _ in range(seconds):
+                stdout.write(b"\x00" * ONE_SECOND)
+                decoded.append(ONE_SECOND)
+                await asyncio.sleep(0.001)
+        except asyncio.CancelledError:
+            decoded.append("cancelled")
+            raise
+        if error is not None:
+            raise error
+        return b""
+
+    return extract_pcm
+
+
+def fake_transcriber(names: list):
+    async def transcribe_file(audio_file, file_name):
+        index = int(file_name.rsplit("_", 1)[1].split(".")[0])
+        # Earlier chunks answer last, so the text has to be put back in order
+        await asyncio.sleep(0.02 if index == 0 else 0.001)
+        names.append(file_name)
+        with wave.open(audio_file) as wav:
+            assert wav.getframerate() == SPEECH_SAMPLE_RATE
+        return f"chunk{index} two three"
+
+    return SimpleNamespace(transcribe_file=transcribe_file)
+
+
+def test_quietest_split_finds_the_pause():
+    loud, quiet = array("h", [8000, -8000] * 800), array("h", [0] * 320)
+    pcm = (loud + quiet + loud).tobytes()
+    split = quietest_split(pcm, 0, len(pcm))
+    assert split == len(loud.tobytes()) + 320
+    assert quietest_split(pcm, 0, 100) == 100
+
+    with wave.open(io.BytesIO(pcm_to_wav(pcm))) as wav:
+        assert wav.readframes(wav.getnframes()) == pcm
+
+
+@pytest.mark.asyncio
+async def test_streaming_stops_once_enough_words_are_transcribed(clip, monkeypatch):
+    decoded, names = [], []
+    monkeypatch.setattr(ClipLabeler, "extract_pcm", streaming_extract(30, decoded))
+    streaming = StreamingTranscriber(fake_transcriber(names), chunk_seconds=2.0, min_words=5)
+
+    transcript = await streaming.transcribe(clip)
+    assert transcript.text == "chunk0 two three chunk1 two three"
+    assert clip.audio_text == transcript.text
+    assert (transcript.chunks, transcript.complete) == (2, False)
+    assert decoded[-1] == "cancelled"
+    assert len(decoded) < 30
+    # Nothing is left running once the transcript is returned
+    transcribed = len(names)
+    await asyncio.sleep(0.05)
+    assert len(names) == transcribed
+
+
+@pytest.mark.asyncio
+async def test_streaming_transcribes_all_chunks_in_order(clip, monkeypatch):
+    names = []
+    monkeypatch.setattr(ClipLabeler, "extract_pcm", streaming_extract(5, []))
+    streaming = StreamingTranscriber(fake_transcriber(names), chunk_seconds=2.0, min_words=None)
+
+    transcript = await streaming.transcribe(clip)
+    assert transcript.complete
+    # Silent audio splits where the search for a pause starts, after about a second
+    assert transcript.chunks == len(names) == 4
+    assert transcript.text.split()[::3] == ["chunk0", "chunk1", "chunk2", "chunk3"]
+
+
+@pytest.mark.asyncio
+async def test_streaming_raises_extraction_errors(clip, monkeypatch):
+    monkeypatch.setattr(ClipLabeler, "extract_pcm", streaming_extract(1, [], error=RuntimeError("ffmpeg failed")))
+    streaming = StreamingTranscriber(fake_transcriber([]), chunk_seconds=2.0, min_words=50)
+
+    with pytest.raises(RuntimeError, match="ffmpeg failed"):
+        await streaming.transcribe(clip)
+    with pytest.raises(ValueError):
+        StreamingTranscriber(chunk_seconds=0.5)
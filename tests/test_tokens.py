@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.cliptale.labeler import ClipLabeler
+from src.utils.tokens import TRUNCATION_MARK, compact_transcript, estimate_tokens, strip_fillers, truncate_tokens
+
+
+def test_strip_fillers_removes_hesitations_and_repetition():
+    transcript = "Um, rolling, uh, speed. The the scene is, hmm, ready. Rolling, speed! Take two."
+    assert strip_fillers(transcript) == "rolling speed. The scene is ready. Take two."
+    # Words that merely start like a filler are kept
+    assert strip_fillers("Hummus and ahi, um, for lunch.") == "Hummus and ahi for lunch."
+
+
+def test_truncate_tokens_keeps_start_and_end():
+    text = " ".join(f"word{index}" for index in range(200))
+    truncated = truncate_tokens(text, 40)
+    assert estimate_tokens(truncated) <= 40
+    head, tail = truncated.split(TRUNCATION_MARK)
+    assert text.startswith(head)
+    assert text.endswith(tail)
+    assert len(head) > len(tail)
+    assert truncate_tokens("short take", 40) == "short take"
+
+
+def test_estimate_tokens_counts_cjk_characters_as_tokens():
+    assert estimate_tokens("rolling") == 2
+    assert estimate_tokens("我们在屋顶上拍摄") == 8
+    assert estimate_tokens("第三场 take 2") == 3 + 2
+
+    transcript = "我们今天在屋顶上拍摄第三场戏。" * 40
+    truncated = truncate_tokens(transcript, 30)
+    assert estimate_tokens(truncated) <= 30
+    head, tail = truncated.split(TRUNCATION_MARK)
+    assert transcript.startswith(head)
+    assert transcript.endswith(tail)
+
+
+def test_compact_transcript_keeps_text_of_only_fillers():
+    assert compact_transcript(" Uhm... ") == "Uhm..."
+    assert estimate_tokens(compact_transcript("very long take, " * 500, token_budget=64)) <= 64
+
+
+@pytest.mark.asyncio
+async def test_generate_label_sends_compacted_transcript(tmp_path):
+    file_path = tmp_path / "take.mp4"
+    file_path.write_bytes(b"\x00" * 64)
+    clip_labeler = ClipLabeler(file_path, label_token_budget=16)
+    clip_labeler.audio_text = "Um, so, " + "this is a long rambling take. " * 20 + "And cut."
+
+    run = AsyncMock(return_value=SimpleNamespace(final_output_as=lambda _: "rambling take"))
+    with patch("src.cliptale.labeler.Runner.run", run):
+        assert await clip_labeler.generate_label() == "rambling take"
+    sent = run.call_args.kwargs["input"]
+    assert sent == clip_labeler.label_text
+    assert sent.startswith("so, this is a long rambling take.")
+    assert sent.endswith("And cut.")
+    assert estimate_tokens(sent) <= 16
+
+
+def test_label_version_changes_with_token_budget(tmp_path):
+    file_path = tmp_path / "take.mp4"
+    file_path.write_bytes(b"\x00" * 64)
+    assert ClipLabeler(file_path, label_token_budget=64).label_version != ClipLabeler(file_path).label_version
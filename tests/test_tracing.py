@@ -0,0 +1,62 @@
+import asyncio
+import json
+import sys
+import time
+
+import pytest
+
+from src.utils.ffmpeg_pool import FFmpegPool
+from src.utils.tracing import ActiveTimer, Tracer, current_span
+
+
+@pytest.mark.asyncio
+async def test_active_timer_separates_busy_and_suspended_time():
+    async def work():
+        time.sleep(0.05)
+        await asyncio.sleep(0.1)
+        return "done"
+
+    timer = ActiveTimer(work())
+    started = time.perf_counter()
+    assert await timer == "done"
+    elapsed = time.perf_counter() - started
+    assert 0.05 <= timer.active < 0.09
+    assert elapsed - timer.active >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_active_timer_propagates_errors_and_cancellation():
+    async def fail():
+        await asyncio.sleep(0)
+        raise KeyError("boom")
+
+    with pytest.raises(KeyError):
+        await ActiveTimer(fail())
+
+    async def wait_timed():
+        return await ActiveTimer(asyncio.sleep(10))
+
+    task = asyncio.create_task(wait_timed())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.asyncio
+async def test_ffmpeg_pool_records_subprocess_spans(tmp_path):
+    tracer = Tracer()
+    track = tracer.track("extract worker")
+    with tracer.activate(track):
+        assert current_span() == (tracer, track)
+        await FFmpegPool(max_workers=1).run([sys.executable, "-c", "pass"])
+    assert current_span() is None
+
+    path = tmp_path / "trace.json"
+    tracer.write(path)
+    events = json.loads(path.read_text())["traceEvents"]
+    assert events[0]["ph"] == "M"
+    assert events[0]["args"] == {"name": "extract worker #1"}
+    spans = [event for event in events if event["ph"] == "X"]
+    assert [span["cat"] for span in spans] == ["subprocess", "subprocess"]
+    assert all(span["tid"] == track and span["dur"] >= 0 for span in spans)
@@ -1,8 +1,13 @@
+import asyncio
+import io
 from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from openai import APIConnectionError, APITimeoutError
 
-from src.agents.transcriber import Transcriber
+from src.agents.transcriber import AsyncTranscriber, Transcriber, get_async_client
 
 
 @pytest.fixture
@@ -32,3 +37,70 @@ def test_transcribe_unsupported_format(transcriber):
 def test_transcription_before_transcribe(transcriber):
     with pytest.raises(ValueError):
         _ = transcriber.transcription
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    monkeypatch.setattr("src.agents.transcriber.RETRY_BASE_DELAY", 0.0)
+    client = MagicMock()
+    client.audio.transcriptions.create = AsyncMock(return_value=SimpleNamespace(text="hello"))
+    return client
+
+
+@pytest.mark.asyncio
+async def test_async_transcribe_retries_transient_errors(fake_client):
+    reads = []
+
+    async def flaky_create(model, file, timeout):
+        reads.append(file[1].read())
+        if len(reads) < 3:
+            raise APITimeoutError(request=MagicMock())
+        return SimpleNamespace(text="hello")
+
+    fake_client.audio.transcriptions.create.side_effect = flaky_create
+    text = await AsyncTranscriber(client=fake_client, timeout=5.0).transcribe_file(io.BytesIO(b"RIFF"), "clip.wav")
+
+    assert text == "hello"
+    assert reads == [b"RIFF"] * 3
+
+
+@pytest.mark.asyncio
+async def test_async_transcribe_gives_up_after_max_retries(fake_client):
+    fake_client.audio.transcriptions.create.side_effect = APIConnectionError(request=MagicMock())
+    with pytest.raises(APIConnectionError):
+        await AsyncTranscriber(client=fake_client, max_retries=2).transcribe_file(io.BytesIO(b"RIFF"), "clip.wav")
+    assert fake_client.audio.transcriptions.create.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_transcribe_many_bounds_concurrency(fake_client):
+    in_flight = peak = 0
+
+    async def slow_create(model, file, timeout):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return SimpleNamespace(text=file[0])
+
+    fake_client.audio.transcriptions.create.side_effect = slow_create
+    audio_paths = [Path("tests/sample_audio.wav")] * 5 + [Path("tests/missing_audio.mp3")]
+    texts = await AsyncTranscriber(client=fake_client).transcribe_many(
+        audio_paths, max_concurrency=2, return_exceptions=True
+    )
+
+    assert texts[:5] == ["sample_audio.wav"] * 5
+    assert isinstance(texts[5], FileNotFoundError)
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_async_client_is_shared_and_honours_base_url(monkeypatch):
+    monkeypatch.setenv("LLM_BASE_URL", "http://localhost:9999/v1")
+    monkeypatch.setenv("LLM_API_KEY", "local")
+    client = get_async_client()
+
+    assert get_async_client() is client
+    assert AsyncTranscriber().client is client
+    assert str(client.base_url).startswith("http://localhost:9999/v1")
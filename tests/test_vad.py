@@ -0,0 +1,55 @@
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from src.utils.audio import SPEECH_SAMPLE_RATE
+from src.utils.vad import detect_speech, read_wav_samples
+
+t = np.arange(SPEECH_SAMPLE_RATE * 4) / SPEECH_SAMPLE_RATE
+rng = np.random.default_rng(0)
+
+
+def _speech_like() -> np.ndarray:
+    voice = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 15)) * 0.2
+    return voice * (np.sin(2 * np.pi * 2 * t) > 0) + rng.standard_normal(len(t)) * 0.001
+
+
+def test_detects_speech_like_signal():
+    result = detect_speech(_speech_like())
+    assert 0.3 < result.speech_ratio < 0.6
+    assert result.duration == 4.0
+
+
+@pytest.mark.parametrize("gain_db", [0, -6, -12, -18])
+def test_detects_speech_like_signal_at_any_level(gain_db):
+    noisy = _speech_like() * 10 ** (gain_db / 20) + rng.standard_normal(len(t)) * 0.003
+    assert detect_speech(noisy, SPEECH_SAMPLE_RATE).speech_ratio > 0.3
+
+
+def test_rejects_silence_hum_hiss_and_music():
+    assert detect_speech(np.zeros(len(t), dtype=np.int16)).speech_ratio == 0.0
+    assert detect_speech(0.5 * np.sin(2 * np.pi * 100 * t)).speech_ratio == 0.0
+    assert detect_speech(rng.standard_normal(len(t)) * 0.05).speech_ratio == 0.0
+    chord = 0.3 * np.sin(2 * np.pi * 440 * t) + 0.3 * np.sin(2 * np.pi * 554 * t)
+    assert detect_speech(chord).speech_ratio == 0.0
+
+
+def test_handles_audio_shorter_than_a_frame():
+    assert detect_speech(np.zeros(10, dtype=np.int16)).speech_ratio == 0.0
+
+
+def test_read_wav_samples_downmixes():
+    stereo = np.array([[1000, 3000], [-1000, -3000]], dtype=np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(SPEECH_SAMPLE_RATE)
+        wav.writeframes(stereo.tobytes())
+
+    samples, sample_rate = read_wav_samples(buffer)
+    assert sample_rate == SPEECH_SAMPLE_RATE
+    assert samples.tolist() == [2000, -2000]
+    assert buffer.tell() == 0
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from src.pipelines.watcher import DirectoryWatcher
+from src.utils.journal import ProcessedJournal
+
+
+async def _collect(watcher: DirectoryWatcher, found: list) -> None:
+    async for path in watcher:
+        found.append(path.name)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_inotify", [True, False])
+async def test_watcher_yields_new_files_once_settled(tmp_path, use_inotify):
+    (tmp_path / "existing.mp4").write_bytes(b"\x00" * 16)
+    (tmp_path / "notes.txt").write_text("ignored")
+    watcher = DirectoryWatcher(tmp_path, settle_interval=0.05, poll_interval=0.05, use_inotify=use_inotify)
+    found: list = []
+    task = asyncio.create_task(_collect(watcher, found))
+
+    await asyncio.sleep(0.3)
+    assert found == ["existing.mp4"]
+
+    card = tmp_path / "DCIM" / "100CANON"
+    card.mkdir(parents=True)
+    await asyncio.sleep(0.1)
+    with open(card / "MVI_0001.MOV", "wb") as file:
+        for _ in range(5):
+            file.write(b"\x00" * 1024)
+            file.flush()
+            await asyncio.sleep(0.03)
+            assert "MVI_0001.MOV" not in found
+    await asyncio.sleep(0.4)
+
+    watcher.stop()
+    await asyncio.wait_for(task, 2)
+    assert found == ["existing.mp4", "MVI_0001.MOV"]
+
+
+@pytest.mark.asyncio
+async def test_watcher_skips_journaled_files(tmp_path):
+    done = tmp_path / "done.mp4"
+    done.write_bytes(b"\x00" * 16)
+    changed = tmp_path / "changed.mp4"
+    changed.write_bytes(b"\x00" * 16)
+
+    journal = ProcessedJournal(tmp_path / "journal.jsonl")
+    journal.record(done, "ok")
+    journal.record(changed, "ok")
+    journal.close()
+    changed.write_bytes(b"\x00" * 32)
+
+    watcher = DirectoryWatcher(tmp_path, ProcessedJournal(tmp_path / "journal.jsonl"), settle_interval=0.05)
+    found: list = []
+    task = asyncio.create_task(_collect(watcher, found))
+    await asyncio.sleep(0.3)
+    watcher.stop()
+    await asyncio.wait_for(task, 2)
+    assert found == ["changed.mp4"]